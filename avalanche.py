@@ -0,0 +1,150 @@
+"""
+Phân tích hiệu ứng tuyết lở (avalanche), SAC và BIC trên toàn bộ không gian
+
+Với mỗi bit đầu vào (8 bit plaintext và 8 bit khóa) được lật, đếm trên cả
+65.536 cặp (plaintext, key) tần suất mỗi bit đầu ra bị lật, sau từng vòng
+và sau toàn bộ thuật toán:
+    - ma trận avalanche / SAC: P(bit ra j lật | bit vào i lật), lý tưởng 0.5
+    - trọng số avalanche: số bit ra lật trung bình
+    - ma trận BIC: hệ số tương quan giữa việc lật hai bit ra j, k
+
+Đầu ra của từng vòng lấy từ trace_columns của engine bảng tra, đầu ra cuối
+lấy từ codebook tham chiếu (tính bằng TinyDES.encrypt). Mọi phép đếm là
+phép toán bytes ở mức C (hoán đổi khối, XOR số nguyên lớn, translate,
+count) trên cả cột 65.536 byte thay vì vòng lặp lồng nhau.
+
+Bit được đánh số từ trái sang (bit 0 là MSB) giống chuỗi nhị phân của TinyDES.
+"""
+
+import math
+from functools import lru_cache
+
+import conformance
+from tinydes import TinyDES
+from tinydes_fast import FastTinyDES, xor_bytes
+
+# Các vòng của TinyDES gốc (biến thể: range(1, engine.rounds + 1))
+ROUNDS = tuple(range(1, len(TinyDES.DEFAULT_SHIFTS) + 1))
+INPUT_LABELS = [f"P{i}" for i in range(8)] + [f"K{i}" for i in range(8)]
+OUTPUT_LABELS = [f"C{j}" for j in range(8)]
+
+# BIT_SET[j][b] = 1 nếu bit j (MSB là bit 0) của b bằng 1
+BIT_SET = [bytes((b >> (7 - j)) & 1 for b in range(256)) for j in range(8)]
+POPCOUNT = bytes(bin(b).count("1") for b in range(256))
+# Đưa nửa trái 4 bit lên vị trí cao của byte
+HIGH_NIBBLE_SHIFT = bytes((b << 4) & 0xFF for b in range(256))
+
+
+def _both_set(j, k):
+    return bytes(((b >> (7 - j)) & (b >> (7 - k))) & 1 for b in range(256))
+
+
+BOTH_SET = [[_both_set(j, k) for k in range(8)] for j in range(8)]
+
+
+def flip_index(column, mask):
+    """column'[i] = column[i ^ mask] for a 65536-byte column (mask a power of two)"""
+    return b"".join(column[s + mask:s + 2 * mask] + column[s:s + mask]
+                    for s in range(0, len(column), 2 * mask))
+
+
+def round_outputs(engine=None):
+    """
+    {round: 65536-byte column of the state after that round}, key-major
+    engine: table engine of a variant (any number of rounds); the stock
+    cipher's last round comes from the reference codebook
+    """
+    stock = engine is None
+    engine = engine if engine is not None else FastTinyDES()
+    columns = engine.trace_columns(conformance.ALL_BLOCKS, conformance.ALL_KEYS)
+    rounds = engine.rounds
+    outputs = {}
+    for r in range(1, rounds):
+        # Cột left/right của vòng r + 1 (sau plaintext, key và các khóa vòng, 8 cột mỗi vòng)
+        left, right = columns[2 + rounds + 8 * r], columns[3 + rounds + 8 * r]
+        outputs[r] = xor_bytes(left.translate(HIGH_NIBBLE_SHIFT), right)
+    outputs[rounds] = conformance.reference_codebook()[0] if stock else columns[-1]
+    return outputs
+
+
+def _matrices(output):
+    n = len(output)
+    sac = []
+    weights = []
+    bic = []
+    for i in range(16):
+        # Bit plaintext lật trong một khối 256, bit khóa lật giữa các khối
+        mask = 1 << (7 - i) if i < 8 else 256 << (7 - (i - 8))
+        diff = xor_bytes(output, flip_index(output, mask))
+        probabilities = [1 - diff.translate(BIT_SET[j]).count(0) / n for j in range(8)]
+        sac.append(probabilities)
+        weights.append(sum(diff.translate(POPCOUNT)) / n)
+        correlation = [[0.0] * 8 for _ in range(8)]
+        for j in range(8):
+            for k in range(j + 1, 8):
+                pj, pk = probabilities[j], probabilities[k]
+                pjk = 1 - diff.translate(BOTH_SET[j][k]).count(0) / n
+                denominator = math.sqrt(pj * (1 - pj) * pk * (1 - pk))
+                value = (pjk - pj * pk) / denominator if denominator else 0.0
+                correlation[j][k] = correlation[k][j] = value
+        bic.append(correlation)
+    return sac, weights, bic
+
+
+@lru_cache(maxsize=None)
+def _stock_analysis():
+    return _analysis(round_outputs())
+
+
+def analyze(engine=None):
+    """
+    Avalanche/SAC/BIC per round and for the full cipher
+    engine: table engine of a variant (default: stock TinyDES, cached)
+    Returns: dict round -> {'sac', 'avalanche_weight', 'bic', 'bic_max', 'summary'}
+    """
+    return _stock_analysis() if engine is None else _analysis(round_outputs(engine))
+
+
+def _analysis(outputs):
+    result = {}
+    for r, output in outputs.items():
+        sac, weights, bic = _matrices(output)
+        bic_max = [[max(abs(bic[i][j][k]) for i in range(16)) if j != k else 0.0 for k in range(8)]
+                   for j in range(8)]
+        deviations = [abs(p - 0.5) for row in sac for p in row]
+        result[r] = {
+            "sac": sac,
+            "avalanche_weight": weights,
+            "bic": bic,
+            "bic_max": bic_max,
+            "summary": {
+                "sac_mean_deviation": sum(deviations) / len(deviations),
+                "sac_max_deviation": max(deviations),
+                "mean_avalanche_weight": sum(weights) / len(weights),
+                "bic_max_correlation": max(max(row) for row in bic_max),
+            },
+        }
+    return result
+
+
+def heatmap(matrix, rows, cols, title):
+    """Heatmap-ready JSON: labels plus row-major values"""
+    return {"title": title, "rows": rows, "cols": cols, "values": matrix}
+
+
+def heatmaps(rounds=None, analysis=None):
+    """
+    Heatmap JSON for the SAC and BIC matrices of the requested rounds
+    analysis: result of analyze() (default: stock TinyDES), rounds default to all of them
+    """
+    analysis = analysis if analysis is not None else analyze()
+    rounds = sorted(analysis) if rounds is None else rounds
+    maps = []
+    for r in rounds:
+        name = "toàn bộ" if r == max(analysis) else f"vòng {r}"
+        data = analysis[r]
+        maps.append(heatmap(data["sac"], INPUT_LABELS, OUTPUT_LABELS,
+                            f"SAC ({name}): P(bit ra lật | bit vào lật)"))
+        maps.append(heatmap(data["bic_max"], OUTPUT_LABELS, OUTPUT_LABELS,
+                            f"BIC ({name}): |tương quan| lớn nhất giữa hai bit ra"))
+    return maps
@@ -0,0 +1,268 @@
+"""
+Bộ benchmark cho HỆ THỐNG MÃ HÓA TINYDES
+
+Đo trên từng engine (chuỗi nhị phân 'string' và bảng tra 'table'):
+    - độ trễ mã hóa/giải mã một khối
+    - thông lượng hàng loạt theo kích thước buffer
+    - chi phí lịch khóa
+    - chi phí trace chi tiết
+và thông lượng HTTP đầu-cuối trên một tiến trình main:app chạy cục bộ.
+
+Kết quả được lưu dạng JSON để so sánh giữa các commit:
+    python cli.py benchmark -o before.json
+    python cli.py benchmark -o after.json --compare before.json
+"""
+
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import urllib.parse
+
+from tinydes import TinyDES
+from tinydes_fast import FastTinyDES
+from trace_store import TraceStore
+
+BULK_SIZES = (64, 4096, 65536, 1 << 20)
+# Engine chuỗi quá chậm cho buffer lớn, chỉ đo tới kích thước này
+STRING_BULK_LIMIT = 4096
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(fn, min_time=0.2, repeat=5):
+    """
+    Time fn() with timeit, auto-scaling the loop count
+    Returns: dict with best/median seconds per call
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"best_s": min(runs), "median_s": statistics.median(runs), "loops": number}
+
+
+def _string_encrypt_bytes(engine, data, key):
+    key_bin = format(key, '08b')
+    return bytes(int(engine.encrypt(format(b, '08b'), key_bin), 2) for b in data)
+
+
+def bench_engines(quick=False):
+    """Single-block, bulk, key-schedule and detailed-trace measurements"""
+    min_time = 0.05 if quick else 0.2
+    repeat = 3 if quick else 5
+    reference = TinyDES()
+    fast = FastTinyDES(reference)
+    store = TraceStore.open(engine=fast)
+    rng = random.Random(2024)
+    pt, key = 0x5C, 0x6A
+    results = []
+
+    def add(group, engine, name, fn, items=1):
+        stats = measure(fn, min_time, repeat)
+        stats.update({"group": group, "engine": engine, "name": name, "items": items,
+                      "throughput_per_s": items / stats["best_s"]})
+        results.append(stats)
+
+    # Một khối
+    pt_bin, key_bin = format(pt, '08b'), format(key, '08b')
+    add("block", "string", "encrypt", lambda: reference.encrypt(pt_bin, key_bin))
+    add("block", "string", "decrypt", lambda: reference.decrypt(pt_bin, key_bin))
+    add("block", "table", "encrypt", lambda: fast.encrypt_block(pt, key))
+    add("block", "table", "decrypt", lambda: fast.decrypt_block(pt, key))
+
+    # Hàng loạt (ECB) theo kích thước buffer
+    for size in BULK_SIZES:
+        data = rng.getrandbits(8 * size).to_bytes(size, 'big')
+        add("bulk", "table", f"encrypt_{size}", lambda d=data: fast.encrypt_bytes(d, key), size)
+        add("bulk", "table", f"decrypt_{size}", lambda d=data: fast.decrypt_bytes(d, key), size)
+        if size <= STRING_BULK_LIMIT:
+            add("bulk", "string", f"encrypt_{size}",
+                lambda d=data: _string_encrypt_bytes(reference, d, key), size)
+
+    # Lịch khóa: khóa con (string) và bảng hoán vị 256 byte (table)
+    add("key_schedule", "string", "generate_subkeys", lambda: reference.generate_subkeys(key_bin))
+
+    def build_tables():
+        fast._enc_tables[key] = None
+        fast._dec_tables[key] = None
+        fast.decrypt_table(key)
+    add("key_schedule", "table", "permutation_tables", build_tables)
+
+    # Trace chi tiết
+    add("detailed", "string", "encrypt_detailed", lambda: reference.encrypt_detailed(pt_bin, key_bin))
+    add("detailed", "trace_store", "encrypt_detailed", lambda: store.encrypt_detailed(pt, key))
+    plaintexts = rng.getrandbits(8 * 4096).to_bytes(4096, 'big')
+    keys = rng.getrandbits(8 * 4096).to_bytes(4096, 'big')
+    add("detailed", "table", "trace_columns_4096",
+        lambda: fast.trace_columns(plaintexts, keys), 4096)
+    return results
+
+
+def free_port():
+    """An unused localhost TCP port for a test server"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port=None, workers=1, timeout=20.0):
+    """
+    Launch 'uvicorn main:app' locally and wait for /health
+    Returns: (process, port)
+    """
+    port = port or free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server dừng ngay khi khởi động")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Hết thời gian chờ server khởi động")
+
+
+def stop_server(process):
+    """Terminate a server started by start_server"""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+HTTP_SCENARIOS = (
+    ("GET", "/health", None),
+    ("POST", "/encrypt", {"plaintext": "01011100", "key": "01101010"}),
+    ("POST", "/decrypt", {"ciphertext": "00000110", "key": "01101010"}),
+    ("POST", "/process", {"plaintext": "01011100", "key": "01101010", "process_type": "encrypt"}),
+    ("GET", "/api/process?input=92&key=106", None),
+)
+
+
+def bench_http(requests_per_route=200, port=None):
+    """Sequential keep-alive throughput per route against a local server"""
+    process, port = start_server(port)
+    results = []
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        for method, path, form in HTTP_SCENARIOS:
+            body = urllib.parse.urlencode(form) if form else None
+            headers = {"Content-Type": "application/x-www-form-urlencoded"} if form else {}
+            latencies = []
+            errors = 0
+            for _ in range(requests_per_route):
+                start = time.perf_counter()
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                latencies.append(time.perf_counter() - start)
+                if response.status >= 400:
+                    errors += 1
+            total = sum(latencies)
+            latencies.sort()
+            results.append({
+                "group": "http", "engine": "http", "name": f"{method} {path.split('?')[0]}",
+                "items": requests_per_route, "errors": errors,
+                "best_s": latencies[0],
+                "median_s": statistics.median(latencies),
+                "p95_s": latencies[int(0.95 * (len(latencies) - 1))],
+                "throughput_per_s": requests_per_route / total,
+            })
+        conn.close()
+    finally:
+        stop_server(process)
+    return results
+
+
+def git_commit():
+    """Current git commit hash, if available"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(quick=False, http=True, http_requests=200):
+    """Run the whole suite and return a JSON-serializable result"""
+    results = bench_engines(quick)
+    if http:
+        results += bench_http(50 if quick else http_requests)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def _key(row):
+    return row["group"], row["engine"], row["name"]
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compare two result sets by best time per operation
+    Returns: list of (group, engine, name, old_s, new_s, ratio, status)
+    """
+    old = {_key(row): row for row in baseline["results"]}
+    rows = []
+    for row in current["results"]:
+        previous = old.get(_key(row))
+        if previous is None:
+            continue
+        ratio = row["best_s"] / previous["best_s"]
+        status = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        rows.append((*_key(row), previous["best_s"], row["best_s"], ratio, status))
+    return rows
+
+
+def format_results(result):
+    """Plain text table of a result set"""
+    lines = [f"{'Nhóm':<14} {'Engine':<12} {'Phép đo':<28} {'Tốt nhất':>12} {'Thông lượng/s':>16}"]
+    for row in result["results"]:
+        lines.append(f"{row['group']:<14} {row['engine']:<12} {row['name']:<28} "
+                     f"{row['best_s'] * 1e6:>10.2f}µs {row['throughput_per_s']:>16,.0f}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    """Plain text table of compare()"""
+    lines = [f"{'Nhóm':<14} {'Engine':<12} {'Phép đo':<28} {'Cũ (µs)':>12} {'Mới (µs)':>12} {'Tỉ lệ':>8}"]
+    for group, engine, name, old_s, new_s, ratio, status in rows:
+        mark = {"slower": "▲", "faster": "▼", "same": " "}[status]
+        lines.append(f"{group:<14} {engine:<12} {name:<28} {old_s * 1e6:>12.2f} "
+                     f"{new_s * 1e6:>12.2f} {ratio:>7.2f}{mark}")
+    return "\n".join(lines)
+
+
+def save(result, path):
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
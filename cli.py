@@ -0,0 +1,746 @@
+#!/usr/bin/env python3
+"""
+Giao diện dòng lệnh (không tương tác) cho HỆ THỐNG MÃ HÓA TINYDES
+
+Ví dụ:
+    python cli.py encrypt --key 6A --mode ctr --iv 0x10 -i input.bin -o output.bin
+    cat secret.bin | python cli.py decrypt --key 106 --mode cbc --iv 7 > plain.bin
+    python cli.py encrypt --key 0x6A --mode ctr --in-place -i big.bin
+    python cli.py container pack --key 0x6A -i video.bin -o video.tdc
+    python cli.py container read --key 0x6A -i video.tdc --range 1000-1999
+    python cli.py rekey --old-key 0x6A --new-key 0x17 -i old.bin -o new.bin
+    python cli.py rekey --batch jobs.csv -w 4
+    python cli.py mac --key 0x3C -i big.bin --algorithm pmac -w 4
+    python cli.py mac --key 0x3C --encrypt-key 0x6A --mode ctr -i plain.bin -o sealed.bin
+    python cli.py brute-force --pair 5C:06 --pair 00:3B
+    python cli.py keysearch secret1.bin secret2.bin --mode ctr -w 4
+    python cli.py rainbow build --stages 2 --chains 4096 --length 64 -o cascade2.tdrb
+    python cli.py rainbow lookup -t cascade2.tdrb --ciphertext 0x50B1
+    python cli.py keyspace --key 0x6A
+    python cli.py avalanche --round 3
+    python cli.py randomness --key 0x6A --mode ofb --length 4194304
+    python cli.py randomness --compare 0x6A,0x17 --mode ctr ofb cbc
+    python cli.py randomness --raw -i random.bin
+    python cli.py tables --key 0x6A --format hex
+    python cli.py trace-export --count 1000000 --seed 1 -o traces.csv
+    python cli.py trace-export --format bin -o traces.tdtrace
+    python cli.py trace-store verify
+    python cli.py profile --engine string --folded stacks.txt
+    python cli.py conformance
+    python cli.py benchmark -o bench.json --compare old_bench.json
+    python cli.py loadgen --launch --workers 1,2 --rate 300 --duration 10
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+
+import avalanche
+import benchmark
+import conformance
+import container
+import keysearch
+import keyspace
+import loadgen
+import mac
+import mmap_crypt
+import modes
+import rainbow
+import randomness
+import rekey
+import trace_export
+import trace_store
+from profiling import profiler
+from input_parser import convert_input
+from tinydes import TinyDES
+from tinydes_fast import FastTinyDES
+
+
+def save_json(result, path):
+    """Write a command's result as indented JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+def open_output(path, binary):
+    """Open an output path, '-' meaning stdout"""
+    if path in (None, "-"):
+        return sys.stdout.buffer if binary else sys.stdout
+    if binary:
+        return open(path, "wb")
+    return open(path, "w", newline="")
+
+
+def open_input(path):
+    """Open an input path, '-' meaning stdin"""
+    if path in (None, "-"):
+        return sys.stdin.buffer
+    return open(path, "rb")
+
+
+def parse_byte(text, name="key"):
+    """Parse an 8-bit value given as binary, hex or decimal"""
+    value = convert_input(text, 8)
+    if value is None:
+        raise ValueError(f"Định dạng {name} không hợp lệ: {text}")
+    return int(value, 2)
+
+
+def cmd_crypt(args):
+    """Mã hóa / giải mã dữ liệu từ file hoặc stdin theo từng đoạn lớn"""
+    key = parse_byte(args.key)
+    iv = parse_byte(args.iv, "IV")
+    decrypt = args.command == "decrypt"
+    if args.in_place or args.mmap:
+        # Ánh xạ bộ nhớ chỉ áp dụng cho file thật, không cho stdin/stdout
+        if args.input == "-" or (args.mmap and not args.in_place and args.output == "-"):
+            raise ValueError("--mmap/--in-place cần đường dẫn file cho -i (và -o)")
+        output = None if args.in_place else args.output
+        mmap_crypt.crypt_file(args.input, key, args.mode, iv, decrypt, output,
+                              slice_size=args.buffer_size)
+        return 0
+    source = open_input(args.input)
+    sink = open_output(args.output, binary=True)
+    try:
+        modes.crypt_stream(source, sink, key, args.mode, iv,
+                           decrypt=decrypt,
+                           workers=args.workers, buffer_size=args.buffer_size)
+        sink.flush()
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+    return 0
+
+
+def cmd_container(args):
+    """Đóng gói, giải nén, đọc một khoảng byte hoặc kiểm tra container"""
+    key = parse_byte(args.key)
+    if args.action == "pack":
+        nonce = None if args.nonce is None else parse_byte(args.nonce, "nonce")
+        source = open_input(args.input)
+        try:
+            with open(args.output, "wb") as sink:
+                size = container.write_container(source, sink, key, args.mode, nonce, args.chunk_size)
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+        print(f"✅ Đã tạo container: {args.output} ({size} bytes plaintext)", file=sys.stderr)
+        return 0
+
+    with container.ContainerReader.open(args.input, key) as reader:
+        if args.action == "verify":
+            bad = reader.verify()
+            for chunk in bad:
+                print(f"✗ chunk {chunk}: CRC32 không khớp")
+            print(f"{'❌' if bad else '✓'} {len(reader.index)} chunk, {len(bad)} lỗi, chế độ {reader.mode}")
+            return 1 if bad else 0
+        start, end = 0, None
+        if args.action == "read":
+            if not args.range:
+                raise ValueError("read cần --range START-END")
+            start, end = container.parse_range(f"bytes={args.range}", reader.size)
+        sink = open_output(args.output, binary=True)
+        try:
+            for piece in reader.iter_range(start, end):
+                sink.write(piece)
+            sink.flush()
+        finally:
+            if sink is not sys.stdout.buffer:
+                sink.close()
+    return 0
+
+
+def cmd_rekey(args):
+    """Đổi khóa dữ liệu đã mã hóa bằng một bảng hoán vị ghép (không qua plaintext)"""
+    if args.batch:
+        jobs = rekey.read_jobs(args.batch, parse_byte)
+        for path, size in rekey.rekey_batch(jobs, args.workers):
+            print(f"✓ {path}: {size} bytes")
+        print(f"✅ Đã đổi khóa {len(jobs)} file", file=sys.stderr)
+        return 0
+    if args.old_key is None or args.new_key is None:
+        raise ValueError("Cần --old-key và --new-key (hoặc --batch)")
+    old_key, new_key = parse_byte(args.old_key, "old key"), parse_byte(args.new_key, "new key")
+    old_iv, new_iv = parse_byte(args.old_iv, "IV"), parse_byte(args.new_iv, "IV")
+    if args.in_place:
+        if args.input == "-":
+            raise ValueError("--in-place cần đường dẫn file cho -i")
+        rekey.rekey_file(args.input, old_key, new_key, None, args.mode, old_iv, new_iv, args.buffer_size)
+        return 0
+    source = open_input(args.input)
+    sink = open_output(args.output, binary=True)
+    try:
+        rekey.rekey_stream(source, sink, old_key, new_key, args.mode, old_iv, new_iv, args.buffer_size)
+        sink.flush()
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+    return 0
+
+
+def cmd_mac(args):
+    """Tính/kiểm tra MAC, hoặc mã hóa rồi tính MAC trong một lượt"""
+    key = parse_byte(args.key, "MAC key")
+    expected = None if args.verify is None else bytes([parse_byte(args.verify, "tag")])
+    if args.encrypt_key is not None:
+        if args.verify is not None:
+            # Giải mã và kiểm tra tag trong cùng một lượt
+            # Plaintext chỉ được ghi ra sau khi tag khớp
+            encrypt_key = parse_byte(args.encrypt_key)
+            iv = parse_byte(args.iv, "IV")
+            source = open_input(args.input)
+            try:
+                if args.output in (None, "-"):
+                    buffer = io.BytesIO()
+                    ok = mac.decrypt_and_verify(source, buffer, encrypt_key, key, expected,
+                                                args.mode, iv, args.algorithm)
+                    if ok:
+                        sys.stdout.buffer.write(buffer.getvalue())
+                        sys.stdout.buffer.flush()
+                else:
+                    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(args.output)),
+                                                     prefix=".mac-", suffix=".tmp")
+                    try:
+                        with os.fdopen(fd, "wb") as sink:
+                            ok = mac.decrypt_and_verify(source, sink, encrypt_key, key, expected,
+                                                        args.mode, iv, args.algorithm)
+                        if ok:
+                            os.replace(temp_path, args.output)
+                    finally:
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
+            finally:
+                if source is not sys.stdin.buffer:
+                    source.close()
+            print("✓ Tag hợp lệ" if ok else "❌ Tag không khớp: không ghi dữ liệu đã giải mã", file=sys.stderr)
+            return 0 if ok else 1
+        source = open_input(args.input)
+        sink = open_output(args.output, binary=True)
+        try:
+            _, tag = mac.encrypt_then_mac(source, sink, parse_byte(args.encrypt_key), key, args.mode,
+                                          parse_byte(args.iv, "IV"), args.algorithm)
+            sink.flush()
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+            if sink is not sys.stdout.buffer:
+                sink.close()
+        print(f"{args.algorithm} tag: {tag[0]:08b}  0x{tag[0]:02X}", file=sys.stderr)
+        return 0
+
+    if args.input == "-":
+        tag = mac.mac_stream(sys.stdin.buffer, key, args.algorithm)
+    else:
+        tag = mac.mac_file(args.input, key, args.algorithm, args.workers)
+    if expected is not None:
+        ok = tag == expected
+        print("✓ Tag hợp lệ" if ok else f"❌ Tag không khớp (tính được 0x{tag[0]:02X})")
+        return 0 if ok else 1
+    print(f"{tag[0]:08b}  0x{tag[0]:02X}")
+    return 0
+
+
+def cmd_brute_force(args):
+    """Tìm mọi khóa khớp với các cặp (plaintext, ciphertext) đã biết"""
+    pairs = []
+    for pair in args.pair or []:
+        pt, sep, ct = pair.partition(":")
+        if not sep:
+            raise ValueError(f"Cặp phải có dạng PLAINTEXT:CIPHERTEXT: {pair}")
+        pairs.append((parse_byte(pt, "plaintext"), parse_byte(ct, "ciphertext")))
+    if args.plaintext_file and args.ciphertext_file:
+        with open(args.plaintext_file, "rb") as f:
+            known_pt = f.read(args.sample)
+        with open(args.ciphertext_file, "rb") as f:
+            known_ct = f.read(len(known_pt))
+        pairs += list(zip(known_pt, known_ct))
+    if not pairs:
+        raise ValueError("Cần ít nhất một cặp --pair hoặc --plaintext-file/--ciphertext-file")
+
+    engine = FastTinyDES()
+    plaintexts = bytes(pt for pt, _ in pairs)
+    ciphertexts = bytes(ct for _, ct in pairs)
+    # Chỉ thử một khóa đại diện cho mỗi lớp tương đương rồi mở rộng ra cả lớp
+    keys = keyspace.expand([key for key in keyspace.representatives()
+                            if engine.encrypt_bytes(plaintexts, key) == ciphertexts])
+    for key in keys:
+        print(f"{key:08b}  0x{key:02X}  {key}")
+    print(f"Tìm thấy {len(keys)} khóa khớp với {len(pairs)} cặp", file=sys.stderr)
+    return 0 if keys else 1
+
+
+def cmd_keysearch(args):
+    """Tìm khóa chỉ từ ciphertext của văn bản, xếp hạng theo độ tin cậy"""
+    iv = None if args.iv is None else parse_byte(args.iv, "IV")
+    results = keysearch.scan_files(args.files, args.workers, mode=args.mode, iv=iv,
+                                   sample_size=args.sample, top=args.top)
+    for path, result in results.items():
+        print(keysearch.format_result(path, result))
+    if args.output:
+        save_json(results, args.output)
+        print(f"\n✅ Đã lưu kết quả: {args.output}")
+    return 0 if any(r["candidates"] for r in results.values()) else 1
+
+
+def cmd_rainbow(args):
+    """Tạo, tra cứu và đo rainbow table cho TinyDES ghép tầng"""
+    if args.action == "curve":
+        chain_lengths = [int(t) for t in args.lengths.split(",")]
+        chain_counts = [int(m) for m in args.chain_counts.split(",")]
+        print(f"{'Độ dài':>8} {'Số chuỗi':>10} {'Xác suất':>10} {'Bộ nhớ (B)':>12} {'Bước tra':>12} {'Tiền tính':>14}")
+        for row in rainbow.tradeoff_curve(args.stages, chain_lengths, chain_counts, args.tables):
+            print(f"{row['chain_length']:>8} {row['chains']:>10} {row['success_probability'] * 100:>9.2f}% "
+                  f"{row['memory_bytes']:>12} {row['lookup_evaluations']:>12} {row['precomputation']:>14}")
+        return 0
+
+    if args.action == "build":
+        if not args.table:
+            raise ValueError("build cần -t/--table để lưu bảng")
+        table = rainbow.RainbowTable.build(args.stages, args.chains, args.length, args.tables,
+                                           workers=args.workers, seed=args.seed)
+        table.save(args.table)
+        print(f"✅ Đã tạo {args.table}: {table.chain_count} chuỗi, "
+              f"xác suất thành công ước tính {table.success_probability() * 100:.2f}%")
+        return 0
+
+    table = rainbow.RainbowTable.load(args.table)
+    if args.action == "measure":
+        result = rainbow.measure(table, args.trials, args.seed)
+        print(f"Thành công {result['success_rate'] * 100:.2f}% (ước tính {result['expected_success'] * 100:.2f}%), "
+              f"tra cứu trung bình {result['mean_lookup_s'] * 1e3:.3f} ms")
+        return 0
+
+    if args.ciphertext is None:
+        raise ValueError("lookup cần --ciphertext (hex, đúng số tầng byte)")
+    ciphertext = bytes.fromhex(args.ciphertext[2:] if args.ciphertext.lower().startswith("0x") else args.ciphertext)
+    if len(ciphertext) != table.cascade.stages:
+        raise ValueError(f"Ciphertext phải dài {table.cascade.stages} byte")
+    result = table.lookup(ciphertext)
+    if result["key"] is None:
+        print(f"✗ Không tìm thấy khóa ({result['evaluations']} lần tính, {result['false_alarms']} báo động giả)")
+        return 1
+    key = result["key"].to_bytes(table.cascade.stages, "big")
+    print(f"✓ Khóa: {key.hex().upper()} ({result['evaluations']} lần tính, {result['false_alarms']} báo động giả, "
+          f"xác suất thành công của bảng {result['success_probability'] * 100:.2f}%)")
+    return 0
+
+
+def cmd_keyspace(args):
+    """Phân tích lớp khóa tương đương, khóa yếu, điểm bất động và chu trình"""
+    analysis = keyspace.cached_analysis()
+    if args.json:
+        save_json(analysis, args.json)
+        print(f"✅ Đã lưu kết quả: {args.json}", file=sys.stderr)
+    print(keyspace.format_summary(analysis))
+    if args.key is not None:
+        info = analysis["keys"][parse_byte(args.key)]
+        print(f"\nKhóa 0x{info['key']:02X}: khóa con {[format(k, '06b') for k in info['subkeys']]}, "
+              f"đại diện lớp 0x{info['representative']:02X}, tự nghịch đảo: {info['involutory']}")
+        print(f"  Điểm bất động: {[format(x, '08b') for x in info['fixed_points']]}")
+        print(f"  Chu trình: {info['cycle_lengths']} (bậc {info['order']})")
+    return 0
+
+
+def cmd_avalanche(args):
+    """In ma trận SAC và tóm tắt avalanche/BIC theo vòng"""
+    analysis = avalanche.analyze()
+    if args.round is not None and args.round not in analysis:
+        raise ValueError(f"--round phải nằm trong khoảng 1..{max(analysis)}")
+    rounds = sorted(analysis) if args.round is None else [args.round]
+    if args.json:
+        save_json({"heatmaps": avalanche.heatmaps(rounds, analysis)}, args.json)
+        print(f"✅ Đã lưu heatmap JSON: {args.json}", file=sys.stderr)
+    for r in rounds:
+        data = analysis[r]
+        summary = data["summary"]
+        print(f"=== {'Toàn bộ thuật toán' if r == max(analysis) else f'Sau vòng {r}'} ===")
+        print("     " + " ".join(f"{label:>5}" for label in avalanche.OUTPUT_LABELS) + "  trọng số")
+        for label, row, weight in zip(avalanche.INPUT_LABELS, data["sac"], data["avalanche_weight"]):
+            print(f"{label:<4} " + " ".join(f"{p:>5.2f}" for p in row) + f"  {weight:>7.3f}")
+        print(f"Độ lệch SAC trung bình {summary['sac_mean_deviation']:.4f}, lớn nhất {summary['sac_max_deviation']:.4f}; "
+              f"BIC |tương quan| lớn nhất {summary['bic_max_correlation']:.4f}\n")
+    return 0
+
+
+def cmd_randomness(args):
+    """Chạy bộ kiểm định ngẫu nhiên trên keystream, ciphertext hoặc dữ liệu thô"""
+    iv = parse_byte(args.iv, "IV")
+    if args.compare:
+        keys = range(256) if args.compare == "all" else [parse_byte(k) for k in args.compare.split(",")]
+        rows = randomness.compare(keys, args.mode, args.length, iv, alpha=args.alpha)
+        if args.json:
+            save_json({"alpha": args.alpha, "length": args.length, "results": rows}, args.json)
+            print(f"✅ Đã lưu kết quả: {args.json}", file=sys.stderr)
+        names = list(rows[0]["p_values"])
+        print(f"{'Khóa':<6} {'Mode':<5} " + " ".join(f"{name.replace('autocorrelation', 'auto'):>10}" for name in names))
+        for row in rows:
+            print(f"0x{row['key']:02X}   {row['mode']:<5} "
+                  + " ".join(f"{row['p_values'][name]:>10.4f}" for name in names)
+                  + ("  ✓" if row["passed"] else "  ✗"))
+        print(f"{sum(row['passed'] for row in rows)}/{len(rows)} cấu hình đạt toàn bộ (α = {args.alpha})")
+        return 0
+    if args.raw:
+        source = open_input(args.input)
+        chunks = iter(lambda: source.read(randomness.DEFAULT_CHUNK_SIZE), b"")
+    else:
+        if args.key is None:
+            raise ValueError("Cần --key (hoặc --raw / --compare)")
+        key, mode = parse_byte(args.key), args.mode[0]
+        if args.input is None:
+            chunks = randomness.keystream_chunks(key, mode, iv, args.length)
+        else:
+            source = open_input(args.input)
+            chunks = randomness.ciphertext_chunks(source, key, mode, iv)
+    result = randomness.test_stream(chunks, alpha=args.alpha)
+    if args.json:
+        save_json(result, args.json)
+        print(f"✅ Đã lưu kết quả: {args.json}", file=sys.stderr)
+    print(randomness.format_results(result))
+    return 0 if result["passed"] else 2
+
+
+def cmd_tables(args):
+    """In bảng hoán vị 256 byte (mã hóa/giải mã) của một hoặc mọi khóa"""
+    engine = FastTinyDES()
+    keys = range(256) if args.key is None else [parse_byte(args.key)]
+    output = open_output(args.output, binary=args.format == "bin")
+    try:
+        if args.format == "csv":
+            output.write("key,direction," + ",".join(str(b) for b in range(256)) + "\n")
+        for key in keys:
+            for direction in args.direction:
+                table = engine.encrypt_table(key) if direction == "encrypt" else engine.decrypt_table(key)
+                if args.format == "bin":
+                    output.write(table)
+                elif args.format == "csv":
+                    output.write(f"{key},{direction}," + ",".join(str(b) for b in table) + "\n")
+                else:
+                    output.write(f"{key:02X} {direction[:3]} {table.hex()}\n")
+    finally:
+        if output not in (sys.stdout, sys.stdout.buffer):
+            output.close()
+    return 0
+
+
+def cmd_trace_export(args):
+    """Xuất trace từng vòng ra CSV hoặc nhị phân"""
+    binary = args.format == "bin"
+    output = open_output(args.output, binary)
+    try:
+        trace_export.export(
+            output,
+            fmt=args.format,
+            count=args.count,
+            seed=args.seed,
+            bit_strings=args.bit_strings,
+            chunk_size=args.chunk_size,
+        )
+    finally:
+        if output not in (sys.stdout, sys.stdout.buffer):
+            output.close()
+    return 0
+
+
+def cmd_trace_store(args):
+    """Tạo hoặc kiểm tra trace store tính sẵn"""
+    if args.action == "build":
+        path = trace_store.build_store(args.path)
+        print(f"✅ Đã tạo trace store: {path} ({trace_store.STORE_SIZE} bytes)")
+        return 0
+
+    store = trace_store.TraceStore.open(args.path)
+    mismatches = store.verify()
+    if mismatches:
+        for kind, block, key in mismatches[:20]:
+            print(f"✗ {kind}: block={block:08b} key={key:08b}")
+        print(f"❌ {len(mismatches)} sai khác so với encrypt_detailed/decrypt_detailed")
+        return 1
+    print("✓ Trace store khớp hoàn toàn với TinyDES (65536 cặp, mã hóa và giải mã)")
+    return 0
+
+
+def cmd_profile(args):
+    """Chạy một workload với profiling bật và in thống kê / folded stacks"""
+    reference = TinyDES()
+    fast = FastTinyDES(reference)
+    engines = {"string": [reference], "table": [fast], "all": [reference, fast]}[args.engine]
+    rng = random.Random(args.seed)
+    pairs = [(rng.getrandbits(8), rng.getrandbits(8)) for _ in range(args.count)]
+
+    profiler.reset()
+    profiler.enable(*engines)
+    try:
+        for engine in engines:
+            if isinstance(engine, TinyDES):
+                run = {"encrypt": engine.encrypt, "decrypt": engine.decrypt,
+                       "detailed": engine.encrypt_detailed}[args.operation]
+            else:
+                run = {"encrypt": engine.encrypt_block, "decrypt": engine.decrypt_block,
+                       "detailed": engine.trace_columns}[args.operation]
+            if args.operation == "detailed" and not isinstance(engine, TinyDES):
+                run(bytes(p for p, _ in pairs), bytes(k for _, k in pairs))
+            else:
+                for pt, key in pairs:
+                    run(pt, key)
+    finally:
+        profiler.disable()
+
+    if args.folded == "-":
+        sys.stdout.write(profiler.folded())
+    elif args.folded:
+        with open(args.folded, "w") as output:
+            output.write(profiler.folded())
+    print(profiler.format_report(), file=sys.stderr if args.folded == "-" else sys.stdout)
+    return 0
+
+
+def cmd_benchmark(args):
+    """Chạy bộ benchmark, lưu JSON và so sánh với kết quả cũ"""
+    result = benchmark.run(quick=args.quick, http=not args.no_http, http_requests=args.http_requests)
+    print(benchmark.format_results(result))
+    if args.output:
+        benchmark.save(result, args.output)
+        print(f"\n✅ Đã lưu kết quả: {args.output}")
+    if args.compare:
+        rows = benchmark.compare(benchmark.load(args.compare), result, args.threshold)
+        print(f"\nSo sánh với {args.compare}:")
+        print(benchmark.format_comparison(rows))
+        if args.fail_on_regression and any(row[-1] == "slower" for row in rows):
+            return 1
+    return 0
+
+
+def cmd_loadgen(args):
+    """Sinh tải vòng hở và báo cáo thông lượng, p50/p95/p99, tỉ lệ lỗi"""
+    options = dict(mix=args.mix, rate=args.rate, duration=args.duration,
+                   connections=args.connections, seed=args.seed)
+    if args.launch:
+        worker_counts = [int(w) for w in args.workers.split(",")]
+        reports = loadgen.run_worker_sweep(worker_counts, **options)
+        results = {str(workers): report for workers, report in reports.items()}
+        for workers, report in reports.items():
+            print(loadgen.format_report(report, f"\n=== {workers} worker ==="))
+    else:
+        results = loadgen.run(args.url, **options)
+        print(loadgen.format_report(results))
+    if args.output:
+        save_json(results, args.output)
+        print(f"\n✅ Đã lưu kết quả: {args.output}")
+    return 0
+
+
+def cmd_conformance(args):
+    """Kiểm tra mọi engine khớp TinyDES trên toàn bộ 65.536 cặp"""
+    report = conformance.run(with_trace_diff=not args.no_trace_diff)
+    print(conformance.format_report(report))
+    return 0 if report["ok"] else 1
+
+
+def build_parser():
+    """Build the argparse parser with every subcommand"""
+    parser = argparse.ArgumentParser(
+        prog="tinydes",
+        description="HỆ THỐNG MÃ HÓA TINYDES - giao diện dòng lệnh",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, help in (("encrypt", "Mã hóa file/stdin"), ("decrypt", "Giải mã file/stdin")):
+        p = subparsers.add_parser(command, help=help)
+        p.add_argument("-k", "--key", required=True, help="Khóa 8-bit: binary, 0x-hex hoặc decimal")
+        p.add_argument("-m", "--mode", choices=modes.MODES, default="ecb")
+        p.add_argument("--iv", default="0", help="IV/nonce 8-bit cho CBC/CTR/OFB (mặc định 0)")
+        p.add_argument("-i", "--input", default="-", help="File đầu vào ('-' = stdin)")
+        p.add_argument("-o", "--output", default="-", help="File đầu ra ('-' = stdout)")
+        p.add_argument("-w", "--workers", type=int, default=1, help="Số tiến trình xử lý song song")
+        p.add_argument("--buffer-size", type=int, default=modes.DEFAULT_BUFFER_SIZE,
+                       help="Kích thước mỗi lần đọc/ghi hoặc cửa sổ mmap (byte)")
+        p.add_argument("--mmap", action="store_true", help="Xử lý file qua bộ nhớ ánh xạ (mmap)")
+        p.add_argument("--in-place", action="store_true", help="Ghi đè file đầu vào qua mmap, không tạo bản sao")
+        p.set_defaults(func=cmd_crypt)
+
+    p = subparsers.add_parser("rekey", help="Đổi khóa ciphertext ECB/CTR trong một lượt")
+    p.add_argument("--old-key", default=None, help="Khóa hiện tại")
+    p.add_argument("--new-key", default=None, help="Khóa mới")
+    p.add_argument("-m", "--mode", choices=rekey.REKEY_MODES, default="ecb")
+    p.add_argument("--old-iv", default="0", help="IV/nonce CTR hiện tại")
+    p.add_argument("--new-iv", default="0", help="IV/nonce CTR mới")
+    p.add_argument("-i", "--input", default="-", help="File đầu vào ('-' = stdin)")
+    p.add_argument("-o", "--output", default="-", help="File đầu ra ('-' = stdout)")
+    p.add_argument("--in-place", action="store_true", help="Ghi đè file đầu vào")
+    p.add_argument("--batch", default=None,
+                   help="File CSV: path,old_key,new_key[,output[,mode,old_iv,new_iv]]")
+    p.add_argument("-w", "--workers", type=int, default=None, help="Số tiến trình cho --batch")
+    p.add_argument("--buffer-size", type=int, default=modes.DEFAULT_BUFFER_SIZE)
+    p.set_defaults(func=cmd_rekey)
+
+    p = subparsers.add_parser("container", help="Container mã hóa có index, đọc ngẫu nhiên theo khoảng byte")
+    p.add_argument("action", choices=("pack", "unpack", "read", "verify"))
+    p.add_argument("-k", "--key", required=True, help="Khóa 8-bit: binary, 0x-hex hoặc decimal")
+    p.add_argument("-m", "--mode", choices=modes.MODES, default="ctr", help="Chế độ khi pack")
+    p.add_argument("--nonce", default=None, help="Nonce 8-bit khi pack (mặc định: ngẫu nhiên)")
+    p.add_argument("--chunk-size", type=int, default=container.DEFAULT_CHUNK_SIZE)
+    p.add_argument("--range", default=None, help="Khoảng byte cho read, VD: 100-199, 100- hoặc -50")
+    p.add_argument("-i", "--input", default="-", help="File đầu vào ('-' = stdin, chỉ cho pack)")
+    p.add_argument("-o", "--output", default="-", help="File đầu ra ('-' = stdout, trừ pack)")
+    p.set_defaults(func=cmd_container)
+
+    p = subparsers.add_parser("mac", help="MAC (CBC-MAC, CMAC, PMAC) và encrypt-then-MAC một lượt")
+    p.add_argument("-k", "--key", required=True, help="Khóa MAC 8-bit")
+    p.add_argument("-a", "--algorithm", choices=mac.ALGORITHMS, default="pmac")
+    p.add_argument("--verify", default=None, help="Tag cần kiểm tra")
+    p.add_argument("--encrypt-key", default=None,
+                   help="Khóa mã hóa: mã hóa rồi MAC ciphertext (với --verify: kiểm tra rồi giải mã)")
+    p.add_argument("-m", "--mode", choices=modes.MODES, default="ctr", help="Chế độ mã hóa khi có --encrypt-key")
+    p.add_argument("--iv", default="0", help="IV/nonce 8-bit khi có --encrypt-key")
+    p.add_argument("-i", "--input", default="-", help="File đầu vào ('-' = stdin)")
+    p.add_argument("-o", "--output", default="-", help="File ciphertext/plaintext khi có --encrypt-key")
+    p.add_argument("-w", "--workers", type=int, default=None, help="Số tiến trình cho PMAC trên file")
+    p.set_defaults(func=cmd_mac)
+
+    p = subparsers.add_parser("brute-force", help="Vét cạn 256 khóa với các cặp plaintext/ciphertext đã biết")
+    p.add_argument("--pair", action="append", help="Cặp PLAINTEXT:CIPHERTEXT (có thể lặp lại)")
+    p.add_argument("--plaintext-file", default=None, help="File plaintext đã biết (ECB)")
+    p.add_argument("--ciphertext-file", default=None, help="File ciphertext tương ứng (ECB)")
+    p.add_argument("--sample", type=int, default=4096, help="Số byte đầu dùng để so khớp")
+    p.set_defaults(func=cmd_brute_force)
+
+    p = subparsers.add_parser("keysearch", help="Tìm khóa chỉ từ ciphertext của văn bản ASCII/UTF-8")
+    p.add_argument("files", nargs="+", help="Các file ciphertext")
+    p.add_argument("-m", "--mode", choices=modes.MODES, default="ecb")
+    p.add_argument("--iv", default=None, help="IV nếu đã biết (CTR/OFB không có IV: thử cả 256 IV)")
+    p.add_argument("--sample", type=int, default=keysearch.DEFAULT_SAMPLE_SIZE,
+                   help="Số byte đầu mỗi file dùng để chấm điểm")
+    p.add_argument("--top", type=int, default=keysearch.DEFAULT_TOP, help="Số ứng viên in ra")
+    p.add_argument("-w", "--workers", type=int, default=None, help="Số tiến trình quét song song")
+    p.add_argument("-o", "--output", default=None, help="Lưu kết quả JSON vào file này")
+    p.set_defaults(func=cmd_keysearch)
+
+    p = subparsers.add_parser("rainbow", help="Rainbow table cho TinyDES ghép tầng (chosen-plaintext)")
+    p.add_argument("action", choices=("build", "lookup", "measure", "curve"))
+    p.add_argument("-t", "--table", default=None, help="File rainbow table")
+    p.add_argument("--stages", type=int, default=2, help="Số tầng TinyDES (không gian khóa 256^n)")
+    p.add_argument("--chains", type=int, default=4096, help="Số chuỗi mỗi bảng")
+    p.add_argument("--length", type=int, default=rainbow.DEFAULT_CHAIN_LENGTH, help="Độ dài chuỗi")
+    p.add_argument("--tables", type=int, default=rainbow.DEFAULT_TABLES, help="Số bảng")
+    p.add_argument("--ciphertext", default=None, help="Ciphertext hex của bản rõ chọn trước (lookup)")
+    p.add_argument("--trials", type=int, default=100, help="Số khóa ngẫu nhiên khi measure")
+    p.add_argument("--lengths", default="64,256,1024", help="Các độ dài chuỗi cho curve")
+    p.add_argument("--chain-counts", default="1024,16384,65536", help="Các số chuỗi cho curve")
+    p.add_argument("-w", "--workers", type=int, default=None, help="Số tiến trình tạo chuỗi")
+    p.add_argument("--seed", type=int, default=None)
+    p.set_defaults(func=cmd_rainbow)
+
+    p = subparsers.add_parser("keyspace", help="Phân tích cấu trúc không gian khóa")
+    p.add_argument("-k", "--key", default=None, help="In chi tiết cho khóa này")
+    p.add_argument("--json", default=None, help="Lưu toàn bộ kết quả JSON vào file này")
+    p.set_defaults(func=cmd_keyspace)
+
+    p = subparsers.add_parser("avalanche", help="Phân tích avalanche, SAC và BIC trên toàn bộ không gian")
+    p.add_argument("--round", type=int, default=None,
+                   help="Chỉ in vòng này (vòng cuối = toàn bộ thuật toán)")
+    p.add_argument("--json", default=None, help="Lưu heatmap JSON vào file này")
+    p.set_defaults(func=cmd_avalanche)
+
+    p = subparsers.add_parser("randomness", help="Kiểm định ngẫu nhiên keystream/ciphertext (monobit, runs, poker, ...)")
+    p.add_argument("-k", "--key", default=None, help="Khóa 8-bit của keystream/ciphertext cần kiểm tra")
+    p.add_argument("-m", "--mode", nargs="+", choices=modes.MODES, default=["ctr"],
+                   help="Chế độ (nhiều giá trị khi dùng --compare)")
+    p.add_argument("--iv", default="0", help="IV/nonce 8-bit (mặc định 0)")
+    p.add_argument("--length", type=int, default=randomness.DEFAULT_CHUNK_SIZE,
+                   help="Số byte keystream cần sinh khi không có -i")
+    p.add_argument("-i", "--input", default=None,
+                   help="Mã hóa file này ('-' = stdin) rồi kiểm tra ciphertext thay vì keystream")
+    p.add_argument("--raw", action="store_true", help="Kiểm tra trực tiếp dữ liệu của -i, không mã hóa")
+    p.add_argument("--compare", default=None,
+                   help="So sánh nhiều khóa (danh sách cách nhau bởi dấu phẩy hoặc 'all') trên các mode")
+    p.add_argument("--alpha", type=float, default=randomness.ALPHA, help="Mức ý nghĩa (mặc định 0.01)")
+    p.add_argument("--json", default=None, help="Lưu kết quả JSON vào file này")
+    p.set_defaults(func=cmd_randomness)
+
+    p = subparsers.add_parser("tables", help="Xuất bảng hoán vị 256 byte theo khóa")
+    p.add_argument("-k", "--key", default=None, help="Chỉ xuất cho khóa này (mặc định: cả 256 khóa)")
+    p.add_argument("--direction", nargs="+", choices=("encrypt", "decrypt"), default=["encrypt", "decrypt"])
+    p.add_argument("--format", choices=("hex", "csv", "bin"), default="hex")
+    p.add_argument("-o", "--output", default="-", help="File đầu ra ('-' = stdout)")
+    p.set_defaults(func=cmd_tables)
+
+    p = subparsers.add_parser("trace-export", help="Xuất trace từng vòng cho nhiều cặp (plaintext, key)")
+    p.add_argument("--format", choices=trace_export.FORMATS, default="csv")
+    p.add_argument("--count", type=int, default=trace_export.FULL_SPACE,
+                   help="Số cặp cần xuất (mặc định: toàn bộ 65536 cặp)")
+    p.add_argument("--seed", type=int, default=None,
+                   help="Sinh cặp ngẫu nhiên với seed này thay vì duyệt tuần tự")
+    p.add_argument("--bit-strings", action="store_true",
+                   help="CSV: ghi giá trị dưới dạng chuỗi nhị phân thay vì số thập phân")
+    p.add_argument("--chunk-size", type=int, default=trace_export.DEFAULT_CHUNK_SIZE)
+    p.add_argument("-o", "--output", default="-", help="File đầu ra ('-' = stdout)")
+    p.set_defaults(func=cmd_trace_export)
+
+    p = subparsers.add_parser("trace-store", help="Tạo hoặc kiểm tra trace store cho toàn bộ không gian")
+    p.add_argument("action", choices=("build", "verify"))
+    p.add_argument("--path", default=trace_store.DEFAULT_PATH)
+    p.set_defaults(func=cmd_trace_store)
+
+    p = subparsers.add_parser("profile", help="Profiling các hàm thành phần trên một workload")
+    p.add_argument("--engine", choices=("string", "table", "all"), default="all")
+    p.add_argument("--operation", choices=("encrypt", "decrypt", "detailed"), default="encrypt")
+    p.add_argument("--count", type=int, default=10000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--folded", default=None,
+                   help="Ghi folded stacks (cho flame graph) vào file này ('-' = stdout)")
+    p.set_defaults(func=cmd_profile)
+
+    p = subparsers.add_parser("benchmark", help="Benchmark các engine và tầng HTTP")
+    p.add_argument("--quick", action="store_true", help="Đo nhanh (ít vòng lặp hơn)")
+    p.add_argument("--no-http", action="store_true", help="Bỏ qua benchmark HTTP")
+    p.add_argument("--http-requests", type=int, default=200, help="Số request cho mỗi route")
+    p.add_argument("-o", "--output", default=None, help="Lưu kết quả JSON vào file này")
+    p.add_argument("--compare", default=None, help="File JSON kết quả cũ để so sánh")
+    p.add_argument("--threshold", type=float, default=0.10, help="Ngưỡng chênh lệch (mặc định 10%%)")
+    p.add_argument("--fail-on-regression", action="store_true",
+                   help="Trả mã lỗi 1 nếu có phép đo chậm hơn ngưỡng")
+    p.set_defaults(func=cmd_benchmark)
+
+    p = subparsers.add_parser("loadgen", help="Sinh tải HTTP bất đồng bộ lên web app")
+    p.add_argument("--url", default="http://127.0.0.1:8000", help="Địa chỉ server đang chạy")
+    p.add_argument("--launch", action="store_true",
+                   help="Tự khởi động run_server.py (mỗi giá trị --workers một lần)")
+    p.add_argument("--workers", default="1", help="Danh sách số worker khi dùng --launch, VD: 1,2,4")
+    p.add_argument("--mix", default=loadgen.DEFAULT_MIX,
+                   help=f"Tỉ trọng các kịch bản ({', '.join(loadgen.SCENARIOS)})")
+    p.add_argument("--rate", type=float, default=100.0, help="Số request mỗi giây (Poisson)")
+    p.add_argument("--duration", type=float, default=10.0, help="Thời gian sinh tải (giây)")
+    p.add_argument("--connections", type=int, default=64, help="Số kết nối đồng thời tối đa")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("-o", "--output", default=None, help="Lưu báo cáo JSON vào file này")
+    p.set_defaults(func=cmd_loadgen)
+
+    p = subparsers.add_parser("conformance", help="Kiểm tra mọi engine khớp TinyDES trên toàn bộ không gian")
+    p.add_argument("--no-trace-diff", action="store_true", help="Không in diff trace khi có sai khác")
+    p.set_defaults(func=cmd_conformance)
+
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the command line interface"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        return 0
+    except (ValueError, OSError) as e:
+        print(f"❌ Lỗi: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Kiểm tra tương thích (conformance) toàn bộ 65.536 cặp (plaintext, key)
+
+Mọi engine nhanh phải cho kết quả giống hệt TinyDES.encrypt / decrypt.
+Codebook tham chiếu (mã hóa và giải mã cho mọi cặp) được tính bằng lớp
+TinyDES gốc một lần và lưu đệm trên đĩa theo mã băm của tinydes.py; sau
+đó mỗi kiểm tra chỉ là một phép so sánh bytes trên cả không gian, nên
+toàn bộ bộ kiểm tra chạy dưới một giây.
+
+Khi có sai khác, báo cáo kèm diff trace của cặp đó so với encrypt_detailed.
+"""
+
+import hashlib
+import os
+import time
+
+import modes
+
+from tinydes import TinyDES
+from tinydes_fast import FastTinyDES, trace_column_spec
+from trace_store import TraceStore
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CODEBOOK_PATH = os.path.join(ROOT, ".cache", "reference_codebook.bin")
+# Toàn bộ không gian theo thứ tự key * 256 + block
+ALL_BLOCKS = bytes(range(256)) * 256
+ALL_KEYS = bytes(i >> 8 for i in range(65536))
+MAX_REPORTED = 10
+# Mẫu cặp cho kiểm tra mọi cột trace (bước 15 nguyên tố cùng nhau với 256:
+# phủ mọi block và mọi key)
+TRACE_SAMPLE = range(0, 65536, 15)
+
+
+def reference_fingerprint():
+    """SHA-256 of tinydes.py, invalidating the cached codebook on change"""
+    with open(os.path.join(ROOT, "tinydes.py"), "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def compute_reference_codebook(reference=None):
+    """(encrypt, decrypt) codebooks from the string engine, key-major"""
+    reference = reference if reference is not None else TinyDES()
+    blocks = [format(b, '08b') for b in range(256)]
+    encrypt = bytearray(65536)
+    decrypt = bytearray(65536)
+    for key in range(256):
+        key_bin = blocks[key]
+        base = key * 256
+        for b in range(256):
+            encrypt[base + b] = int(reference.encrypt(blocks[b], key_bin), 2)
+            decrypt[base + b] = int(reference.decrypt(blocks[b], key_bin), 2)
+    return bytes(encrypt), bytes(decrypt)
+
+
+def reference_codebook(path=CODEBOOK_PATH):
+    """Cached reference codebooks, recomputed when tinydes.py changes"""
+    fingerprint = reference_fingerprint()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) == 32 + 2 * 65536 and data[:32] == fingerprint:
+            return data[32:32 + 65536], data[32 + 65536:]
+    except OSError:
+        pass
+    encrypt, decrypt = compute_reference_codebook()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(fingerprint + encrypt + decrypt)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return encrypt, decrypt
+
+
+def mismatched_indices(got, expected):
+    """Indices where two equal-length byte strings differ"""
+    if got == expected:
+        return []
+    if len(got) != len(expected):
+        return list(range(min(len(got), len(expected)), max(len(got), len(expected))))
+    return [i for i, (a, b) in enumerate(zip(got, expected)) if a != b]
+
+
+def reference_trace(block, key, reference=None):
+    """Trace of one pair from TinyDES.encrypt_detailed, keyed by trace column name"""
+    reference = reference if reference is not None else TinyDES()
+    detailed = reference.encrypt_detailed(block, key)
+    expected = {'plaintext': block, 'key': key, 'ciphertext': int(detailed['ciphertext'], 2)}
+    for r, rd in enumerate(detailed['rounds'], 1):
+        expected[f'k{r}'] = int(rd['subkey'], 2)
+        expected.update({
+            f'r{r}_left': int(rd['input_left'], 2),
+            f'r{r}_right': int(rd['input_right'], 2),
+            f'r{r}_expanded': int(rd['expansion'], 2),
+            f'r{r}_xor': int(rd['xor_with_key'], 2),
+            f'r{r}_row': rd['sbox_row'],
+            f'r{r}_col': rd['sbox_col'],
+            f'r{r}_sbox': rd['sbox_value'],
+            f'r{r}_pbox': int(rd['pbox_output'], 2),
+        })
+    return {name: expected[name] for name, _ in trace_column_spec(len(detailed['rounds']))}
+
+
+def reference_trace_columns(indices=TRACE_SAMPLE, reference=None):
+    """Reference trace columns (trace_column_spec order) for pairs given as key * 256 + block"""
+    reference = reference if reference is not None else TinyDES()
+    traces = [reference_trace(i & 0xFF, i >> 8, reference) for i in indices]
+    return [bytes(t[name] for t in traces) for name, _ in trace_column_spec(len(reference.shifts))]
+
+
+def trace_diff(block, key, engine=None, reference=None):
+    """
+    Field-by-field diff of one pair between a table engine trace and
+    TinyDES.encrypt_detailed
+    Returns: list of (field, got, expected)
+    """
+    expected = reference_trace(block, key, reference)
+    if engine is None or not hasattr(engine, "trace_columns"):
+        return [(name, None, value) for name, value in expected.items()]
+    columns = engine.trace_columns(bytes([block]), bytes([key]))
+    got = {name: column[0] for name, column in zip(engine.trace_names, columns)}
+    return [(name, got.get(name), expected[name]) for name in expected if got.get(name) != expected[name]]
+
+
+def reference_mode_encrypt(encrypt_cb, key, data, mode, iv):
+    """Block-by-block mode definition over the reference codebook"""
+    table = encrypt_cb[key * 256:key * 256 + 256]
+    out = bytearray()
+    previous, state = iv, iv
+    for i, p in enumerate(data):
+        if mode == "ecb":
+            out.append(table[p])
+        elif mode == "cbc":
+            previous = table[p ^ previous]
+            out.append(previous)
+        elif mode == "ctr":
+            out.append(p ^ table[(iv + i) % 256])
+        else:
+            state = table[state]
+            out.append(p ^ state)
+    return bytes(out)
+
+
+def mode_checks(engine, encrypt_cb):
+    """Yield (check_name, got, expected, kind) for every mode of modes.py"""
+    # Thông điệp 512 byte để keystream CTR/OFB đi hết một chu kỳ
+    message = ALL_BLOCKS[:256] + ALL_BLOCKS[:256][::-1]
+    for mode in modes.MODES:
+        got, expected, round_trip, chunked = [], [], [], []
+        for key in range(256):
+            iv = key ^ 0x5A
+            ciphertext = modes.encrypt(message, key, mode, iv, engine)
+            got.append(ciphertext)
+            expected.append(reference_mode_encrypt(encrypt_cb, key, message, mode, iv))
+            round_trip.append(modes.decrypt(ciphertext, key, mode, iv, engine))
+            cipher = modes.StreamCipher(key, mode, iv, engine=engine)
+            chunked.append(b"".join(cipher.update(message[i:i + 37]) for i in range(0, len(message), 37)))
+        yield f"mode_{mode}", b"".join(got), b"".join(expected), "mode"
+        yield f"mode_{mode}_decrypt", b"".join(round_trip), message * 256, "mode"
+        yield f"mode_{mode}_chunked", b"".join(chunked), b"".join(got), "mode"
+
+
+def default_engines():
+    """Engines checked by default: table engine and trace store"""
+    fast = FastTinyDES()
+    return {"table": fast, "trace_store": TraceStore.open(engine=fast)}
+
+
+def engine_checks(name, engine, encrypt_cb, decrypt_cb):
+    """
+    Yield (check_name, got, expected, kind) for one engine
+    kind is 'encrypt', 'decrypt' or 'mode' and tells how to report mismatches
+    """
+    if isinstance(engine, FastTinyDES):
+        yield "encrypt_block", bytes(engine.encrypt_block(b, k) for b, k in zip(ALL_BLOCKS, ALL_KEYS)), encrypt_cb, "encrypt"
+        yield "decrypt_block", bytes(engine.decrypt_block(b, k) for b, k in zip(ALL_BLOCKS, ALL_KEYS)), decrypt_cb, "decrypt"
+        yield "encrypt_table", b"".join(engine.encrypt_table(k) for k in range(256)), encrypt_cb, "encrypt"
+        yield "encrypt_bytes", b"".join(engine.encrypt_bytes(ALL_BLOCKS[:256], k) for k in range(256)), encrypt_cb, "encrypt"
+        yield "decrypt_bytes", b"".join(engine.decrypt_bytes(ALL_BLOCKS[:256], k) for k in range(256)), decrypt_cb, "decrypt"
+        yield "round_trip", b"".join(
+            engine.decrypt_bytes(engine.encrypt_bytes(ALL_BLOCKS[:256], k), k) for k in range(256)), ALL_BLOCKS, "encrypt"
+        yield "trace_columns", engine.trace_columns(ALL_BLOCKS, ALL_KEYS)[-1], encrypt_cb, "encrypt"
+        # Mọi cột trung gian (trace export / trace store dựa vào chúng) trên một mẫu cặp
+        sample_blocks = bytes(ALL_BLOCKS[i] for i in TRACE_SAMPLE)
+        sample_keys = bytes(ALL_KEYS[i] for i in TRACE_SAMPLE)
+        yield ("trace_all_columns", b"".join(engine.trace_columns(sample_blocks, sample_keys)),
+               b"".join(reference_trace_columns(TRACE_SAMPLE, engine.reference)), "trace")
+        yield from mode_checks(engine, encrypt_cb)
+    elif isinstance(engine, TraceStore):
+        yield "encrypt", bytes(engine.encrypt(b, k) for b, k in zip(ALL_BLOCKS, ALL_KEYS)), encrypt_cb, "encrypt"
+        yield "decrypt", bytes(engine.decrypt(b, k) for b, k in zip(ALL_BLOCKS, ALL_KEYS)), decrypt_cb, "decrypt"
+
+
+def run(engines=None, with_trace_diff=True):
+    """
+    Run every check over the full space
+    Returns: dict with 'ok', 'elapsed_s' and per-check results
+    """
+    start = time.perf_counter()
+    encrypt_cb, decrypt_cb = reference_codebook()
+    engines = engines if engines is not None else default_engines()
+    reference = TinyDES()
+    trace_engine = next((e for e in engines.values() if isinstance(e, FastTinyDES)), None)
+
+    checks = []
+    for name, engine in engines.items():
+        pending = engine_checks(name, engine, encrypt_cb, decrypt_cb)
+        while True:
+            check_start = time.perf_counter()
+            try:
+                check, got, expected, kind = next(pending)
+            except StopIteration:
+                break
+            bad = mismatched_indices(got, expected)
+            mismatches = []
+            for index in bad[:MAX_REPORTED]:
+                if kind == "mode":
+                    # Chỉ số theo (key, vị trí trong thông điệp), không có trace theo cặp
+                    mismatches.append({
+                        "block": index % 512, "key": index // 512,
+                        "got": got[index] if index < len(got) else None,
+                        "expected": expected[index] if index < len(expected) else None,
+                    })
+                    continue
+                if kind == "trace":
+                    # Chỉ số theo (cột, vị trí trong mẫu)
+                    column, position = divmod(index, len(TRACE_SAMPLE))
+                    pair = TRACE_SAMPLE[position]
+                    mismatches.append({
+                        "block": pair & 0xFF, "key": pair >> 8, "column": engine.trace_names[column],
+                        "got": got[index] if index < len(got) else None,
+                        "expected": expected[index] if index < len(expected) else None,
+                    })
+                    continue
+                key, block = index >> 8, index & 0xFF
+                entry = {
+                    "block": block, "key": key,
+                    "got": got[index] if index < len(got) else None,
+                    "expected": expected[index] if index < len(expected) else None,
+                }
+                if with_trace_diff:
+                    # Với giải mã, trace được lấy theo plaintext đúng của cặp
+                    pt = decrypt_cb[index] if kind == "decrypt" else block
+                    entry["trace_diff"] = trace_diff(pt, key, trace_engine, reference)
+                mismatches.append(entry)
+            checks.append({
+                "engine": name, "check": check, "ok": not bad, "mismatch_count": len(bad),
+                "mismatches": mismatches, "elapsed_s": time.perf_counter() - check_start,
+            })
+    return {
+        "ok": all(c["ok"] for c in checks),
+        "elapsed_s": time.perf_counter() - start,
+        "checks": checks,
+    }
+
+
+def format_report(report):
+    """Plain text summary of run()"""
+    lines = []
+    for c in report["checks"]:
+        mark = "✓" if c["ok"] else "✗"
+        lines.append(f"{mark} {c['engine']:<12} {c['check']:<16} "
+                     f"{'OK' if c['ok'] else str(c['mismatch_count']) + ' sai khác'}")
+        for m in c["mismatches"]:
+            column = f" column={m['column']}" if "column" in m else ""
+            lines.append(f"    block={m['block']:08b} key={m['key']:08b}{column} got={m['got']} expected={m['expected']}")
+            for field, got, expected in m.get("trace_diff", []):
+                lines.append(f"        {field}: got={got} expected={expected}")
+    status = "✅ Tất cả engine khớp TinyDES" if report["ok"] else "❌ Có engine không khớp TinyDES"
+    lines.append(f"{status} ({report['elapsed_s'] * 1000:.0f} ms)")
+    return "\n".join(lines)
@@ -0,0 +1,204 @@
+"""
+Định dạng container có thể truy cập ngẫu nhiên cho dữ liệu mã hóa TinyDES
+
+Bố cục file (số nguyên little-endian):
+    header  : magic b'TDCT', version u8, mode u8, nonce u8, key_check u8,
+              chunk_size u32, plaintext_size u64, chunk_count u32
+    dữ liệu : các chunk ciphertext nối liền (ciphertext dài bằng plaintext)
+    index   : chunk_count mục, mỗi mục gồm IV u8 và CRC32 u32 của ciphertext
+
+Mỗi chunk được mã hóa độc lập với IV riêng ghi trong index. Với CTR, IV của
+chunk i là (nonce + vị trí đầu chunk) mod 256 nên cả file là một luồng CTR
+liên tục; các chế độ khác dùng IV ngẫu nhiên cho từng chunk.
+
+Đọc một khoảng byte chỉ cần đọc đúng phần ciphertext đó: ECB/CTR/OFB tua
+keystream theo vị trí, CBC chỉ cần thêm đúng một byte ciphertext đứng
+trước (p_i = D(c_i) XOR c_{i-1}).
+"""
+
+import os
+import struct
+import zlib
+
+import modes
+
+MAGIC = b"TDCT"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBIQI")
+INDEX_ENTRY = struct.Struct("<BI")
+DEFAULT_CHUNK_SIZE = 64 << 10
+# Kích thước mỗi phần khi stream một khoảng byte
+READ_BLOCK_SIZE = 1 << 20
+
+
+class KeyMismatch(ValueError):
+    """Raised when the key does not match the container's key check byte"""
+
+
+def key_check(engine, key, nonce):
+    """One byte stored in the header to detect a wrong key"""
+    return engine.encrypt_table(key)[nonce ^ 0xFF]
+
+
+def write_container(source, sink, key, mode="ctr", nonce=None, chunk_size=DEFAULT_CHUNK_SIZE, engine=None):
+    """
+    Encrypt source (binary file object) into a container written to sink
+    sink must be seekable: the header is rewritten once sizes are known
+    Returns: plaintext size
+    """
+    if mode not in modes.MODES:
+        raise ValueError(f"Chế độ không hỗ trợ: {mode}")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size phải lớn hơn 0")
+    engine = engine if engine is not None else modes.default_engine()
+    nonce = os.urandom(1)[0] if nonce is None else nonce
+    check = key_check(engine, key, nonce)
+
+    start = sink.tell()
+    sink.write(HEADER.pack(MAGIC, VERSION, modes.MODES.index(mode), nonce, check, chunk_size, 0, 0))
+    index = []
+    total = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        # Đọc đủ chunk_size byte (trừ chunk cuối) để vị trí chunk luôn tính được
+        while len(chunk) < chunk_size:
+            more = source.read(chunk_size - len(chunk))
+            if not more:
+                break
+            chunk += more
+        iv = (nonce + total) % 256 if mode == "ctr" else os.urandom(1)[0]
+        ciphertext = modes.encrypt(chunk, key, mode, iv, engine)
+        sink.write(ciphertext)
+        index.append(INDEX_ENTRY.pack(iv, zlib.crc32(ciphertext)))
+        total += len(chunk)
+    sink.write(b"".join(index))
+    end = sink.tell()
+    sink.seek(start)
+    sink.write(HEADER.pack(MAGIC, VERSION, modes.MODES.index(mode), nonce, check, chunk_size, total, len(index)))
+    sink.seek(end)
+    return total
+
+
+def pack_file(input_path, output_path, key, mode="ctr", nonce=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Encrypt a file into a container file; returns plaintext size"""
+    with open(input_path, "rb") as source, open(output_path, "wb") as sink:
+        return write_container(source, sink, key, mode, nonce, chunk_size)
+
+
+def parse_range(header, size):
+    """
+    Parse a single 'bytes=a-b' / 'bytes=a-' / 'bytes=-n' Range header
+    Returns: (start, end) with end exclusive, or None when absent
+    Raises ValueError when unsatisfiable or malformed
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError(f"Range không hỗ trợ: {header}")
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        raise ValueError(f"Range không hợp lệ: {header}")
+    if not first:
+        suffix = int(last)
+        if suffix <= 0:
+            raise ValueError(f"Range không hợp lệ: {header}")
+        return max(0, size - suffix), size
+    start = int(first)
+    end = min(size, int(last) + 1) if last else size
+    if start >= size or end <= start:
+        raise ValueError(f"Range vượt quá kích thước {size}: {header}")
+    return start, end
+
+
+class ContainerReader:
+    """Random-access reader decrypting any byte range of a container"""
+
+    def __init__(self, fileobj, key, engine=None):
+        self.file = fileobj
+        self.key = key
+        self.engine = engine if engine is not None else modes.default_engine()
+        self.file.seek(0)
+        raw = self.file.read(HEADER.size)
+        if len(raw) != HEADER.size:
+            raise ValueError("File container quá ngắn")
+        magic, version, mode, nonce, check, chunk_size, size, count = HEADER.unpack(raw)
+        if magic != MAGIC or version != VERSION or mode >= len(modes.MODES):
+            raise ValueError("Không phải container TinyDES hợp lệ")
+        if key_check(self.engine, key, nonce) != check:
+            raise KeyMismatch("Khóa không khớp với container")
+        self.mode = modes.MODES[mode]
+        self.nonce = nonce
+        self.chunk_size = chunk_size
+        self.size = size
+        self.data_offset = HEADER.size
+        self.file.seek(self.data_offset + size)
+        raw_index = self.file.read(count * INDEX_ENTRY.size)
+        if len(raw_index) != count * INDEX_ENTRY.size:
+            raise ValueError("Index của container bị cắt cụt")
+        self.index = list(INDEX_ENTRY.iter_unpack(raw_index))
+
+    @classmethod
+    def open(cls, path, key, engine=None):
+        fileobj = open(path, "rb")
+        try:
+            return cls(fileobj, key, engine)
+        except BaseException:
+            fileobj.close()
+            raise
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_ciphertext(self, start, length):
+        self.file.seek(self.data_offset + start)
+        return self.file.read(length)
+
+    def _decrypt_in_chunk(self, chunk, start, end):
+        """Decrypt [start, end) lying inside one chunk"""
+        iv = self.index[chunk][0]
+        offset = start - chunk * self.chunk_size
+        if self.mode == "cbc":
+            # Cần thêm byte ciphertext liền trước (hoặc IV ở đầu chunk)
+            if offset:
+                data = self._read_ciphertext(start - 1, end - start + 1)
+                previous, data = data[0], data[1:]
+            else:
+                previous, data = iv, self._read_ciphertext(start, end - start)
+            cipher = modes.StreamCipher(self.key, "cbc", iv, True, self.engine)
+            cipher.previous = previous
+            return cipher.update(data)
+        data = self._read_ciphertext(start, end - start)
+        return modes.StreamCipher(self.key, self.mode, iv, True, self.engine, offset).update(data)
+
+    def iter_range(self, start=0, end=None, block_size=READ_BLOCK_SIZE):
+        """Yield the plaintext of [start, end) in pieces of at most block_size"""
+        end = self.size if end is None else min(end, self.size)
+        position = max(0, start)
+        while position < end:
+            chunk = position // self.chunk_size
+            stop = min(end, (chunk + 1) * self.chunk_size, position + block_size)
+            yield self._decrypt_in_chunk(chunk, position, stop)
+            position = stop
+
+    def read_range(self, start=0, end=None):
+        """Plaintext bytes of [start, end)"""
+        return b"".join(self.iter_range(start, end))
+
+    def verify(self):
+        """Indices of chunks whose ciphertext does not match the stored CRC32"""
+        bad = []
+        for chunk, (_, crc) in enumerate(self.index):
+            start = chunk * self.chunk_size
+            data = self._read_ciphertext(start, min(self.chunk_size, self.size - start))
+            if zlib.crc32(data) != crc:
+                bad.append(chunk)
+        return bad
@@ -0,0 +1,169 @@
+"""
+Bộ phân tích dữ liệu nhập dùng chung (web, API, CLI, giao diện dòng lệnh)
+
+Giải mã cả chuỗi dài thành bytes bằng các codec mức C, không duyệt từng ký
+tự bằng Python:
+    - hex    : "0x6A1F", "6a 1f", "0x6A 0x1F"      -> bytes.fromhex
+    - bin    : "01101010 00011111"                  -> int(..., 2).to_bytes
+    - dec    : "106 31" hoặc "106,31" (mỗi số 0..255) -> bytes(map(int, ...))
+    - base64 : "ah8="                               -> binascii.a2b_base64
+    - text   : văn bản bất kỳ                       -> UTF-8 (chỉ khi chọn rõ)
+Kiểm tra hợp lệ bằng một regex đã biên dịch (fullmatch) cho mỗi định dạng.
+
+Tự nhận dạng (format "auto") giữ nguyên thứ tự ưu tiên của convert_input cũ:
+binary -> 0x-hex -> decimal, sau đó hex không có tiền tố (có chữ a-f); chuỗi
+không khớp định dạng nào bị từ chối. Base64 không bao giờ được đoán (vì gần
+như mọi từ đều là base64 hợp lệ, "test" sẽ thành b'\xb5\xeb-'): chỉ nhận khi
+có tiền tố "b64:" / "base64:" hoặc fmt="base64". Có thể ép định dạng bằng
+tiền tố "hex:", "bin:", "dec:" hoặc tham số fmt ("text" chỉ chọn qua fmt).
+
+parse_value / convert_input (một giá trị 8 bit như khóa, IV) chỉ nhận
+binary, hex và decimal.
+
+Mỗi nhóm (token) binary/hex ngắn hơn một byte được đệm 0 bên trái, nên
+"101" là 0x05 và "0x6" là 0x06 như trước.
+"""
+
+import binascii
+import re
+
+FORMATS = ("auto", "hex", "bin", "dec", "base64", "text")
+OUTPUT_FORMATS = ("hex", "bin", "dec", "base64", "text")
+
+_PREFIXES = {"hex": "hex", "bin": "bin", "dec": "dec", "b64": "base64", "base64": "base64"}
+_PREFIX_PATTERN = re.compile(r"^(hex|bin|dec|b64|base64):", re.IGNORECASE)
+
+_BIN_PATTERN = re.compile(r"[01\s]+")
+_HEX_PREFIXED_PATTERN = re.compile(r"(?:0[xX][0-9a-fA-F]+\s*)+")
+_HEX_PATTERN = re.compile(r"(?:0[xX])?[0-9a-fA-F\s]+")
+_DEC_PATTERN = re.compile(r"[0-9][0-9\s,]*")
+_BASE64_PATTERN = re.compile(r"[A-Za-z0-9+/\s]+={0,2}\s*")
+_HEX_LETTER = re.compile(r"[a-fA-F]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _pad_tokens(tokens, width):
+    """Left-pad every token to a multiple of width characters"""
+    return "".join(t.zfill(-(-len(t) // width) * width) for t in tokens)
+
+
+def parse_hex(text):
+    """Hex digits, optionally 0x-prefixed and whitespace-separated"""
+    if not _HEX_PATTERN.fullmatch(text) and not _HEX_PREFIXED_PATTERN.fullmatch(text):
+        raise ValueError("Chuỗi hex không hợp lệ")
+    tokens = text.split()
+    tokens = [t[2:] if t[:2] in ("0x", "0X") else t for t in tokens]
+    if all(len(t) % 2 == 0 for t in tokens):
+        # bytes.fromhex tự bỏ qua khoảng trắng giữa các cặp chữ số
+        return bytes.fromhex("".join(tokens))
+    return bytes.fromhex(_pad_tokens(tokens, 2))
+
+
+def parse_bin(text):
+    """Binary digits; whitespace-separated groups are padded to whole bytes"""
+    if not _BIN_PATTERN.fullmatch(text):
+        raise ValueError("Chuỗi binary không hợp lệ")
+    tokens = text.split()
+    digits = "".join(tokens)
+    if len(digits) % 8 or any(len(t) % 8 for t in tokens):
+        digits = _pad_tokens(tokens, 8)
+    return int(digits, 2).to_bytes(len(digits) // 8, "big") if digits else b""
+
+
+def parse_dec(text):
+    """Whitespace- or comma-separated decimal byte values (0..255)"""
+    if not _DEC_PATTERN.fullmatch(text):
+        raise ValueError("Chuỗi decimal không hợp lệ")
+    try:
+        return bytes(map(int, text.replace(",", " ").split()))
+    except ValueError:
+        raise ValueError("Mỗi giá trị decimal phải nằm trong khoảng 0..255")
+
+
+def parse_base64(text):
+    """Standard base64 (whitespace allowed, padding required)"""
+    if not _BASE64_PATTERN.fullmatch(text):
+        raise ValueError("Chuỗi base64 không hợp lệ")
+    try:
+        return binascii.a2b_base64(_WHITESPACE.sub("", text), strict_mode=True)
+    except binascii.Error as e:
+        raise ValueError(f"Chuỗi base64 không hợp lệ: {e}")
+
+
+PARSERS = {"hex": parse_hex, "bin": parse_bin, "dec": parse_dec, "base64": parse_base64}
+
+
+def detect_format(text):
+    """Format chosen by auto-detection (same priority as the old convert_input); never base64"""
+    if _BIN_PATTERN.fullmatch(text):
+        return "bin"
+    if text[:2] in ("0x", "0X"):
+        return "hex"
+    if _DEC_PATTERN.fullmatch(text):
+        return "dec"
+    if _HEX_PATTERN.fullmatch(text) and _HEX_LETTER.search(text):
+        return "hex"
+    raise ValueError("Không nhận dạng được định dạng (base64 cần tiền tố 'b64:' hoặc chọn định dạng base64)")
+
+
+def parse_bytes(text, fmt="auto"):
+    """
+    Decode a payload of any length to bytes
+    fmt: 'auto' (prefix or detection), 'hex', 'bin', 'dec', 'base64' or 'text' (UTF-8, kept verbatim)
+    Raises ValueError on invalid input
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Định dạng phải là một trong {FORMATS}")
+    if fmt == "text":
+        if not text:
+            raise ValueError("Dữ liệu rỗng")
+        return text.encode("utf-8")
+    text = text.strip()
+    match = _PREFIX_PATTERN.match(text)
+    if match:
+        prefix = _PREFIXES[match.group(1).lower()]
+        if fmt not in ("auto", prefix):
+            raise ValueError(f"Tiền tố '{match.group(1)}:' mâu thuẫn với định dạng {fmt}")
+        fmt, text = prefix, text[match.end():].strip()
+    if not text:
+        raise ValueError("Dữ liệu rỗng")
+    if fmt == "auto":
+        fmt = detect_format(text)
+    return PARSERS[fmt](text)
+
+
+def parse_value(text, bits=8):
+    """Single unsigned value of the given bit width (int) from binary, hex or decimal; raises ValueError"""
+    match = _PREFIX_PATTERN.match(text.strip())
+    if match and _PREFIXES[match.group(1).lower()] == "base64":
+        raise ValueError("Giá trị đơn không nhận base64")
+    data = parse_bytes(text)
+    if len(data) * 8 != -(-bits // 8) * 8 or int.from_bytes(data, "big") >> bits:
+        raise ValueError(f"Giá trị phải có đúng {bits} bit")
+    return int.from_bytes(data, "big")
+
+
+def convert_input(user_input, expected_bits):
+    """
+    Chuyển đổi input từ người dùng thành binary string
+    (None nếu không hợp lệ hoặc không vừa expected_bits bit)
+    """
+    try:
+        return format(parse_value(user_input, expected_bits), f"0{expected_bits}b")
+    except ValueError:
+        return None
+
+
+def format_bytes(data, fmt="hex"):
+    """Encode bytes for display: 'hex', 'bin', 'dec', 'base64' or 'text' (UTF-8, invalid bytes replaced)"""
+    if fmt == "hex":
+        return data.hex()
+    if fmt == "bin":
+        return format(int.from_bytes(data, "big"), f"0{8 * len(data)}b") if data else ""
+    if fmt == "dec":
+        return " ".join(map(str, data))
+    if fmt == "base64":
+        return binascii.b2a_base64(data, newline=False).decode("ascii")
+    if fmt == "text":
+        return data.decode("utf-8", errors="replace")
+    raise ValueError(f"Định dạng phải là một trong {OUTPUT_FORMATS}")
@@ -0,0 +1,428 @@
+"""
+Hàng đợi job nền cho các tác vụ dài (mã hóa file lớn, vét cạn, phân tích toàn không gian)
+
+- Mỗi job được lưu trong SQLite (mặc định .cache/jobs.sqlite3, đổi bằng
+  TINYDES_JOB_DB): loại job, tham số, trạng thái, tiến độ, kết quả/lỗi và
+  các mốc thời gian tạo/bắt đầu/kết thúc.
+- Mỗi job đang chạy có chủ (owner: id của JobQueue đã nhận nó) và nhịp tim
+  (heartbeat) được chủ làm mới định kỳ. Chỉ job 'running' có lease đã hết
+  hạn (chủ đã dừng hoặc chết) mới được đưa lại vào hàng đợi, nên nhiều tiến
+  trình dùng chung một file SQLite không giành job của nhau.
+- Một thread điều phối lấy job 'queued' theo thứ tự tạo và gửi sang
+  ProcessPoolExecutor, tôn trọng giới hạn tổng số worker và giới hạn riêng
+  cho từng loại job.
+- Hàm job chạy trong tiến trình worker, báo tiến độ qua đối tượng Progress
+  (ghi thẳng vào SQLite); Progress cũng kiểm tra cờ hủy và ném JobCancelled
+  để job dừng ở điểm an toàn kế tiếp.
+
+Trạng thái: queued -> running -> succeeded | failed | cancelled
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from functools import partial
+
+import avalanche
+import keysearch
+import keyspace
+import modes
+import randomness
+import sbox_analysis
+from tinydes import TinyDES
+from tinydes_fast import FastTinyDES
+
+JOB_DB = os.environ.get("TINYDES_JOB_DB", os.path.join(".cache", "jobs.sqlite3"))
+STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED = ("succeeded", "failed", "cancelled")
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Giới hạn số job chạy đồng thời theo loại (loại không có ở đây chỉ bị giới hạn bởi số worker)
+DEFAULT_KIND_LIMITS = {"keyspace": 1, "avalanche": 1}
+PROGRESS_INTERVAL = 0.25
+POLL_INTERVAL = 0.5
+# Chủ làm mới heartbeat mỗi HEARTBEAT_INTERVAL giây; quá LEASE_SECONDS thì job coi như mồ côi
+HEARTBEAT_INTERVAL = 5.0
+LEASE_SECONDS = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    owner TEXT,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+# Cột thêm sau phiên bản đầu của schema (ALTER TABLE cho file cũ)
+MIGRATIONS = {"owner": "TEXT", "heartbeat": "REAL"}
+
+
+def connect(path):
+    """SQLite connection in autocommit/WAL mode shared safely between processes"""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+class Progress:
+    """Progress reporter handed to job functions (runs in the worker process)"""
+
+    def __init__(self, db_path, job_id, interval=PROGRESS_INTERVAL):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, fraction, message=None):
+        """Record progress in [0, 1]; raises JobCancelled if the job was cancelled"""
+        now = time.monotonic()
+        if now - self._last < self.interval and fraction < 1:
+            return
+        self._last = now
+        with closing(connect(self.db_path)) as conn:
+            conn.execute("UPDATE jobs SET progress = ?, message = ? WHERE id = ?",
+                         (min(max(fraction, 0.0), 1.0), message, self.job_id))
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (self.job_id,)).fetchone()
+        if row is None or row["cancel_requested"]:
+            raise JobCancelled(self.job_id)
+
+
+# Các loại job (hàm cấp module để gửi được sang tiến trình worker)
+
+def _engine(params):
+    """Table engine of the stock cipher or of a variant given by sbox/shifts"""
+    if params.get("sbox") is None and params.get("shifts") is None:
+        return FastTinyDES()
+    return FastTinyDES(TinyDES(params.get("sbox"), params.get("shifts")))
+
+
+def _variant_engine(params):
+    """Table engine of a variant, None for the stock cipher (keeps the stock caches)"""
+    if params.get("sbox") is None and params.get("shifts") is None:
+        return None
+    return _engine(params)
+
+
+def job_crypt_file(params, progress):
+    """Encrypt/decrypt a file chunk by chunk in any mode"""
+    engine = _engine(params)
+    size = os.path.getsize(params["input"])
+    cipher = modes.StreamCipher(params["key"], params.get("mode", "ctr"), params.get("iv", 0),
+                                params.get("decrypt", False), engine)
+    done = 0
+    with open(params["input"], "rb") as source, open(params["output"], "wb") as sink:
+        while True:
+            chunk = source.read(params.get("buffer_size", modes.DEFAULT_BUFFER_SIZE))
+            if not chunk:
+                break
+            sink.write(cipher.update(chunk))
+            done += len(chunk)
+            progress(done / size if size else 1.0, f"{done}/{size} bytes")
+    return {"output": params["output"], "bytes": done}
+
+
+def job_brute_force(params, progress):
+    """Every key matching the known (plaintext, ciphertext) pairs"""
+    engine = _engine(params)
+    pairs = params["pairs"]
+    if not pairs:
+        raise ValueError("Cần ít nhất một cặp (plaintext, ciphertext)")
+    plaintexts = bytes(pt for pt, _ in pairs)
+    ciphertexts = bytes(ct for _, ct in pairs)
+    matches = []
+    for key in range(256):
+        if engine.encrypt_bytes(plaintexts, key) == ciphertexts:
+            matches.append(key)
+        if key % 16 == 15:
+            progress((key + 1) / 256, f"{key + 1}/256 khóa")
+    return {"keys": matches, "pairs": len(pairs)}
+
+
+def job_keysearch(params, progress):
+    """Ciphertext-only key search over the beginning of a file"""
+    sample_size = params.get("sample_size", keysearch.DEFAULT_SAMPLE_SIZE)
+    with open(params["input"], "rb") as f:
+        sample = f.read(sample_size)
+    progress(0.0, "Đang tìm khóa")
+    return keysearch.search(sample, params.get("mode", "ecb"), params.get("iv"), sample_size,
+                            params.get("top", keysearch.DEFAULT_TOP), _variant_engine(params))
+
+
+def job_keyspace(params, progress):
+    """Full key-space structure analysis (summary without per-key details)"""
+    progress(0.0, "Đang phân tích 256 khóa")
+    analysis = keyspace.analyze(_variant_engine(params))
+    return {key: value for key, value in analysis.items() if key != "keys"}
+
+
+def job_avalanche(params, progress):
+    """Avalanche/SAC/BIC summary per round over the whole space"""
+    progress(0.0, "Đang tính trên 65.536 cặp")
+    return {str(r): data["summary"] for r, data in avalanche.analyze(_variant_engine(params)).items()}
+
+
+def job_sbox(params, progress):
+    """Cryptographic metrics of an S-box (default: TinyDES)"""
+    result = sbox_analysis.analyze(params.get("sbox"))
+    return result if params.get("full") else sbox_analysis.summary(result)
+
+
+def job_randomness(params, progress):
+    """Randomness battery for several keys and modes"""
+    keys = params.get("keys", list(range(256)))
+    mode_names = params.get("modes", ["ctr", "ofb"])
+    rows = []
+    for i, key in enumerate(keys):
+        rows += randomness.compare([key], mode_names, params.get("length", randomness.DEFAULT_CHUNK_SIZE),
+                                   params.get("iv", 0))
+        progress((i + 1) / len(keys), f"{i + 1}/{len(keys)} khóa")
+    return {"results": rows, "passed": sum(row["passed"] for row in rows), "total": len(rows)}
+
+
+JOB_KINDS = {
+    "crypt_file": job_crypt_file,
+    "brute_force": job_brute_force,
+    "keysearch": job_keysearch,
+    "keyspace": job_keyspace,
+    "avalanche": job_avalanche,
+    "sbox": job_sbox,
+    "randomness": job_randomness,
+}
+
+
+def run_job(db_path, job_id, kind, params):
+    """Entry point executed in the worker process"""
+    return JOB_KINDS[kind](params, Progress(db_path, job_id))
+
+
+def _row_to_job(row):
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    job["duration"] = (job["finished"] or time.time()) - job["started"] if job["started"] else None
+    job["wait"] = (job["started"] or time.time()) - job["created"]
+    return job
+
+
+class JobQueue:
+    """SQLite-backed job queue executed by a process pool"""
+
+    def __init__(self, db_path=JOB_DB, max_workers=DEFAULT_MAX_WORKERS, kind_limits=None):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.kind_limits = dict(DEFAULT_KIND_LIMITS if kind_limits is None else kind_limits)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(connect(db_path)) as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        # Id của hàng đợi này, ghi vào job lúc nhận
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._running = {}
+        # RLock: callback của future đã xong có thể chạy ngay trong _dispatch
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pool = None
+        self._thread = None
+        self._last_heartbeat = 0.0
+        # Lỗi gần nhất của thread điều phối (thread vẫn chạy tiếp)
+        self.last_error = None
+
+    def _execute(self, sql, args=()):
+        with closing(connect(self.db_path)) as conn:
+            cursor = conn.execute(sql, args)
+            return cursor.fetchall(), cursor.rowcount
+
+    def recover(self, lease=LEASE_SECONDS):
+        """
+        Requeue running jobs whose owner stopped renewing their lease; finish
+        cancelled ones. Jobs of live queues (fresh heartbeat) are left alone.
+        Returns: number of requeued jobs
+        """
+        now = time.time()
+        expired = "status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)"
+        self._execute(f"UPDATE jobs SET status = 'cancelled', finished = ?, owner = NULL "
+                      f"WHERE cancel_requested = 1 AND (status = 'queued' OR ({expired}))", (now, now - lease))
+        _, requeued = self._execute(f"UPDATE jobs SET status = 'queued', progress = 0, message = ?, started = NULL, "
+                                    f"owner = NULL, heartbeat = NULL WHERE {expired}",
+                                    ("Chạy lại sau khi chủ cũ dừng", now - lease))
+        return requeued
+
+    def heartbeat(self):
+        """Renew the lease of every job this queue is running"""
+        self._last_heartbeat = time.monotonic()
+        _, count = self._execute("UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = 'running'",
+                                 (time.time(), self.owner))
+        return count
+
+    def start(self):
+        """Recover orphaned jobs, then start the process pool and the dispatcher thread"""
+        if self._thread is not None:
+            return
+        self.recover()
+        self._stop.clear()
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop dispatching and release the leases: running jobs are requeued by the next recover()"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._execute("UPDATE jobs SET heartbeat = NULL WHERE owner = ? AND status = 'running'", (self.owner,))
+
+    def submit(self, kind, params=None):
+        """Queue a job; returns its record"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Loại job không hỗ trợ: {kind} (có: {', '.join(JOB_KINDS)})")
+        job_id = uuid.uuid4().hex
+        self._execute("INSERT INTO jobs (id, kind, params, status, created) VALUES (?, ?, ?, 'queued', ?)",
+                      (job_id, kind, json.dumps(params or {}), time.time()))
+        self._wake.set()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """Job record (params, status, progress, result, timings) or None"""
+        rows, _ = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return _row_to_job(rows[0]) if rows else None
+
+    def list(self, status=None, limit=100):
+        """Most recent jobs first, optionally filtered by status"""
+        if status is None:
+            rows, _ = self._execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+        else:
+            rows, _ = self._execute("SELECT * FROM jobs WHERE status = ? ORDER BY created DESC LIMIT ?",
+                                    (status, limit))
+        return [_row_to_job(row) for row in rows]
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: queued jobs stop immediately, running jobs at their next
+        progress report. Returns the updated record, None if unknown.
+        """
+        self._execute("UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished = ? "
+                      "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+        self._execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def delete(self, job_id):
+        """Delete a finished job; returns False if it is unknown or still active"""
+        _, count = self._execute("DELETE FROM jobs WHERE id = ? AND status IN ('succeeded', 'failed', 'cancelled')",
+                                 (job_id,))
+        return count > 0
+
+    def stats(self):
+        """Job counts per status and current concurrency"""
+        rows, _ = self._execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        counts = {status: 0 for status in STATUSES} | {row["status"]: row["n"] for row in rows}
+        with self._lock:
+            running = len(self._running)
+        return {"counts": counts, "running": running, "max_workers": self.max_workers,
+                "kind_limits": self.kind_limits, "last_error": self.last_error}
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - self._last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self.heartbeat()
+                    # Nhận lại job của các hàng đợi khác đã chết
+                    if self.recover():
+                        self._wake.set()
+                self._dispatch()
+            except Exception as e:
+                # Lỗi tạm thời (SQLite bận, ...) không được làm dừng thread điều phối
+                self.last_error = f"{type(e).__name__}: {e}"
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+
+    def _dispatch(self):
+        with self._lock:
+            free = self.max_workers - len(self._running)
+            if free <= 0:
+                return
+            active = {}
+            for kind, _ in self._running.values():
+                active[kind] = active.get(kind, 0) + 1
+            rows, _ = self._execute("SELECT id, kind, params FROM jobs WHERE status = 'queued' ORDER BY created")
+            for row in rows:
+                if free <= 0:
+                    break
+                kind = row["kind"]
+                if active.get(kind, 0) >= self.kind_limits.get(kind, self.max_workers):
+                    continue
+                now = time.time()
+                _, claimed = self._execute("UPDATE jobs SET status = 'running', started = ?, attempts = attempts + 1, "
+                                           "owner = ?, heartbeat = ? WHERE id = ? AND status = 'queued'",
+                                           (now, self.owner, now, row["id"]))
+                if not claimed:
+                    continue
+                try:
+                    future = self._pool.submit(run_job, self.db_path, row["id"], kind, json.loads(row["params"]))
+                except BrokenProcessPool as e:
+                    # Một worker chết đột ngột làm hỏng cả pool: trả job vừa nhận về hàng đợi và tạo pool mới
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    self._execute("UPDATE jobs SET status = 'queued', started = NULL, owner = NULL, heartbeat = NULL "
+                                  "WHERE id = ? AND owner = ?", (row["id"], self.owner))
+                    self._pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    self._wake.set()
+                    break
+                self._running[row["id"]] = (kind, future)
+                active[kind] = active.get(kind, 0) + 1
+                free -= 1
+                future.add_done_callback(partial(self._finished, row["id"]))
+
+    def _finished(self, job_id, future):
+        if self._stop.is_set():
+            # Dừng giữa chừng: giữ trạng thái running để recover() chạy lại
+            with self._lock:
+                self._running.pop(job_id, None)
+            return
+        status, result, error = "succeeded", None, None
+        try:
+            result = json.dumps(future.result())
+        except JobCancelled:
+            status = "cancelled"
+        except BaseException as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        # Job không báo tiến độ vẫn chạy hết; khi đó kết quả bị bỏ nếu đã có yêu cầu hủy
+        self._execute("UPDATE jobs SET status = CASE WHEN cancel_requested = 1 THEN 'cancelled' ELSE ? END, "
+                      "result = CASE WHEN cancel_requested = 1 THEN NULL ELSE ? END, error = ?, finished = ?, "
+                      "progress = CASE WHEN ? = 'succeeded' AND cancel_requested = 0 THEN 1 ELSE progress END "
+                      "WHERE id = ? AND owner = ?",
+                      (status, result, error, time.time(), status, job_id, self.owner))
+        with self._lock:
+            self._running.pop(job_id, None)
+        self._wake.set()
@@ -0,0 +1,176 @@
+"""
+Sổ đăng ký khóa có tên với đối tượng mã hóa biên dịch sẵn
+
+Mỗi khóa được đăng ký dưới một key_id; khi đăng ký, lịch khóa (các khóa con),
+các hàng bảng F của từng vòng và hai hoán vị 256 byte (mã hóa/giải mã)
+được tính một lần và giữ trong CompiledKey. Các lời gọi mã hóa theo key_id
+sau đó chỉ còn tra bảng / bytes.translate, không phân tích hay lập lịch
+khóa lại.
+
+KeyRegistry là một LRU giới hạn số mục (OrderedDict + khóa luồng): mục ít
+dùng nhất bị loại khi đầy. Mỗi mục ghi lại số lần dùng, số byte đã xử lý
+và thời điểm dùng gần nhất; bản thân khóa không bao giờ được trả ra ngoài,
+chỉ có giá trị kiểm tra E_K(0).
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import modes
+
+DEFAULT_MAX_KEYS = 1024
+KEY_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+class CompiledKey:
+    """Key schedule, F-table rows and permutations of one key, plus usage stats"""
+
+    def __init__(self, key_id, key, engine=None, variant=None):
+        if not 0 <= key < 256:
+            raise ValueError("Khóa phải là giá trị 8-bit (0..255)")
+        self.engine = engine if engine is not None else modes.default_engine()
+        self.key_id = key_id
+        self.key = key
+        self.variant = variant
+        self.subkeys = self.engine.subkeys(key)
+        # Hàng F(R, k_i) của từng vòng: F của vòng i chỉ còn một phép tra
+        self.f_rows = tuple(tuple(self.engine.f_table[k]) for k in self.subkeys)
+        self.encrypt_table = self.engine.encrypt_table(key)
+        self.decrypt_table = self.engine.decrypt_table(key)
+        self.key_check = self.encrypt_table[0]
+        self.created = time.time()
+        self.last_used = None
+        self.uses = 0
+        self.bytes_processed = 0
+
+    def _touch(self, count):
+        self.uses += 1
+        self.bytes_processed += count
+        self.last_used = time.time()
+
+    def encrypt_block(self, plaintext):
+        """Encrypt one 8-bit block (int)"""
+        self._touch(1)
+        return self.encrypt_table[plaintext]
+
+    def decrypt_block(self, ciphertext):
+        """Decrypt one 8-bit block (int)"""
+        self._touch(1)
+        return self.decrypt_table[ciphertext]
+
+    def encrypt_binary(self, plaintext):
+        """Encrypt an 8-bit binary string, same contract as TinyDES.encrypt"""
+        return format(self.encrypt_block(int(plaintext, 2)), "08b")
+
+    def decrypt_binary(self, ciphertext):
+        """Decrypt an 8-bit binary string, same contract as TinyDES.decrypt"""
+        return format(self.decrypt_block(int(ciphertext, 2)), "08b")
+
+    def crypt(self, data, mode="ecb", iv=0, decrypt=False, offset=0):
+        """Encrypt or decrypt a byte string in any mode with the compiled tables"""
+        data = bytes(data)
+        self._touch(len(data))
+        if mode == "ecb":
+            return data.translate(self.decrypt_table if decrypt else self.encrypt_table)
+        return modes.StreamCipher(self.key, mode, iv, decrypt, self.engine, offset).update(data)
+
+    def info(self):
+        """Public metadata and stats (never the key itself)"""
+        return {
+            "key_id": self.key_id,
+            "variant": self.variant,
+            "key_check": f"{self.key_check:02X}",
+            "created": self.created,
+            "last_used": self.last_used,
+            "uses": self.uses,
+            "bytes_processed": self.bytes_processed,
+        }
+
+
+class KeyRegistry:
+    """Thread-safe LRU of compiled keys addressed by id"""
+
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS, engine=None):
+        self.max_keys = max_keys
+        self.engine = engine
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def register(self, key, key_id=None, engine=None, variant=None):
+        """
+        Compile key and store it under key_id (generated if None); replaces an existing id
+        engine/variant: table engine of a cipher variant (default: the registry's engine)
+        """
+        if key_id is None:
+            key_id = uuid.uuid4().hex[:12]
+        elif not KEY_ID_PATTERN.match(key_id):
+            raise ValueError("key_id chỉ gồm chữ, số, '_', '-', '.' và dài tối đa 64 ký tự")
+        compiled = CompiledKey(key_id, key, engine if engine is not None else self.engine, variant)
+        with self._lock:
+            self._keys.pop(key_id, None)
+            self._keys[key_id] = compiled
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+                self.evictions += 1
+        return compiled
+
+    def get(self, key_id):
+        """Compiled key for key_id; raises KeyError if unknown or evicted"""
+        with self._lock:
+            compiled = self._keys.get(key_id)
+            if compiled is None:
+                self.misses += 1
+                raise KeyError(key_id)
+            self._keys.move_to_end(key_id)
+            self.hits += 1
+            return compiled
+
+    def unregister(self, key_id):
+        """Remove key_id; returns False if it was not registered"""
+        with self._lock:
+            return self._keys.pop(key_id, None) is not None
+
+    def __contains__(self, key_id):
+        with self._lock:
+            return key_id in self._keys
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+    def encrypt(self, key_id, data, mode="ecb", iv=0, offset=0):
+        """Encrypt bytes with a registered key"""
+        return self.get(key_id).crypt(data, mode, iv, False, offset)
+
+    def decrypt(self, key_id, data, mode="ecb", iv=0, offset=0):
+        """Decrypt bytes with a registered key"""
+        return self.get(key_id).crypt(data, mode, iv, True, offset)
+
+    def entries(self):
+        """Metadata of every entry, least recently used first"""
+        with self._lock:
+            return [compiled.info() for compiled in self._keys.values()]
+
+    def cache_info(self):
+        """(hits, misses) for the metrics registry"""
+        return self.hits, self.misses
+
+    def stats(self):
+        """Counters and current size of the registry"""
+        with self._lock:
+            return {"keys": len(self._keys), "max_keys": self.max_keys, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+
+# Sổ đăng ký dùng chung cho toàn bộ tiến trình
+key_registry = KeyRegistry()
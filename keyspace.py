@@ -0,0 +1,173 @@
+"""
+Phân tích cấu trúc không gian khóa của TinyDES
+
+Mỗi khóa 8-bit xác định một hoán vị trên 256 giá trị, và compress_key chỉ
+giữ 6 trong 8 bit khóa ở mỗi vòng. Bản phân tích duyệt cả 256 khóa để tìm:
+    - lớp khóa tương đương (cùng bảng hoán vị mã hóa)
+    - khóa có dãy khóa con trùng nhau, và nhóm khóa trùng khóa con theo vòng
+    - khóa yếu (hoán vị tự nghịch đảo: E_k(E_k(x)) = x) và cặp khóa nửa yếu
+      (E_k2 = D_k1)
+    - điểm bất động và cấu trúc chu trình của từng hoán vị
+
+Kết quả được lưu đệm trong .cache theo mã băm của tinydes.py. Các bộ vét cạn
+chỉ cần thử một khóa đại diện cho mỗi lớp rồi mở rộng kết quả ra cả lớp.
+"""
+
+import json
+import math
+import os
+
+import conformance
+from tinydes_fast import FastTinyDES
+
+CACHE_PATH = os.path.join(conformance.ROOT, ".cache", "keyspace_analysis.json")
+
+_cached = None
+
+
+def cycle_lengths(table):
+    """Cycle lengths of a 256-byte permutation, longest first"""
+    seen = bytearray(256)
+    lengths = []
+    for start in range(256):
+        if seen[start]:
+            continue
+        length = 0
+        value = start
+        while not seen[value]:
+            seen[value] = 1
+            value = table[value]
+            length += 1
+        lengths.append(length)
+    return sorted(lengths, reverse=True)
+
+
+def _groups(mapping):
+    """Groups (as sorted key lists) of keys sharing the same value, size > 1 only"""
+    groups = {}
+    for key, value in enumerate(mapping):
+        groups.setdefault(value, []).append(key)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def analyze(engine=None):
+    """Full key-space analysis of one engine (FastTinyDES or compatible)"""
+    engine = engine if engine is not None else FastTinyDES()
+    enc = [engine.encrypt_table(k) for k in range(256)]
+    dec = [engine.decrypt_table(k) for k in range(256)]
+    subkeys = [tuple(engine.subkeys(k)) for k in range(256)]
+    rounds = range(len(subkeys[0]))
+
+    classes = {}
+    for key in range(256):
+        classes.setdefault(enc[key], []).append(key)
+    class_list = sorted(classes.values())
+    representative = [0] * 256
+    for members in class_list:
+        for key in members:
+            representative[key] = members[0]
+
+    by_encrypt = {table: key for key, table in enumerate(enc)}
+    semi_weak = sorted({(min(k1, k2), max(k1, k2)) for k1 in range(256)
+                        for k2 in [by_encrypt.get(dec[k1])] if k2 is not None and k2 != k1})
+
+    keys = []
+    for key in range(256):
+        lengths = cycle_lengths(enc[key])
+        fixed = [x for x in range(256) if enc[key][x] == x]
+        keys.append({
+            "key": key,
+            "subkeys": list(subkeys[key]),
+            "representative": representative[key],
+            "involutory": enc[key] == dec[key],
+            "fixed_points": fixed,
+            "cycle_lengths": lengths,
+            "cycle_count": len(lengths),
+            "order": math.lcm(*lengths),
+        })
+
+    fixed_counts = [len(k["fixed_points"]) for k in keys]
+    return {
+        "summary": {
+            "keys": 256,
+            "classes": len(class_list),
+            "largest_class": max(len(c) for c in class_list),
+            "subkey_collisions": len(_groups(subkeys)),
+            "round_subkey_groups": [len(_groups([s[r] for s in subkeys])) for r in rounds],
+            "involutory_keys": sum(k["involutory"] for k in keys),
+            "semi_weak_pairs": len(semi_weak),
+            "keys_with_fixed_points": sum(1 for n in fixed_counts if n),
+            "mean_fixed_points": sum(fixed_counts) / 256,
+            "mean_cycle_count": sum(k["cycle_count"] for k in keys) / 256,
+            "max_order": max(k["order"] for k in keys),
+        },
+        "classes": [c for c in class_list if len(c) > 1],
+        "representatives": [c[0] for c in class_list],
+        "subkey_collisions": _groups(subkeys),
+        "round_subkey_groups": [_groups([s[r] for s in subkeys]) for r in rounds],
+        "involutory_keys": [k["key"] for k in keys if k["involutory"]],
+        "semi_weak_pairs": [list(pair) for pair in semi_weak],
+        "keys": keys,
+    }
+
+
+def cached_analysis(path=CACHE_PATH):
+    """analyze() of the default engine, cached in memory and on disk"""
+    global _cached
+    fingerprint = conformance.reference_fingerprint().hex()
+    if _cached is not None and _cached[0] == fingerprint:
+        return _cached[1]
+    result = None
+    try:
+        with open(path) as f:
+            stored = json.load(f)
+        if stored.get("fingerprint") == fingerprint:
+            result = stored["analysis"]
+    except (OSError, ValueError):
+        pass
+    if result is None:
+        result = analyze()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, "w") as f:
+                json.dump({"fingerprint": fingerprint, "analysis": result}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    _cached = (fingerprint, result)
+    return result
+
+
+def representatives(analysis=None):
+    """One key per equivalence class"""
+    analysis = analysis if analysis is not None else cached_analysis()
+    return analysis["representatives"]
+
+
+def equivalent_keys(key, analysis=None):
+    """Every key with the same permutation as key (including key)"""
+    analysis = analysis if analysis is not None else cached_analysis()
+    representative = analysis["keys"][key]["representative"]
+    return [k["key"] for k in analysis["keys"] if k["representative"] == representative]
+
+
+def expand(keys, analysis=None):
+    """Expand representative keys to every member of their classes"""
+    analysis = analysis if analysis is not None else cached_analysis()
+    wanted = {analysis["keys"][k]["representative"] for k in keys}
+    return [k["key"] for k in analysis["keys"] if k["representative"] in wanted]
+
+
+def format_summary(analysis):
+    """Plain text summary of an analysis"""
+    s = analysis["summary"]
+    lines = [
+        f"Số lớp khóa tương đương: {s['classes']} / {s['keys']} (lớp lớn nhất: {s['largest_class']} khóa)",
+        f"Nhóm khóa trùng bộ ba khóa con: {s['subkey_collisions']}",
+        f"Nhóm khóa trùng khóa con theo vòng (K1, K2, K3): {s['round_subkey_groups']}",
+        f"Khóa yếu (tự nghịch đảo): {s['involutory_keys']}, cặp khóa nửa yếu: {s['semi_weak_pairs']}",
+        f"Khóa có điểm bất động: {s['keys_with_fixed_points']} (trung bình {s['mean_fixed_points']:.3f} điểm/khóa)",
+        f"Số chu trình trung bình: {s['mean_cycle_count']:.3f}, bậc hoán vị lớn nhất: {s['max_order']}",
+    ]
+    return "\n".join(lines)
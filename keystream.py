@@ -0,0 +1,124 @@
+"""
+Sinh và lưu đệm keystream cho chế độ CTR/OFB
+
+Keystream của một (khóa, nonce) chỉ phụ thuộc vào vị trí byte, nên khi
+nhiều thông điệp được mã hóa với cùng lịch (khóa, nonce) thì có thể dùng
+lại. KeystreamCache giữ các đoạn keystream lớn (mặc định 64 KiB) trong
+một LRU có giới hạn tổng số byte, khóa theo (mode, key, nonce, offset);
+mã hóa/giải mã CTR/OFB khi đó chỉ còn một phép XOR của payload với các
+byte đã có sẵn.
+
+Keystream TinyDES tuần hoàn (chu kỳ 256 với CTR, độ dài chu trình của
+hoán vị với OFB) nên offset được quy về offset mod chu kỳ, mọi đoạn có
+cùng pha dùng chung một mục trong cache.
+
+Một instance dùng chung (keystream_cache) được chia sẻ giữa các request
+và có thể đăng ký với metrics qua cache_info().
+"""
+
+import threading
+from collections import OrderedDict
+
+import modes
+from tinydes_fast import xor_bytes
+
+KEYSTREAM_MODES = ("ctr", "ofb")
+DEFAULT_SEGMENT_SIZE = 64 << 10
+DEFAULT_MAX_BYTES = 64 << 20
+
+
+def keystream_period(mode, key, nonce, engine=None):
+    """One full keystream period for (mode, key, nonce)"""
+    engine = engine if engine is not None else modes.default_engine()
+    if mode == "ctr":
+        return modes.ctr_period(engine, key, nonce)
+    if mode == "ofb":
+        return modes.ofb_period(engine, key, nonce)
+    raise ValueError(f"Keystream chỉ có ở chế độ: {', '.join(KEYSTREAM_MODES)}")
+
+
+def generate(mode, key, nonce, offset, length, engine=None):
+    """length keystream bytes starting at offset, built in bulk from the period"""
+    return modes.keystream_slice(keystream_period(mode, key, nonce, engine), offset, length)
+
+
+class KeystreamCache:
+    """Bounded LRU of keystream segments keyed by (mode, key, nonce, offset)"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, segment_size=DEFAULT_SEGMENT_SIZE, engine=None):
+        self.max_bytes = max_bytes
+        self.segment_size = segment_size
+        self.engine = engine
+        self._segments = OrderedDict()
+        self._periods = {}
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _period_length(self, mode, key, nonce):
+        cache_key = (mode, key, nonce)
+        length = self._periods.get(cache_key)
+        if length is None:
+            length = len(keystream_period(mode, key, nonce, self.engine))
+            self._periods[cache_key] = length
+        return length
+
+    def segment(self, mode, key, nonce, offset):
+        """The segment_size keystream bytes starting at offset (cached)"""
+        phase = offset % self._period_length(mode, key, nonce)
+        cache_key = (mode, key, nonce, phase)
+        with self._lock:
+            data = self._segments.get(cache_key)
+            if data is not None:
+                self._segments.move_to_end(cache_key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = generate(mode, key, nonce, phase, self.segment_size, self.engine)
+        with self._lock:
+            if cache_key not in self._segments:
+                self._segments[cache_key] = data
+                self.size += len(data)
+                while self.size > self.max_bytes and len(self._segments) > 1:
+                    _, evicted = self._segments.popitem(last=False)
+                    self.size -= len(evicted)
+                    self.evictions += 1
+        return data
+
+    def get(self, mode, key, nonce, offset, length):
+        """length keystream bytes starting at offset"""
+        pieces = []
+        position = offset
+        end = offset + length
+        while position < end:
+            start = position - position % self.segment_size
+            piece = self.segment(mode, key, nonce, start)
+            pieces.append(piece[position - start:min(end - start, self.segment_size)])
+            position = start + self.segment_size
+        return b"".join(pieces)
+
+    def crypt(self, data, key, mode="ctr", nonce=0, offset=0):
+        """CTR/OFB encryption or decryption (same operation) of data at offset"""
+        return xor_bytes(bytes(data), self.get(mode, key, nonce, offset, len(data)))
+
+    def cache_info(self):
+        """(hits, misses) for the metrics registry"""
+        return self.hits, self.misses
+
+    def stats(self):
+        """Counters and current size of the cache"""
+        with self._lock:
+            return {"segments": len(self._segments), "bytes": self.size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._segments.clear()
+            self._periods.clear()
+            self.size = 0
+
+
+# Cache dùng chung cho toàn bộ tiến trình
+keystream_cache = KeystreamCache()
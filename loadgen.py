@@ -0,0 +1,259 @@
+"""
+Bộ sinh tải bất đồng bộ (asyncio) cho HỆ THỐNG MÃ HÓA TINYDES
+
+- Client HTTP/1.1 tối giản dùng asyncio.open_connection, giữ kết nối (keep-alive)
+- Tải vòng hở (open-loop): request đến theo tiến trình Poisson với tốc độ
+  cố định, độ trễ được tính từ thời điểm request lẽ ra được gửi nên thời
+  gian chờ kết nối cũng được tính vào (không bị coordinated omission)
+- Báo cáo thông lượng, p50/p95/p99 và tỉ lệ lỗi, tổng và theo từng route
+- Có thể tự khởi động run_server.py với số worker khác nhau để so sánh
+
+Ví dụ:
+    python cli.py loadgen --url http://127.0.0.1:8000 --rate 200 --duration 10
+    python cli.py loadgen --launch --workers 1,2,4 --mix encrypt=3,process=1
+"""
+
+import asyncio
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.parse
+
+from benchmark import free_port, stop_server, ROOT
+
+# Tên kịch bản -> (method, path, form)
+SCENARIOS = {
+    "encrypt": ("POST", "/encrypt", {"plaintext": "01011100", "key": "01101010"}),
+    "decrypt": ("POST", "/decrypt", {"ciphertext": "00000110", "key": "01101010"}),
+    "process": ("POST", "/process", {"plaintext": "01011100", "key": "01101010", "process_type": "encrypt"}),
+    "api_process": ("GET", "/api/process?input=92&key=106", None),
+    "health": ("GET", "/health", None),
+    "info": ("GET", "/api/info", None),
+}
+DEFAULT_MIX = "encrypt=4,decrypt=3,process=2,api_process=1"
+
+
+def parse_mix(text):
+    """Parse 'name=weight,...' into [(name, weight)]"""
+    mix = []
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Kịch bản không hợp lệ: {name} (có: {', '.join(SCENARIOS)})")
+        mix.append((name, float(weight) if weight else 1.0))
+    if not mix:
+        raise ValueError("Mix rỗng")
+    return mix
+
+
+def build_request(method, path, form, host):
+    """Raw HTTP/1.1 request bytes"""
+    body = urllib.parse.urlencode(form).encode() if form else b""
+    headers = [f"{method} {path} HTTP/1.1", f"Host: {host}", "Connection: keep-alive"]
+    if form:
+        headers.append("Content-Type: application/x-www-form-urlencoded")
+    if body or method == "POST":
+        headers.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns (status, keep_alive)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Kết nối bị đóng")
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value:
+            chunked = True
+        elif name == "connection" and value == "close":
+            keep_alive = False
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
+
+
+class LoadGenerator:
+    """Open-loop load generator with a bounded keep-alive connection pool"""
+
+    def __init__(self, url, mix=DEFAULT_MIX, rate=100.0, duration=10.0,
+                 connections=64, timeout=10.0, seed=None):
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 80
+        self.mix = parse_mix(mix) if isinstance(mix, str) else mix
+        self.rate = rate
+        self.duration = duration
+        self.connections = connections
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        host_header = f"{self.host}:{self.port}"
+        self.requests = {name: build_request(*SCENARIOS[name], host_header) for name, _ in self.mix}
+        self.samples = []  # (scenario, latency_s, ok)
+
+    async def _connection(self, pool):
+        try:
+            return pool.get_nowait()
+        except asyncio.QueueEmpty:
+            return await asyncio.open_connection(self.host, self.port)
+
+    async def _one(self, name, scheduled, pool, slots):
+        async with slots:
+            ok = False
+            try:
+                reader, writer = await asyncio.wait_for(self._connection(pool), self.timeout)
+                try:
+                    writer.write(self.requests[name])
+                    status, keep_alive = await asyncio.wait_for(read_response(reader), self.timeout)
+                    ok = status < 400
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    pool.put_nowait((reader, writer))
+                else:
+                    writer.close()
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError):
+                ok = False
+            self.samples.append((name, time.perf_counter() - scheduled, ok))
+
+    async def run(self):
+        """Drive the load and return the report dict"""
+        pool = asyncio.Queue()
+        slots = asyncio.Semaphore(self.connections)
+        names = [name for name, _ in self.mix]
+        weights = [weight for _, weight in self.mix]
+        tasks = []
+        start = time.perf_counter()
+        next_at = start
+        end = start + self.duration
+        while next_at < end:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = self.rng.choices(names, weights)[0]
+            tasks.append(asyncio.ensure_future(self._one(name, next_at, pool, slots)))
+            next_at += self.rng.expovariate(self.rate)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        while not pool.empty():
+            _, writer = pool.get_nowait()
+            writer.close()
+        return summarize(self.samples, elapsed, self.rate)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _stats(samples, elapsed):
+    latencies = sorted(latency for _, latency, _ in samples)
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_per_s": (len(samples) - errors) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p95_ms": percentile(latencies, 95) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1e3,
+    }
+
+
+def summarize(samples, elapsed, rate):
+    """Overall and per-scenario statistics"""
+    by_name = {}
+    for sample in samples:
+        by_name.setdefault(sample[0], []).append(sample)
+    report = {"target_rate": rate, "elapsed_s": elapsed, "total": _stats(samples, elapsed)}
+    report["routes"] = {name: _stats(group, elapsed) for name, group in sorted(by_name.items())}
+    return report
+
+
+def format_report(report, title=None):
+    """Plain text table of a report"""
+    lines = []
+    if title:
+        lines.append(title)
+    lines.append(f"Tốc độ mục tiêu: {report['target_rate']:.0f} req/s, thời gian: {report['elapsed_s']:.1f}s")
+    lines.append(f"{'Route':<14} {'Số req':>8} {'Lỗi %':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in [("TỔNG", report["total"])] + list(report["routes"].items()):
+        lines.append(f"{name:<14} {stats['requests']:>8} {stats['error_rate'] * 100:>6.2f}% "
+                     f"{stats['throughput_per_s']:>9.1f} {stats['p50_ms']:>9.2f} "
+                     f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+    return "\n".join(lines)
+
+
+def launch_server(workers=1, timeout=30.0):
+    """Start run_server.py with the given worker count on a free port"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    process = subprocess.Popen([sys.executable, "run_server.py"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+
+    async def probe():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(build_request("GET", "/health", None, f"127.0.0.1:{port}"))
+        status, _ = await read_response(reader)
+        writer.close()
+        return status
+
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("run_server.py dừng ngay khi khởi động")
+        try:
+            if asyncio.run(probe()) == 200:
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError("Hết thời gian chờ server khởi động")
+
+
+def run(url=None, mix=DEFAULT_MIX, rate=100.0, duration=10.0, connections=64, seed=None):
+    """Run one load test against url and return its report"""
+    generator = LoadGenerator(url, mix, rate, duration, connections, seed=seed)
+    return asyncio.run(generator.run())
+
+
+def run_worker_sweep(worker_counts, **kwargs):
+    """Launch a server per worker count and run the same load against each"""
+    reports = {}
+    for workers in worker_counts:
+        process, port = launch_server(workers)
+        try:
+            reports[workers] = run(f"http://127.0.0.1:{port}", **kwargs)
+        finally:
+            stop_server(process)
+    return reports
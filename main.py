@@ -1,13 +1,31 @@
-from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi import APIRouter, FastAPI, Request, Form, HTTPException, Header
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, PlainTextResponse
+from fastapi.responses import Response as RawResponse
 from pydantic import BaseModel, field_validator
-from typing import Union, Optional
+from typing import Optional
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import shutil
 import os
 from tinydes import TinyDES
+from tinydes_fast import FastTinyDES
+import trace_export
+import container
+import keyspace
+import avalanche
+import sbox_analysis
+import modes
+import jobs
+from input_parser import convert_input, parse_bytes, format_bytes, OUTPUT_FORMATS
+from keystream import keystream_cache, KEYSTREAM_MODES
+from key_registry import key_registry
+from variants import VariantRegistry, stock_variant, DEFAULT_VARIANT
+from trace_store import TraceStore
+import metrics
+from profiling import profiler
 
 # Copy hình ảnh lý thuyết vào static folder nếu chưa có
 def ensure_theory_image():
@@ -38,8 +56,27 @@ ensure_theory_image()
 # Đảm bảo ảnh avatar có sẵn
 ensure_avatar_image()
 
+@asynccontextmanager
+async def lifespan(app):
+    """Khởi động/dừng các task nền của ứng dụng"""
+    # Đo độ trễ event loop cho /metrics
+    monitor = asyncio.create_task(metrics.monitor_event_loop())
+    # Nạp lại định kỳ các file cấu hình biến thể (hot reload)
+    watcher = asyncio.create_task(variant_registry.watch())
+    # Hàng đợi job nền: nhận lại job mồ côi (lease hết hạn), process pool và thread điều phối
+    global job_queue
+    job_queue = jobs.JobQueue()
+    job_queue.start()
+    try:
+        yield
+    finally:
+        monitor.cancel()
+        watcher.cancel()
+        job_queue.stop()
+
 # Khởi tạo FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="HỆ THỐNG MÃ HÓA TINYDES",
     description="Hệ thống mã hóa TinyDES - Đại học Kinh tế Quốc dân (NEU) - Khoa CNTT. Ứng dụng web chuyên nghiệp cho thuật toán mã hóa TinyDES với giao diện hiện đại và dễ sử dụng.",
     version="2.0.0",
@@ -59,9 +96,29 @@ def hex_filter(value):
 
 templates.env.filters['hex'] = hex_filter
 app.mount("/static", StaticFiles(directory="static"), name="static")
+# Đo số request, độ trễ theo route và số request đang xử lý
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Khởi tạo TinyDES instance
 tinydes = TinyDES()
+# Engine bảng tra dùng cho xử lý hàng loạt
+fast_tinydes = FastTinyDES(tinydes)
+# Kho trace tính sẵn cho toàn bộ 65.536 cặp (plaintext, key), ánh xạ bằng mmap
+trace_store = TraceStore.open(engine=fast_tinydes)
+metrics.registry.register_cache("permutation_tables", fast_tinydes.cache_info)
+# Keystream CTR/OFB dùng chung giữa các request
+keystream_cache.engine = fast_tinydes
+metrics.registry.register_cache("keystream", keystream_cache.cache_info)
+# Khóa đã đăng ký theo tên, biên dịch sẵn lịch khóa và bảng hoán vị
+key_registry.engine = fast_tinydes
+metrics.registry.register_cache("key_registry", key_registry.cache_info)
+# Các biến thể TinyDES (S-box, số vòng, lịch dịch khóa) nạp từ thư mục cấu hình
+variant_registry = VariantRegistry(stock=stock_variant(tinydes, fast_tinydes))
+variant_registry.reload()
+templates.env.globals["variant_names"] = variant_registry.names
+templates.env.globals["cipher_modes"] = modes.MODES
+# Hàng đợi job nền lưu trong SQLite, chạy trên process pool (tạo trong lifespan)
+job_queue = None
 
 # Pydantic models cho request/response
 class EncryptRequest(BaseModel):
@@ -107,46 +164,76 @@ class CompressKeyRequest(BaseModel):
             raise ValueError('Input không được để trống')
         return v.strip()
 
+class KeyRegisterRequest(BaseModel):
+    key: str
+    key_id: Optional[str] = None
+    variant: str = DEFAULT_VARIANT
+    
+    @field_validator('key')
+    @classmethod
+    def validate_input(cls, v):
+        if not v.strip():
+            raise ValueError('Input không được để trống')
+        return v.strip()
+
+class TextCryptRequest(BaseModel):
+    data: str
+    key: str
+    mode: str = "ctr"
+    iv: str = "0"
+    decrypt: bool = False
+    input_format: str = "auto"
+    output_format: str = "hex"
+    variant: str = DEFAULT_VARIANT
+
+class JobRequest(BaseModel):
+    kind: str
+    params: dict = {}
+    variant: str = DEFAULT_VARIANT
+
+class SBoxRequest(BaseModel):
+    sbox: list[list[int]]
+    full: bool = True
+
 class Response(BaseModel):
     success: bool
     message: str
     data: dict = None
 
-# Utility function để convert input
-def convert_input(user_input: str, expected_bits: int) -> Union[str, None]:
-    """Chuyển đổi input từ người dùng thành binary string"""
-    user_input = user_input.strip().lower()
-    
-    try:
-        # Nếu là binary
-        if all(c in '01' for c in user_input):
-            if len(user_input) == expected_bits:
-                return user_input
-            elif len(user_input) < expected_bits:
-                return user_input.zfill(expected_bits)
-            else:
-                return None
-        
-        # Nếu là hex
-        elif user_input.startswith('0x'):
-            hex_value = user_input[2:]
-            if len(hex_value) <= 2 and all(c in '0123456789abcdef' for c in hex_value):
-                decimal = int(hex_value, 16)
-                return format(decimal, f'0{expected_bits}b')
-        
-        # Nếu là decimal
-        elif user_input.isdigit():
-            decimal = int(user_input)
-            if 0 <= decimal < 2**expected_bits:
-                return format(decimal, f'0{expected_bits}b')
-        
-        return None
-        
-    except ValueError:
-        return None
+def resolve_variant(name: str):
+    """Biến thể đã biên dịch theo tên, 404 nếu không có"""
+    cipher = variant_registry.find(name)
+    if cipher is None:
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy biến thể: {name}")
+    return cipher
+
+def detailed_process(cipher, process_type: str, input_bin: str, key_bin: str) -> dict:
+    """Quy trình chi tiết: biến thể gốc tra từ trace store, biến thể khác tính trực tiếp"""
+    if cipher.name == DEFAULT_VARIANT:
+        source = trace_store
+        metrics.record_bytes("trace_store", process_type, 1, cipher.name)
+    else:
+        source = cipher.reference
+        metrics.record_bytes("string", process_type, 1, cipher.name)
+    if process_type == "encrypt":
+        process_details = source.encrypt_detailed(input_bin, key_bin)
+    else:
+        process_details = source.decrypt_detailed(input_bin, key_bin)
+    process_details['type'] = process_type
+    process_details['variant'] = cipher.name
+    return process_details
 
 # Web Routes
 
+def render_page(fragment: str, context: dict):
+    """
+    Toàn trang index.html, hoặc chỉ panel kết quả (template fragment) khi form
+    được gửi bằng fetch với header X-Fragment
+    """
+    if context["request"].headers.get("x-fragment"):
+        return templates.TemplateResponse(fragment, context)
+    return templates.TemplateResponse("index.html", context)
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request, tab: str = "theory"):
     """Trang chủ HỆ THỐNG MÃ HÓA TINYDES với giao diện mới (header, sidebar, main content)"""
@@ -155,194 +242,166 @@ async def home(request: Request, tab: str = "theory"):
         "active_tab": tab
     })
 
+# Thông điệp nhiều khối trên form web
+
+# Giới hạn độ dài thông điệp nhập từ form và số khối liệt kê trong tab Quy trình
+MAX_MESSAGE_BYTES = 64 << 10
+MAX_PROCESS_BLOCKS = 256
+
+def parse_message(process_type: str, message: str, key: str, mode: str, iv: str, input_format: str, variant: str):
+    """Kiểm tra dữ liệu form; trả về (cipher, data, key, iv), ValueError kèm thông báo nếu không hợp lệ"""
+    label = "plaintext" if process_type == "encrypt" else "ciphertext"
+    try:
+        data = parse_bytes(message, input_format)
+    except ValueError as e:
+        raise ValueError(f"Định dạng {label} không hợp lệ: {e}")
+    if len(data) > MAX_MESSAGE_BYTES:
+        raise ValueError(f"{label.capitalize()} vượt quá {MAX_MESSAGE_BYTES} bytes")
+    key_bin = convert_input(key, 8)
+    if key_bin is None:
+        raise ValueError("Định dạng key không hợp lệ")
+    if mode not in modes.MODES:
+        raise ValueError(f"Chế độ phải là một trong {modes.MODES}")
+    iv_bin = convert_input(iv, 8)
+    if iv_bin is None:
+        raise ValueError("Định dạng IV không hợp lệ")
+    cipher = variant_registry.find(variant)
+    if cipher is None:
+        raise ValueError(f"Không tìm thấy biến thể: {variant}")
+    return cipher, data, int(key_bin, 2), int(iv_bin, 2)
+
+def message_result(process_type: str, cipher, data: bytes, key: int, mode: str, iv: int) -> dict:
+    """Kết quả mã hóa/giải mã cả thông điệp bằng engine bảng tra, kèm các dạng hiển thị"""
+    output = crypt_bytes(data, key, mode, iv, process_type == "decrypt", cipher)
+    source, target = ("plaintext", "ciphertext") if process_type == "encrypt" else ("ciphertext", "plaintext")
+    result = {"type": process_type, "variant": cipher.name, "mode": mode, "iv": f"0x{iv:02X}",
+              "key": format(key, "08b"), "blocks": len(data)}
+    if len(data) == 1:
+        # Một khối: giữ nguyên các dạng binary/hex/decimal như trước
+        result |= {source: format(data[0], "08b"), target: format(output[0], "08b"),
+                   f"{target}_hex": hex(output[0]), f"{target}_decimal": output[0]}
+    else:
+        result |= {source: data.hex(), f"{target}_hex": output.hex(),
+                   f"{target}_base64": format_bytes(output, "base64"), f"{target}_text": format_bytes(output, "text")}
+    return result
+
+def process_blocks(process_type: str, cipher, data: bytes, key: int, mode: str, iv: int) -> dict:
+    """Danh sách khối cho tab Quy trình; quy trình chi tiết của từng khối chỉ được tải khi mở khối đó"""
+    decrypt = process_type == "decrypt"
+    output = crypt_bytes(data, key, mode, iv, decrypt, cipher)
+    rows = []
+    for index, (cipher_input, cipher_output, inverse) in enumerate(
+            modes.block_calls(data, output, mode, iv, decrypt, MAX_PROCESS_BLOCKS)):
+        rows.append({
+            "index": index,
+            "input": f"{data[index]:02X}",
+            "output": f"{output[index]:02X}",
+            "cipher_input": format(cipher_input, "08b"),
+            "cipher_output": format(cipher_output, "08b"),
+            "process_type": "decrypt" if inverse else "encrypt"
+        })
+    return {"type": process_type, "variant": cipher.name, "mode": mode, "iv": f"0x{iv:02X}",
+            "key": format(key, "08b"), "blocks": len(data), "input_hex": data.hex(),
+            "output_hex": output.hex(), "output_text": format_bytes(output, "text"), "rows": rows}
+
 @app.post("/process", response_class=HTMLResponse)
-async def process_detailed(request: Request, plaintext: str = Form(...), key: str = Form(...), process_type: str = Form("encrypt")):
-    """Xử lý form hiển thị quy trình chi tiết mã hóa/giải mã"""
+def process_detailed(request: Request, plaintext: str = Form(...), key: str = Form(...), process_type: str = Form("encrypt"),
+                           mode: str = Form("ecb"), iv: str = Form("0"), input_format: str = Form("auto"),
+                           variant: str = Form(DEFAULT_VARIANT)):
+    """
+    Xử lý form hiển thị quy trình chi tiết mã hóa/giải mã
+    (route đồng bộ: FastAPI chạy trong threadpool, thông điệp tới 64 KiB không chặn event loop)
+    """
+    # Đảm bảo process_type có giá trị hợp lệ
+    if not process_type or process_type not in ["encrypt", "decrypt"]:
+        process_type = "encrypt"
+    context = {
+        "request": request,
+        "plaintext": plaintext,
+        "key": key,
+        "active_tab": "process",  # Luôn hiển thị trong tab "Quy trình"
+        "process_type": process_type,  # Giữ nguyên lựa chọn process_type
+        "mode": mode,
+        "iv": iv,
+        "input_format": input_format,
+        "variant": variant
+    }
     try:
-        # Đảm bảo process_type có giá trị hợp lệ
-        if not process_type or process_type not in ["encrypt", "decrypt"]:
-            process_type = "encrypt"
-        # Convert inputs
-        if process_type == "encrypt":
-            input_bin = convert_input(plaintext, 8)
-            if input_bin is None:
-                error = "Định dạng plaintext không hợp lệ"
-                return templates.TemplateResponse("index.html", {
-                    "request": request, 
-                    "error": error,
-                    "plaintext": plaintext,
-                    "key": key,
-                    "active_tab": "process",
-                    "process_type": process_type  # Giữ nguyên lựa chọn process_type
-                })
-        else:  # decrypt
-            input_bin = convert_input(plaintext, 8)
-            if input_bin is None:
-                error = "Định dạng ciphertext không hợp lệ"
-                return templates.TemplateResponse("index.html", {
-                    "request": request, 
-                    "error": error,
-                    "plaintext": plaintext,
-                    "key": key,
-                    "active_tab": "process",
-                    "process_type": process_type  # Giữ nguyên lựa chọn process_type
-                })
-        
-        key_bin = convert_input(key, 8)
-        if key_bin is None:
-            error = "Định dạng key không hợp lệ"
-            return templates.TemplateResponse("index.html", {
-                "request": request, 
-                "error": error,
-                "plaintext": plaintext,
-                "key": key,
-                "active_tab": "process",
-                "process_type": process_type  # Giữ nguyên lựa chọn process_type
-            })
-        
-        # Get detailed process
-        if process_type == "encrypt":
-            process_details = tinydes.encrypt_detailed(input_bin, key_bin)
-            process_details['type'] = 'encrypt'
+        cipher, data, key_int, iv_int = parse_message(process_type, plaintext, key, mode, iv, input_format, variant)
+        if len(data) == 1 and mode == "ecb":
+            # Một khối ECB: hiển thị ngay toàn bộ quy trình (biến thể gốc tra cứu từ trace store)
+            context["process_details"] = detailed_process(cipher, process_type, format(data[0], "08b"),
+                                                          format(key_int, "08b"))
         else:
-            process_details = tinydes.decrypt_detailed(input_bin, key_bin)
-            process_details['type'] = 'decrypt'
-        
-        return templates.TemplateResponse("index.html", {
-            "request": request,
-            "process_details": process_details,
-            "plaintext": plaintext,
-            "key": key,
-            "active_tab": "process",  # Luôn hiển thị trong tab "Quy trình"
-            "process_type": process_type  # Giữ nguyên lựa chọn process_type
-        })
-        
+            context["process_blocks"] = process_blocks(process_type, cipher, data, key_int, mode, iv_int)
+    except ValueError as e:
+        context["error"] = str(e)
     except Exception as e:
-        error = f"Lỗi xử lý: {str(e)}"
-        return templates.TemplateResponse("index.html", {
-            "request": request, 
-            "error": error,
-            "plaintext": plaintext,
-            "key": key,
-            "active_tab": "process",
-            "process_type": process_type  # Giữ nguyên lựa chọn process_type
-        })
+        context["error"] = f"Lỗi xử lý: {str(e)}"
+    return render_page("fragments/process_result.html", context)
+
+@app.get("/process/block", response_class=HTMLResponse)
+async def process_block(request: Request, input: str, key: str, process_type: str = "encrypt",
+                        variant: str = DEFAULT_VARIANT):
+    """Quy trình chi tiết của một khối (đoạn HTML), tải khi người dùng mở khối trong tab Quy trình"""
+    if process_type not in ["encrypt", "decrypt"]:
+        raise HTTPException(status_code=400, detail="process_type phải là encrypt hoặc decrypt")
+    input_bin = convert_input(input, 8)
+    key_bin = convert_input(key, 8)
+    if input_bin is None or key_bin is None:
+        raise HTTPException(status_code=400, detail="Định dạng input hoặc key không hợp lệ")
+    return templates.TemplateResponse("fragments/process_details.html", {
+        "request": request,
+        "process_details": detailed_process(resolve_variant(variant), process_type, input_bin, key_bin)
+    })
 
 @app.post("/encrypt", response_class=HTMLResponse)
-async def encrypt_form(request: Request, plaintext: str = Form(...), key: str = Form(...)):
-    """Xử lý form mã hóa"""
+def encrypt_form(request: Request, plaintext: str = Form(...), key: str = Form(...),
+                       mode: str = Form("ecb"), iv: str = Form("0"), input_format: str = Form("auto"),
+                       variant: str = Form(DEFAULT_VARIANT)):
+    """Xử lý form mã hóa (một hoặc nhiều khối theo chế độ đã chọn)"""
+    context = {
+        "request": request,
+        "plaintext": plaintext,
+        "key": key,
+        "active_tab": "encrypt",
+        "mode": mode,
+        "iv": iv,
+        "input_format": input_format,
+        "variant": variant
+    }
     try:
-        # Convert inputs
-        plaintext_bin = convert_input(plaintext, 8)
-        key_bin = convert_input(key, 8)
-        
-        if plaintext_bin is None:
-            error = "Định dạng plaintext không hợp lệ"
-            return templates.TemplateResponse("index.html", {
-                "request": request, 
-                "error": error,
-                "plaintext": plaintext,
-                "key": key,
-                "active_tab": "encrypt"
-            })
-        
-        if key_bin is None:
-            error = "Định dạng key không hợp lệ"
-            return templates.TemplateResponse("index.html", {
-                "request": request, 
-                "error": error,
-                "plaintext": plaintext,
-                "key": key,
-                "active_tab": "encrypt"
-            })
-        
-        # Encrypt
-        ciphertext = tinydes.encrypt(plaintext_bin, key_bin)
-        
-        result = {
-            "type": "encrypt",
-            "plaintext": plaintext_bin,
-            "key": key_bin,
-            "ciphertext": ciphertext,
-            "ciphertext_hex": hex(int(ciphertext, 2)),
-            "ciphertext_decimal": int(ciphertext, 2)
-        }
-        
-        return templates.TemplateResponse("index.html", {
-            "request": request, 
-            "result": result,
-            "plaintext": plaintext,
-            "key": key,
-            "active_tab": "encrypt"
-        })
-        
+        cipher, data, key_int, iv_int = parse_message("encrypt", plaintext, key, mode, iv, input_format, variant)
+        context["result"] = message_result("encrypt", cipher, data, key_int, mode, iv_int)
+    except ValueError as e:
+        context["error"] = str(e)
     except Exception as e:
-        error = f"Lỗi mã hóa: {str(e)}"
-        return templates.TemplateResponse("index.html", {
-            "request": request, 
-            "error": error,
-            "plaintext": plaintext,
-            "key": key,
-            "active_tab": "encrypt"
-        })
+        context["error"] = f"Lỗi mã hóa: {str(e)}"
+    return render_page("fragments/encrypt_result.html", context)
 
 @app.post("/decrypt", response_class=HTMLResponse)
-async def decrypt_form(request: Request, ciphertext: str = Form(...), key: str = Form(...)):
-    """Xử lý form giải mã"""
+def decrypt_form(request: Request, ciphertext: str = Form(...), key: str = Form(...),
+                       mode: str = Form("ecb"), iv: str = Form("0"), input_format: str = Form("auto"),
+                       variant: str = Form(DEFAULT_VARIANT)):
+    """Xử lý form giải mã (một hoặc nhiều khối theo chế độ đã chọn)"""
+    context = {
+        "request": request,
+        "ciphertext": ciphertext,
+        "key": key,
+        "active_tab": "decrypt",
+        "mode": mode,
+        "iv": iv,
+        "input_format": input_format,
+        "variant": variant
+    }
     try:
-        # Convert inputs
-        ciphertext_bin = convert_input(ciphertext, 8)
-        key_bin = convert_input(key, 8)
-        
-        if ciphertext_bin is None:
-            error = "Định dạng ciphertext không hợp lệ"
-            return templates.TemplateResponse("index.html", {
-                "request": request, 
-                "error": error,
-                "ciphertext": ciphertext,
-                "key": key,
-                "active_tab": "decrypt"
-            })
-        
-        if key_bin is None:
-            error = "Định dạng key không hợp lệ"
-            return templates.TemplateResponse("index.html", {
-                "request": request, 
-                "error": error,
-                "ciphertext": ciphertext,
-                "key": key,
-                "active_tab": "decrypt"
-            })
-        
-        # Decrypt
-        plaintext = tinydes.decrypt(ciphertext_bin, key_bin)
-        
-        result = {
-            "type": "decrypt",
-            "ciphertext": ciphertext_bin,
-            "key": key_bin,
-            "plaintext": plaintext,
-            "plaintext_hex": hex(int(plaintext, 2)),
-            "plaintext_decimal": int(plaintext, 2)
-        }
-        
-        return templates.TemplateResponse("index.html", {
-            "request": request, 
-            "result": result,
-            "ciphertext": ciphertext,
-            "key": key,
-            "active_tab": "decrypt"
-        })
-        
+        cipher, data, key_int, iv_int = parse_message("decrypt", ciphertext, key, mode, iv, input_format, variant)
+        context["result"] = message_result("decrypt", cipher, data, key_int, mode, iv_int)
+    except ValueError as e:
+        context["error"] = str(e)
     except Exception as e:
-        error = f"Lỗi giải mã: {str(e)}"
-        return templates.TemplateResponse("index.html", {
-            "request": request, 
-            "error": error,
-            "ciphertext": ciphertext,
-            "key": key,
-            "active_tab": "decrypt"
-        })
+        context["error"] = f"Lỗi giải mã: {str(e)}"
+    return render_page("fragments/decrypt_result.html", context)
 
 # API Endpoints (Optional - có thể xóa nếu không cần)
 
@@ -362,6 +421,7 @@ async def get_info():
             "rounds": 3,
             "subkey_size": "6 bit"
         },
+        "variants": variant_registry.names(),
         "components": {
             "expand": "4 bit → 6 bit",
             "sbox": "6 bit → 4 bit (4x16 matrix)",
@@ -390,6 +450,535 @@ async def health_check():
         "faculty": "Khoa CNTT"
     }
 
+@app.get("/api/process")
+async def api_process(input: str, key: str, process_type: str = "encrypt", variant: str = DEFAULT_VARIANT):
+    """Quy trình chi tiết mã hóa/giải mã dạng JSON (tra cứu từ trace store)"""
+    if process_type not in ["encrypt", "decrypt"]:
+        raise HTTPException(status_code=400, detail="process_type phải là encrypt hoặc decrypt")
+    input_bin = convert_input(input, 8)
+    key_bin = convert_input(key, 8)
+    if input_bin is None or key_bin is None:
+        raise HTTPException(status_code=400, detail="Định dạng input hoặc key không hợp lệ")
+    
+    return detailed_process(resolve_variant(variant), process_type, input_bin, key_bin)
+
+# Mã hóa dữ liệu nhị phân theo chế độ (ECB/CBC/CTR/OFB)
+
+# Giới hạn kích thước body cho một request
+MAX_CRYPT_BYTES = 16 << 20
+
+@app.post("/api/crypt")
+async def api_crypt(request: Request, key: str, mode: str = "ctr", iv: str = "0", offset: int = 0,
+                    decrypt: bool = False, variant: str = DEFAULT_VARIANT):
+    """Mã hóa/giải mã body nhị phân; CTR/OFB dùng keystream đã lưu đệm (chỉ một phép XOR)"""
+    if mode not in modes.MODES:
+        raise HTTPException(status_code=400, detail=f"mode phải là một trong {modes.MODES}")
+    key_bin = convert_input(key, 8)
+    iv_bin = convert_input(iv, 8)
+    if key_bin is None or iv_bin is None:
+        raise HTTPException(status_code=400, detail="Định dạng key hoặc iv không hợp lệ")
+    if offset < 0 or (offset and mode not in modes.SEEKABLE_MODES):
+        raise HTTPException(status_code=400, detail="offset chỉ hỗ trợ cho ECB/CTR/OFB và phải >= 0")
+    cipher = resolve_variant(variant)
+    body = await request.body()
+    if len(body) > MAX_CRYPT_BYTES:
+        raise HTTPException(status_code=413, detail=f"Dữ liệu vượt quá {MAX_CRYPT_BYTES} bytes")
+    
+    # Tới 16 MiB: xử lý trong thread để không chặn event loop
+    output = await asyncio.to_thread(crypt_bytes, body, int(key_bin, 2), mode, int(iv_bin, 2), decrypt, cipher, offset)
+    return RawResponse(output, media_type="application/octet-stream")
+
+def crypt_bytes(data: bytes, key: int, mode: str, iv: int, decrypt: bool, cipher, offset: int = 0) -> bytes:
+    """Mã hóa/giải mã bytes; CTR/OFB của biến thể gốc dùng keystream đã lưu đệm"""
+    if mode in KEYSTREAM_MODES and cipher.name == DEFAULT_VARIANT:
+        output = keystream_cache.crypt(data, key, mode, iv, offset)
+    else:
+        output = modes.StreamCipher(key, mode, iv, decrypt, cipher.engine, offset).update(data)
+    metrics.record_bytes(cipher.engine.name, "decrypt" if decrypt else "encrypt", len(data), cipher.name)
+    return output
+
+@app.post("/api/crypt/text")
+async def api_crypt_text(request: TextCryptRequest):
+    """Mã hóa/giải mã dữ liệu dạng văn bản (hex, binary, decimal, base64) có độ dài bất kỳ"""
+    if request.mode not in modes.MODES:
+        raise HTTPException(status_code=400, detail=f"mode phải là một trong {modes.MODES}")
+    if request.output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"output_format phải là một trong {OUTPUT_FORMATS}")
+    key_bin = convert_input(request.key, 8)
+    iv_bin = convert_input(request.iv, 8)
+    if key_bin is None or iv_bin is None:
+        raise HTTPException(status_code=400, detail="Định dạng key hoặc iv không hợp lệ")
+    cipher = resolve_variant(request.variant)
+    # Giải mã chuỗi nhập, mã hóa và định dạng kết quả (tới 16 MiB) trong thread, ngoài event loop
+    try:
+        data = await asyncio.to_thread(parse_bytes, request.data, request.input_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(data) > MAX_CRYPT_BYTES:
+        raise HTTPException(status_code=413, detail=f"Dữ liệu vượt quá {MAX_CRYPT_BYTES} bytes")
+    
+    def crypt_and_format():
+        output = crypt_bytes(data, int(key_bin, 2), request.mode, int(iv_bin, 2), request.decrypt, cipher)
+        return format_bytes(output, request.output_format)
+    
+    return {"bytes": len(data), "mode": request.mode, "format": request.output_format,
+            "output": await asyncio.to_thread(crypt_and_format)}
+
+@app.get("/api/crypt/cache")
+async def api_crypt_cache():
+    """Thống kê cache keystream CTR/OFB"""
+    return keystream_cache.stats()
+
+# Sổ đăng ký khóa
+
+def registered_key(key_id: str):
+    """Khóa đã biên dịch theo key_id, 404 nếu chưa đăng ký hoặc đã bị loại khỏi LRU"""
+    try:
+        return key_registry.get(key_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy khóa: {key_id}")
+
+@app.get("/api/keys")
+async def list_keys():
+    """Danh sách khóa đã đăng ký (không kèm giá trị khóa) và thống kê LRU"""
+    return {"stats": key_registry.stats(), "keys": key_registry.entries()}
+
+@app.post("/api/keys")
+async def register_key(request: KeyRegisterRequest):
+    """Đăng ký một khóa dưới key_id; lịch khóa và bảng hoán vị được tính sẵn"""
+    key_bin = convert_input(request.key, 8)
+    if key_bin is None:
+        raise HTTPException(status_code=400, detail="Định dạng key không hợp lệ")
+    cipher = resolve_variant(request.variant)
+    try:
+        compiled = key_registry.register(int(key_bin, 2), request.key_id, cipher.engine, cipher.name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return compiled.info()
+
+@app.get("/api/keys/{key_id}")
+async def get_key(key_id: str):
+    """Thống kê sử dụng của một khóa đã đăng ký"""
+    return registered_key(key_id).info()
+
+@app.delete("/api/keys/{key_id}")
+async def delete_key(key_id: str):
+    """Hủy đăng ký một khóa"""
+    if not key_registry.unregister(key_id):
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy khóa: {key_id}")
+    return {"deleted": key_id}
+
+@app.post("/api/keys/{key_id}/encrypt")
+async def encrypt_with_key(key_id: str, request: Request, mode: str = "ecb", iv: str = "0", offset: int = 0):
+    """Mã hóa body nhị phân bằng khóa đã đăng ký, không lập lịch khóa lại"""
+    return await crypt_with_key(key_id, request, mode, iv, offset, decrypt=False)
+
+@app.post("/api/keys/{key_id}/decrypt")
+async def decrypt_with_key(key_id: str, request: Request, mode: str = "ecb", iv: str = "0", offset: int = 0):
+    """Giải mã body nhị phân bằng khóa đã đăng ký"""
+    return await crypt_with_key(key_id, request, mode, iv, offset, decrypt=True)
+
+async def crypt_with_key(key_id, request, mode, iv, offset, decrypt):
+    if mode not in modes.MODES:
+        raise HTTPException(status_code=400, detail=f"mode phải là một trong {modes.MODES}")
+    iv_bin = convert_input(iv, 8)
+    if iv_bin is None:
+        raise HTTPException(status_code=400, detail="Định dạng iv không hợp lệ")
+    if offset < 0 or (offset and mode not in modes.SEEKABLE_MODES):
+        raise HTTPException(status_code=400, detail="offset chỉ hỗ trợ cho ECB/CTR/OFB và phải >= 0")
+    compiled = registered_key(key_id)
+    body = await request.body()
+    if len(body) > MAX_CRYPT_BYTES:
+        raise HTTPException(status_code=413, detail=f"Dữ liệu vượt quá {MAX_CRYPT_BYTES} bytes")
+    
+    output = await asyncio.to_thread(compiled.crypt, body, mode, int(iv_bin, 2), decrypt, offset)
+    metrics.record_bytes("key_registry", "decrypt" if decrypt else "encrypt", len(body),
+                         compiled.variant or DEFAULT_VARIANT)
+    return RawResponse(output, media_type="application/octet-stream")
+
+# Biến thể TinyDES
+
+@app.get("/api/variants")
+async def list_variants():
+    """Danh sách biến thể đã biên dịch và các file cấu hình đang lỗi"""
+    return {"directory": variant_registry.directory, "variants": variant_registry.entries(),
+            "errors": variant_registry.errors}
+
+@app.get("/api/variants/{name}")
+async def get_variant(name: str):
+    """S-box, lịch dịch khóa, số vòng và thời gian biên dịch của một biến thể"""
+    return resolve_variant(name).info()
+
+@app.post("/api/variants/reload")
+async def reload_variants():
+    """Nạp lại ngay thư mục cấu hình (không cần chờ lần quét định kỳ)"""
+    return await asyncio.to_thread(variant_registry.reload)
+
+# Job nền
+
+# Thư mục chứa file đầu vào/đầu ra của job (tham số job chỉ nhận tên file trong thư mục này)
+JOB_DATA_DIR = os.environ.get("TINYDES_JOB_DATA_DIR", os.path.join(".cache", "jobs"))
+
+def job_file_path(name: str, must_exist: bool = True) -> str:
+    """Đường dẫn file của job theo tên, không cho phép thoát khỏi JOB_DATA_DIR"""
+    if not isinstance(name, str) or not name or name != os.path.basename(name) or name.startswith("."):
+        raise HTTPException(status_code=400, detail=f"Tên file không hợp lệ: {name}")
+    path = os.path.join(JOB_DATA_DIR, name)
+    if must_exist and not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy file: {name}")
+    return path
+
+def parse_job_byte(value, name: str) -> int:
+    """Giá trị 8-bit của tham số job (binary, 0x-hex, decimal hoặc số nguyên)"""
+    value_bin = convert_input(str(value), 8)
+    if value_bin is None:
+        raise HTTPException(status_code=400, detail=f"Định dạng {name} không hợp lệ: {value}")
+    return int(value_bin, 2)
+
+def parse_job_int(value, name: str, low: int, high: int) -> int:
+    """Tham số job nguyên trong khoảng [low, high], 400 nếu sai định dạng hoặc ngoài khoảng"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"{name} phải là số nguyên: {value}")
+    if not low <= number <= high:
+        raise HTTPException(status_code=400, detail=f"{name} phải nằm trong khoảng {low}..{high}")
+    return number
+
+def job_params(kind: str, params: dict, cipher) -> dict:
+    """Kiểm tra tham số job từ API và chuyển sang dạng hàm job nhận (đường dẫn, số nguyên)"""
+    mode = params.get("mode", "ctr" if kind == "crypt_file" else "ecb")
+    if kind in ("crypt_file", "keysearch") and mode not in modes.MODES:
+        raise HTTPException(status_code=400, detail=f"mode phải là một trong {modes.MODES}")
+    variant_spec = {} if cipher.name == DEFAULT_VARIANT else {"sbox": cipher.spec["sbox"],
+                                                              "shifts": cipher.spec["shifts"]}
+    if kind == "crypt_file":
+        os.makedirs(JOB_DATA_DIR, exist_ok=True)
+        return {"input": job_file_path(params.get("input")),
+                "output": job_file_path(params.get("output"), must_exist=False),
+                "key": parse_job_byte(params.get("key"), "key"), "mode": mode,
+                "iv": parse_job_byte(params.get("iv", 0), "iv"),
+                "decrypt": bool(params.get("decrypt", False))} | variant_spec
+    if kind == "brute_force":
+        try:
+            pairs = [(parse_job_byte(pt, "plaintext"), parse_job_byte(ct, "ciphertext"))
+                     for pt, ct in params.get("pairs", [])]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="pairs phải là danh sách cặp [plaintext, ciphertext]")
+        if not pairs:
+            raise HTTPException(status_code=400, detail="Cần ít nhất một cặp [plaintext, ciphertext]")
+        return {"pairs": pairs} | variant_spec
+    if kind == "keysearch":
+        iv = params.get("iv")
+        return {"input": job_file_path(params.get("input")), "mode": mode,
+                "iv": None if iv is None else parse_job_byte(iv, "iv"),
+                "top": parse_job_int(params.get("top", 5), "top", 1, 256)} | variant_spec
+    if kind == "randomness":
+        if variant_spec:
+            raise HTTPException(status_code=400, detail="Job randomness chỉ hỗ trợ biến thể gốc")
+        length = parse_job_int(params.get("length", 1 << 20), "length", 1, MAX_CRYPT_BYTES)
+        mode_names = params.get("modes", ["ctr", "ofb"])
+        if not mode_names or any(m not in modes.MODES for m in mode_names):
+            raise HTTPException(status_code=400, detail=f"modes phải là các giá trị trong {modes.MODES}")
+        keys = params.get("keys")
+        return {"keys": list(range(256)) if keys is None else [parse_job_byte(k, "key") for k in keys],
+                "modes": list(mode_names), "length": length, "iv": parse_job_byte(params.get("iv", 0), "iv")}
+    if kind == "sbox":
+        return {"sbox": params.get("sbox", cipher.spec["sbox"]), "full": bool(params.get("full", False))}
+    if kind in ("keyspace", "avalanche"):
+        return variant_spec
+    return {}
+
+@app.put("/api/jobs/files/{name}")
+async def upload_job_file(name: str, request: Request):
+    """Tải file đầu vào cho job lên JOB_DATA_DIR (body nhị phân, ghi theo từng đoạn)"""
+    path = job_file_path(name, must_exist=False)
+    os.makedirs(JOB_DATA_DIR, exist_ok=True)
+    size = 0
+    with open(path, "wb") as f:
+        async for chunk in request.stream():
+            f.write(chunk)
+            size += len(chunk)
+    return {"name": name, "bytes": size}
+
+@app.get("/api/jobs/files/{name}")
+async def download_job_file(name: str):
+    """Tải về file (ví dụ đầu ra của job crypt_file)"""
+    path = job_file_path(name)
+    
+    def body():
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                yield chunk
+    
+    return StreamingResponse(body(), media_type="application/octet-stream",
+                             headers={"Content-Length": str(os.path.getsize(path))})
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Tạo job nền: crypt_file, brute_force, keysearch, keyspace, avalanche, sbox, randomness"""
+    if request.kind not in jobs.JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind phải là một trong {list(jobs.JOB_KINDS)}")
+    params = job_params(request.kind, request.params, resolve_variant(request.variant))
+    return await asyncio.to_thread(job_queue.submit, request.kind, params)
+
+@app.get("/api/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 100):
+    """Danh sách job gần nhất (không kèm kết quả) và thống kê hàng đợi"""
+    if status is not None and status not in jobs.STATUSES:
+        raise HTTPException(status_code=400, detail=f"status phải là một trong {jobs.STATUSES}")
+    records = await asyncio.to_thread(job_queue.list, status, min(max(limit, 1), 1000))
+    return {"stats": await asyncio.to_thread(job_queue.stats),
+            "jobs": [{k: v for k, v in job.items() if k != "result"} for job in records]}
+
+def find_job(job_id: str) -> dict:
+    """Bản ghi job theo id, 404 nếu không có"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy job: {job_id}")
+    return job
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Trạng thái, tiến độ và thời gian (chờ/chạy) của một job"""
+    job = await asyncio.to_thread(find_job, job_id)
+    return {k: v for k, v in job.items() if k != "result"}
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Kết quả của job đã kết thúc (409 nếu job còn đang chờ/chạy)"""
+    job = await asyncio.to_thread(find_job, job_id)
+    if job["status"] not in jobs.FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job chưa kết thúc (trạng thái: {job['status']})")
+    return {"id": job["id"], "status": job["status"], "result": job["result"], "error": job["error"],
+            "duration": job["duration"]}
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Hủy job: job đang chờ dừng ngay, job đang chạy dừng ở lần báo tiến độ kế tiếp"""
+    await asyncio.to_thread(find_job, job_id)
+    job = await asyncio.to_thread(job_queue.cancel, job_id)
+    return {k: v for k, v in job.items() if k != "result"}
+
+@app.delete("/api/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Xóa một job đã kết thúc"""
+    job = await asyncio.to_thread(find_job, job_id)
+    if not await asyncio.to_thread(job_queue.delete, job_id):
+        raise HTTPException(status_code=409, detail=f"Job chưa kết thúc (trạng thái: {job['status']})")
+    return {"deleted": job_id}
+
+# Trace Export
+
+# Giới hạn số cặp cho một lần tải về qua HTTP
+MAX_TRACE_EXPORT = 10_000_000
+
+@app.get("/api/trace/export")
+async def export_traces(format: str = "csv", count: int = trace_export.FULL_SPACE,
+                        seed: Optional[int] = None, bit_strings: bool = False, variant: str = DEFAULT_VARIANT):
+    """Tải về trace từng vòng cho nhiều cặp (plaintext, key) dạng CSV hoặc nhị phân (streaming)"""
+    if format not in trace_export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format phải là một trong {trace_export.FORMATS}")
+    if not 0 <= count <= MAX_TRACE_EXPORT:
+        raise HTTPException(status_code=400, detail=f"count phải nằm trong khoảng 0..{MAX_TRACE_EXPORT}")
+    cipher = resolve_variant(variant)
+    
+    chunks = trace_export.iter_trace_chunks(cipher.engine, count, seed)
+    metrics.record_bytes(cipher.engine.name, "trace", count, cipher.name)
+    if format == "csv":
+        body = (piece.encode() for piece in trace_export.iter_csv(chunks, bit_strings, cipher.engine.trace_spec))
+        media_type = "text/csv"
+        filename = "tinydes_traces.csv"
+    else:
+        body = trace_export.iter_binary(chunks, cipher.engine.trace_spec)
+        media_type = "application/octet-stream"
+        filename = "tinydes_traces.tdtrace"
+    
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
+
+# Phân tích không gian khóa
+
+def variant_analysis(cipher, kind: str):
+    """Phân tích 'keyspace' hoặc 'avalanche' của một biến thể (bản gốc dùng cache riêng của module)"""
+    if cipher.name == DEFAULT_VARIANT:
+        return keyspace.cached_analysis() if kind == "keyspace" else avalanche.analyze()
+    if kind not in cipher.analyses:
+        analyze = keyspace.analyze if kind == "keyspace" else avalanche.analyze
+        cipher.analyses[kind] = analyze(cipher.engine)
+    return cipher.analyses[kind]
+
+@app.get("/api/keyspace")
+async def get_keyspace(details: bool = False, variant: str = DEFAULT_VARIANT):
+    """Tóm tắt cấu trúc không gian khóa: lớp tương đương, khóa yếu, điểm bất động, chu trình"""
+    # Lần đầu phân tích cả 256 khóa (hoặc đọc cache trên đĩa): chạy ngoài event loop
+    analysis = await asyncio.to_thread(variant_analysis, resolve_variant(variant), "keyspace")
+    if details:
+        return analysis
+    return {key: value for key, value in analysis.items() if key != "keys"}
+
+@app.get("/api/keyspace/{key}")
+async def get_keyspace_key(key: str, variant: str = DEFAULT_VARIANT):
+    """Chi tiết một khóa: khóa con, lớp tương đương, điểm bất động và chu trình"""
+    key_bin = convert_input(key, 8)
+    if key_bin is None:
+        raise HTTPException(status_code=400, detail="Định dạng key không hợp lệ")
+    analysis = await asyncio.to_thread(variant_analysis, resolve_variant(variant), "keyspace")
+    info = dict(analysis["keys"][int(key_bin, 2)])
+    info["equivalent_keys"] = keyspace.equivalent_keys(info["key"], analysis)
+    return info
+
+# Phân tích avalanche / SAC / BIC
+
+@app.get("/api/analysis/avalanche")
+async def get_avalanche(round: Optional[int] = None, heatmap: bool = False, variant: str = DEFAULT_VARIANT):
+    """Ma trận avalanche, SAC và BIC trên toàn bộ 65.536 cặp (theo vòng hoặc toàn bộ thuật toán)"""
+    cipher = resolve_variant(variant)
+    valid = range(1, cipher.rounds + 1)
+    rounds = tuple(valid) if round is None else (round,)
+    if any(r not in valid for r in rounds):
+        raise HTTPException(status_code=400, detail=f"round phải nằm trong khoảng 1..{cipher.rounds}")
+    # Lần tính đầu tiên mất khoảng 0.4 s: chạy ngoài event loop
+    analysis = await asyncio.to_thread(variant_analysis, cipher, "avalanche")
+    if heatmap:
+        return {"heatmaps": avalanche.heatmaps(rounds, analysis)}
+    return {
+        "input_bits": avalanche.INPUT_LABELS,
+        "output_bits": avalanche.OUTPUT_LABELS,
+        "rounds": {str(r): analysis[r] for r in rounds},
+    }
+
+# Phân tích S-box
+
+@app.get("/api/analysis/sbox")
+async def get_sbox_analysis(full: bool = True, variant: str = DEFAULT_VARIANT):
+    """DDT, LAT, FBCT/BCT, độ phi tuyến và bậc đại số của S-box TinyDES (hoặc của một biến thể)"""
+    result = sbox_analysis.analyze(resolve_variant(variant).spec["sbox"])
+    return result if full else sbox_analysis.summary(result)
+
+@app.post("/api/analysis/sbox")
+async def post_sbox_analysis(request: SBoxRequest):
+    """Phân tích một S-box 4x16 do người dùng cung cấp"""
+    try:
+        result = sbox_analysis.analyze(request.sbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return result if request.full else sbox_analysis.summary(result)
+
+# Container mã hóa truy cập ngẫu nhiên
+
+# Thư mục chứa các file container (.tdc) được phục vụ qua HTTP
+CONTAINER_DIR = os.environ.get("TINYDES_CONTAINER_DIR", os.path.join(".cache", "containers"))
+
+def container_path(name: str) -> str:
+    """Đường dẫn container theo tên, không cho phép thoát khỏi CONTAINER_DIR"""
+    if not name or name != os.path.basename(name) or name.startswith("."):
+        raise HTTPException(status_code=400, detail="Tên container không hợp lệ")
+    path = os.path.join(CONTAINER_DIR, name)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy container: {name}")
+    return path
+
+@app.get("/api/containers")
+async def list_containers():
+    """Danh sách container có thể đọc qua /api/containers/{name}"""
+    if not os.path.isdir(CONTAINER_DIR):
+        return {"containers": []}
+    names = sorted(n for n in os.listdir(CONTAINER_DIR)
+                   if not n.startswith(".") and os.path.isfile(os.path.join(CONTAINER_DIR, n)))
+    return {"containers": names}
+
+@app.get("/api/containers/{name}")
+async def read_container(name: str, x_tinydes_key: str = Header(...), range_header: Optional[str] = Header(None, alias="Range"),
+                         variant: str = DEFAULT_VARIANT):
+    """Giải mã và stream container, hỗ trợ header Range (khóa gửi qua header X-TinyDES-Key)"""
+    key_bin = convert_input(x_tinydes_key, 8)
+    if key_bin is None:
+        raise HTTPException(status_code=400, detail="Định dạng key không hợp lệ")
+    cipher = resolve_variant(variant)
+    path = container_path(name)
+    try:
+        reader = container.ContainerReader.open(path, int(key_bin, 2), cipher.engine)
+    except container.KeyMismatch as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    headers = {"Accept-Ranges": "bytes", "X-TinyDES-Mode": reader.mode}
+    try:
+        byte_range = container.parse_range(range_header, reader.size)
+    except ValueError:
+        reader.close()
+        raise HTTPException(status_code=416, detail="Range không hợp lệ",
+                            headers={"Content-Range": f"bytes */{reader.size}"})
+    if byte_range is None:
+        start, end, status_code = 0, reader.size, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{reader.size}"
+    headers["Content-Length"] = str(end - start)
+    metrics.record_bytes(cipher.engine.name, "decrypt", end - start, cipher.name)
+    
+    def body():
+        try:
+            yield from reader.iter_range(start, end)
+        finally:
+            reader.close()
+    
+    return StreamingResponse(body(), status_code=status_code, media_type="application/octet-stream",
+                             headers=headers)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Metrics định dạng Prometheus: số request, độ trễ theo route, cache, event loop, số byte theo engine"""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+# Debug: profiling các hàm thành phần
+# Chỉ đăng ký khi TINYDES_DEBUG=1: bật/tắt/xóa profiler ảnh hưởng tới server đang chạy
+DEBUG_ROUTES = os.environ.get("TINYDES_DEBUG") == "1"
+debug_router = APIRouter(prefix="/debug")
+
+@debug_router.get("/profile")
+async def get_profile():
+    """Trạng thái profiler và thống kê theo từng hàm"""
+    return {
+        "enabled": profiler.enabled,
+        "engines": [type(engine).__name__ for engine in profiler.engines],
+        "functions": profiler.report()
+    }
+
+@debug_router.get("/profile/folded", response_class=PlainTextResponse)
+async def get_profile_folded():
+    """Folded stacks cho flame graph (flamegraph.pl, speedscope)"""
+    return profiler.folded()
+
+@debug_router.post("/profile/enable")
+async def enable_profile(engines: str = "string,table"):
+    """Bật profiling cho engine chuỗi (string) và/hoặc engine bảng tra (table)"""
+    available = {"string": tinydes, "table": fast_tinydes}
+    selected = [name.strip() for name in engines.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Engine không hợp lệ: {', '.join(unknown)}")
+    profiler.enable(*(available[name] for name in selected))
+    return {"enabled": profiler.enabled, "engines": [type(engine).__name__ for engine in profiler.engines]}
+
+@debug_router.post("/profile/disable")
+async def disable_profile():
+    """Tắt profiling, khôi phục phương thức gốc (giữ nguyên số liệu đã thu)"""
+    profiler.disable()
+    return {"enabled": profiler.enabled}
+
+@debug_router.post("/profile/reset")
+async def reset_profile():
+    """Xóa số liệu profiling đã thu"""
+    profiler.reset()
+    return {"enabled": profiler.enabled}
+
+if DEBUG_ROUTES:
+    app.include_router(debug_router)
+
 # Test Functions Routes
 
 @app.post("/test/expand", response_class=HTMLResponse)
@@ -399,7 +988,7 @@ async def test_expand(request: Request, input: str = Form(...)):
         # Validate input
         if not all(c in '01' for c in input) or len(input) != 4:
             error = "Input phải là chuỗi binary 4-bit"
-            return templates.TemplateResponse("index.html", {
+            return render_page("fragments/test_result.html", {
                 "request": request, 
                 "error": error,
                 "active_tab": "test"
@@ -414,7 +1003,7 @@ async def test_expand(request: Request, input: str = Form(...)):
             "output": result
         }
         
-        return templates.TemplateResponse("index.html", {
+        return render_page("fragments/test_result.html", {
             "request": request,
             "test_result": test_result,
             "active_tab": "test"
@@ -422,27 +1011,27 @@ async def test_expand(request: Request, input: str = Form(...)):
         
     except Exception as e:
         error = f"Lỗi test expand: {str(e)}"
-        return templates.TemplateResponse("index.html", {
+        return render_page("fragments/test_result.html", {
             "request": request, 
             "error": error,
             "active_tab": "test"
         })
 
 @app.post("/test/sbox", response_class=HTMLResponse)
-async def test_sbox(request: Request, input: str = Form(...)):
+async def test_sbox(request: Request, input: str = Form(...), variant: str = Form(DEFAULT_VARIANT)):
     """Test S-box lookup function"""
     try:
         # Validate input
         if not all(c in '01' for c in input) or len(input) != 6:
             error = "Input phải là chuỗi binary 6-bit"
-            return templates.TemplateResponse("index.html", {
+            return render_page("fragments/test_result.html", {
                 "request": request, 
                 "error": error,
                 "active_tab": "test"
             })
         
-        # Test S-box function
-        result = tinydes.sbox_lookup(input)
+        # Test S-box function (S-box của biến thể được chọn)
+        result = resolve_variant(variant).reference.sbox_lookup(input)
         
         # Calculate row and column for display
         b0, b1, b2, b3, b4, b5 = input[0], input[1], input[2], input[3], input[4], input[5]
@@ -451,25 +1040,29 @@ async def test_sbox(request: Request, input: str = Form(...)):
         
         test_result = {
             "function": "sbox",
+            "variant": variant,
             "input": input,
             "output": result,
             "row": row,
             "column": col
         }
         
-        return templates.TemplateResponse("index.html", {
+        return render_page("fragments/test_result.html", {
             "request": request,
             "test_result": test_result,
             "active_tab": "test"
         })
         
+    except HTTPException as e:
+        # Biến thể không tồn tại: hiện thông báo, không kèm mã lỗi HTTP
+        error = e.detail
     except Exception as e:
         error = f"Lỗi test S-box: {str(e)}"
-        return templates.TemplateResponse("index.html", {
-            "request": request, 
-            "error": error,
-            "active_tab": "test"
-        })
+    return render_page("fragments/test_result.html", {
+        "request": request, 
+        "error": error,
+        "active_tab": "test"
+    })
 
 @app.post("/test/pbox", response_class=HTMLResponse)
 async def test_pbox(request: Request, input: str = Form(...)):
@@ -478,7 +1071,7 @@ async def test_pbox(request: Request, input: str = Form(...)):
         # Validate input
         if not all(c in '01' for c in input) or len(input) != 4:
             error = "Input phải là chuỗi binary 4-bit"
-            return templates.TemplateResponse("index.html", {
+            return render_page("fragments/test_result.html", {
                 "request": request, 
                 "error": error,
                 "active_tab": "test"
@@ -493,7 +1086,7 @@ async def test_pbox(request: Request, input: str = Form(...)):
             "output": result
         }
         
-        return templates.TemplateResponse("index.html", {
+        return render_page("fragments/test_result.html", {
             "request": request,
             "test_result": test_result,
             "active_tab": "test"
@@ -501,7 +1094,7 @@ async def test_pbox(request: Request, input: str = Form(...)):
         
     except Exception as e:
         error = f"Lỗi test P-box: {str(e)}"
-        return templates.TemplateResponse("index.html", {
+        return render_page("fragments/test_result.html", {
             "request": request, 
             "error": error,
             "active_tab": "test"
@@ -514,7 +1107,7 @@ async def test_compress(request: Request, kl: str = Form(...), kr: str = Form(..
         # Validate inputs
         if not all(c in '01' for c in kl) or len(kl) != 4:
             error = "KL0 phải là chuỗi binary 4-bit"
-            return templates.TemplateResponse("index.html", {
+            return render_page("fragments/test_result.html", {
                 "request": request, 
                 "error": error,
                 "active_tab": "test"
@@ -522,7 +1115,7 @@ async def test_compress(request: Request, kl: str = Form(...), kr: str = Form(..
         
         if not all(c in '01' for c in kr) or len(kr) != 4:
             error = "KR0 phải là chuỗi binary 4-bit"
-            return templates.TemplateResponse("index.html", {
+            return render_page("fragments/test_result.html", {
                 "request": request, 
                 "error": error,
                 "active_tab": "test"
@@ -538,7 +1131,7 @@ async def test_compress(request: Request, kl: str = Form(...), kr: str = Form(..
             "output": result
         }
         
-        return templates.TemplateResponse("index.html", {
+        return render_page("fragments/test_result.html", {
             "request": request,
             "test_result": test_result,
             "active_tab": "test"
@@ -546,20 +1139,21 @@ async def test_compress(request: Request, kl: str = Form(...), kr: str = Form(..
         
     except Exception as e:
         error = f"Lỗi test compress: {str(e)}"
-        return templates.TemplateResponse("index.html", {
+        return render_page("fragments/test_result.html", {
             "request": request, 
             "error": error,
             "active_tab": "test"
         })
 
 @app.post("/test/encrypt", response_class=HTMLResponse)
-async def test_encrypt(request: Request, plaintext: str = Form(...), key: str = Form(...)):
+async def test_encrypt(request: Request, plaintext: str = Form(...), key: str = Form(...),
+                       variant: str = Form(DEFAULT_VARIANT)):
     """Test full encryption function"""
     try:
         # Validate inputs
         if not all(c in '01' for c in plaintext) or len(plaintext) != 8:
             error = "Plaintext phải là chuỗi binary 8-bit"
-            return templates.TemplateResponse("index.html", {
+            return render_page("fragments/test_result.html", {
                 "request": request, 
                 "error": error,
                 "active_tab": "test"
@@ -567,46 +1161,45 @@ async def test_encrypt(request: Request, plaintext: str = Form(...), key: str =
         
         if not all(c in '01' for c in key) or len(key) != 8:
             error = "Key phải là chuỗi binary 8-bit"
-            return templates.TemplateResponse("index.html", {
+            return render_page("fragments/test_result.html", {
                 "request": request, 
                 "error": error,
                 "active_tab": "test"
             })
         
         # Test encryption
-        result = tinydes.encrypt(plaintext, key)
+        cipher = resolve_variant(variant)
+        result = cipher.reference.encrypt(plaintext, key)
+        metrics.record_bytes("string", "encrypt", 1, cipher.name)
         
-        # Get subkeys for display
-        kl0 = key[:4]
-        kr0 = key[4:]
-        subkeys = []
-        for i in range(3):
-            subkey = tinydes.compress_key(kl0, kr0)
-            subkeys.append(subkey)
-            # Rotate for next round
-            kl0, kr0 = kr0, kl0
+        # Get subkeys for display (lịch khóa của biến thể)
+        subkeys = cipher.reference.generate_subkeys(key)
         
         test_result = {
             "function": "encrypt",
+            "variant": variant,
             "plaintext": plaintext,
             "key": key,
             "output": result,
             "subkeys": " → ".join(subkeys)
         }
         
-        return templates.TemplateResponse("index.html", {
+        return render_page("fragments/test_result.html", {
             "request": request,
             "test_result": test_result,
             "active_tab": "test"
         })
         
+    except HTTPException as e:
+        # Biến thể không tồn tại: hiện thông báo, không kèm mã lỗi HTTP
+        error = e.detail
     except Exception as e:
         error = f"Lỗi test encryption: {str(e)}"
-        return templates.TemplateResponse("index.html", {
-            "request": request, 
-            "error": error,
-            "active_tab": "test"
-        })
+    return render_page("fragments/test_result.html", {
+        "request": request, 
+        "error": error,
+        "active_tab": "test"
+    })
 
 if __name__ == "__main__":
     uvicorn.run(
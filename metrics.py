@@ -0,0 +1,237 @@
+"""
+Hệ thống metrics cho HỆ THỐNG MÃ HÓA TINYDES (định dạng Prometheus text exposition)
+
+- Counter / Gauge / Histogram tối giản, không cần thư viện ngoài
+- MetricsMiddleware: ASGI middleware đo số request, độ trễ theo route và
+  số request đang xử lý
+- Đo độ trễ event loop bằng một task nền
+- Tỉ lệ cache hit được đọc từ các hàm thống kê đăng ký qua register_cache()
+
+Ứng dụng chạy trên một event loop nên các phép cập nhật chỉ là cộng số
+nguyên trong dict, không cần khóa.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+
+from variants import DEFAULT_VARIANT
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Các mốc (giây) cho histogram độ trễ request
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, *labels):
+        """Increase the counter for one label combination"""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        """Set the gauge for one label combination"""
+        self.values[labels] = value
+
+    def dec(self, amount=1, *labels):
+        """Decrease the gauge for one label combination"""
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+
+    def observe(self, value, *labels):
+        """Record one observation"""
+        state = self.values.get(labels)
+        if state is None:
+            # [số đếm từng bucket (+Inf ở cuối), tổng, số lần]
+            state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self):
+        for labels, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labelnames, labels, [("le", _format_value(float(bound)))]),
+                       cumulative)
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), count
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self.metrics = []
+        self.caches = {}
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def register_cache(self, name, stats):
+        """
+        Register a cache whose stats() returns (hits, misses)
+        Read only at scrape time, so it costs nothing on the hot path
+        """
+        self.caches[name] = stats
+
+    def render(self):
+        """Render every metric in Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        if self.caches:
+            stats = {name: fn() for name, fn in self.caches.items()}
+            for suffix, kind, help, pick in (
+                    ("hits_total", "counter", "Số lần cache hit", lambda h, m: h),
+                    ("misses_total", "counter", "Số lần cache miss", lambda h, m: m),
+                    ("hit_ratio", "gauge", "Tỉ lệ cache hit", lambda h, m: h / (h + m) if h + m else 0.0)):
+                name = f"tinydes_cache_{suffix}"
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for cache, (hits, misses) in stats.items():
+                    lines.append(f'{name}{{cache="{cache}"}} {_format_value(pick(hits, misses))}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "tinydes_http_requests_total", "Tổng số HTTP request", ("method", "route", "status"))
+http_latency = registry.histogram(
+    "tinydes_http_request_duration_seconds", "Độ trễ HTTP request theo route", ("method", "route"))
+http_in_flight = registry.gauge(
+    "tinydes_http_requests_in_flight", "Số HTTP request đang được xử lý")
+bytes_processed = registry.counter(
+    "tinydes_bytes_processed_total", "Số byte đã mã hóa/giải mã theo engine và biến thể",
+    ("engine", "operation", "variant"))
+event_loop_lag = registry.gauge(
+    "tinydes_event_loop_lag_seconds", "Độ trễ event loop đo được gần nhất")
+event_loop_lag_max = registry.gauge(
+    "tinydes_event_loop_lag_max_seconds", "Độ trễ event loop lớn nhất từ khi khởi động")
+process_start = registry.gauge(
+    "tinydes_process_start_time_seconds", "Thời điểm khởi động tiến trình (unix time)")
+process_start.set(time.time())
+
+
+def record_bytes(engine, operation, count, variant=DEFAULT_VARIANT):
+    """Count bytes processed by an engine ('string', 'table', ...) for a cipher variant"""
+    bytes_processed.inc(count, engine, operation, variant)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware measuring every HTTP request
+    The route label is the matched route template (e.g. /test/sbox), so
+    path parameters do not explode the label set
+    """
+
+    def __init__(self, app, mounts=("/static",)):
+        self.app = app
+        # Các mount (StaticFiles...) không gắn route vào scope
+        self.mounts = tuple(mounts)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            route = scope.get("route")
+            if route is not None:
+                route = route.path
+            else:
+                route = next((m for m in self.mounts if scope["path"].startswith(m + "/")), "other")
+            method = scope["method"]
+            http_requests.inc(1, method, route, str(status[0]))
+            http_latency.observe(elapsed, method, route)
+
+
+async def monitor_event_loop(interval=0.5):
+    """Background task measuring how late the event loop wakes up"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - start - interval)
+        event_loop_lag.set(lag)
+        if lag > event_loop_lag_max.values.get((), 0.0):
+            event_loop_lag_max.set(lag)
@@ -0,0 +1,71 @@
+"""
+Mã hóa / giải mã file cục bộ qua bộ nhớ ánh xạ (mmap)
+
+File được ánh xạ theo từng cửa sổ lớn (mặc định 4 MiB): mỗi cửa sổ được
+biến đổi bằng bảng hoán vị 256 byte của khóa (ECB/CBC) hoặc XOR với
+keystream (CTR/OFB) rồi ghi thẳng vào vùng ánh xạ của file đích. Chỉ một
+cửa sổ được ánh xạ tại một thời điểm nên RSS không phụ thuộc kích thước
+file.
+
+Chế độ tại chỗ (in-place) ghi đè chính file nguồn, không cần bản sao thứ
+hai trên đĩa. Với CBC, byte ciphertext cuối của mỗi cửa sổ được giữ trong
+StreamCipher trước khi bị ghi đè nên giải mã tại chỗ vẫn đúng.
+"""
+
+import mmap
+import os
+
+import modes
+
+DEFAULT_SLICE_SIZE = modes.DEFAULT_BUFFER_SIZE
+
+
+def _aligned(size):
+    """Round size up to a multiple of the mmap allocation granularity"""
+    granularity = mmap.ALLOCATIONGRANULARITY
+    return max(granularity, (size + granularity - 1) // granularity * granularity)
+
+
+def _same_file(a, b):
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def crypt_file(path, key, mode="ecb", iv=0, decrypt=False, output=None,
+               slice_size=DEFAULT_SLICE_SIZE, engine=None):
+    """
+    Encrypt/decrypt path window by window through mmap
+    output=None (or the same file) rewrites path in place
+    Returns: number of bytes processed
+    """
+    cipher = modes.StreamCipher(key, mode, iv, decrypt, engine)
+    slice_size = _aligned(slice_size)
+    in_place = output is None or _same_file(path, output)
+
+    source = open(path, "r+b" if in_place else "rb")
+    try:
+        size = os.fstat(source.fileno()).st_size
+        if in_place:
+            sink = source
+        else:
+            sink = open(output, "w+b")
+            sink.truncate(size)
+        try:
+            for offset in range(0, size, slice_size):
+                length = min(slice_size, size - offset)
+                with mmap.mmap(sink.fileno(), length, offset=offset) as target:
+                    if in_place:
+                        target[:] = cipher.update(target[:])
+                    else:
+                        with mmap.mmap(source.fileno(), length, offset=offset,
+                                       access=mmap.ACCESS_READ) as window:
+                            target[:] = cipher.update(window[:])
+                    target.flush()
+        finally:
+            if sink is not source:
+                sink.close()
+    finally:
+        source.close()
+    return size
@@ -0,0 +1,202 @@
+"""
+Các chế độ mã hóa khối (ECB, CBC, CTR, OFB) trên engine bảng tra TinyDES
+
+Khối của TinyDES chỉ có 8 bit nên mỗi byte là một khối:
+    ECB: c_i = E(p_i)                      -> một lần bytes.translate
+    CBC: c_i = E(p_i XOR c_{i-1}), c_-1 = IV -> mã hóa tuần tự, giải mã vector hóa
+    CTR: c_i = p_i XOR E((IV + i) mod 256) -> keystream chu kỳ 256
+    OFB: s_i = E(s_{i-1}), s_-1 = IV, c_i = p_i XOR s_i -> keystream theo chu trình
+
+StreamCipher giữ trạng thái giữa các lần update() để xử lý dữ liệu lớn
+theo từng đoạn mà vẫn cho cùng kết quả như xử lý một lần.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tinydes_fast import FastTinyDES, xor_bytes
+
+MODES = ("ecb", "cbc", "ctr", "ofb")
+DEFAULT_BUFFER_SIZE = 4 << 20
+# Các chế độ có thể chia đoạn để xử lý song song (theo vị trí byte)
+SEEKABLE_MODES = ("ecb", "ctr", "ofb")
+
+_default_engine = None
+
+
+def default_engine():
+    """Shared FastTinyDES instance for module-level helpers"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = FastTinyDES()
+    return _default_engine
+
+
+def ctr_period(engine, key, iv):
+    """256-byte CTR keystream period starting at counter iv"""
+    table = engine.encrypt_table(key)
+    return table[iv:] + table[:iv]
+
+
+def ofb_period(engine, key, iv):
+    """OFB keystream: the permutation cycle starting after iv"""
+    table = engine.encrypt_table(key)
+    stream = bytearray()
+    state = table[iv]
+    stream.append(state)
+    while state != iv:
+        state = table[state]
+        stream.append(state)
+    return bytes(stream)
+
+
+def keystream_slice(period, offset, length):
+    """length bytes of a periodic keystream starting at offset"""
+    if length <= 0:
+        return b""
+    start = offset % len(period)
+    repeats = (start + length) // len(period) + 1
+    return (period * repeats)[start:start + length]
+
+
+def block_calls(data, output, mode="ecb", iv=0, decrypt=False, limit=None):
+    """
+    Block-cipher call behind each byte of a processed message (input data, result output)
+    Returns: list of (cipher_input, cipher_output, inverse) for the first limit bytes;
+    inverse is True for a decryption call (ECB/CBC decrypt), CTR/OFB always encrypt
+    """
+    if mode not in MODES:
+        raise ValueError(f"Chế độ không hỗ trợ: {mode}")
+    count = len(data) if limit is None else min(limit, len(data))
+    calls = []
+    for i in range(count):
+        if mode == "ecb":
+            calls.append((data[i], output[i], decrypt))
+        elif mode == "cbc":
+            previous = iv if i == 0 else (data[i - 1] if decrypt else output[i - 1])
+            if decrypt:
+                calls.append((data[i], output[i] ^ previous, True))
+            else:
+                calls.append((data[i] ^ previous, output[i], False))
+        elif mode == "ctr":
+            calls.append(((iv + i) & 0xFF, data[i] ^ output[i], False))
+        else:
+            # OFB: trạng thái trước đó chính là byte keystream trước đó
+            state = iv if i == 0 else data[i - 1] ^ output[i - 1]
+            calls.append((state, data[i] ^ output[i], False))
+    return calls
+
+
+class StreamCipher:
+    """
+    Incremental encryptor/decryptor for one (key, mode, iv)
+    update() may be called with chunks of any size
+    """
+
+    def __init__(self, key, mode="ecb", iv=0, decrypt=False, engine=None, offset=0):
+        if mode not in MODES:
+            raise ValueError(f"Chế độ không hỗ trợ: {mode}")
+        self.engine = engine if engine is not None else default_engine()
+        self.key = key
+        self.mode = mode
+        self.iv = iv
+        self.decrypt = decrypt
+        self.position = offset
+        if offset and mode not in SEEKABLE_MODES:
+            raise ValueError("Chế độ CBC không hỗ trợ bắt đầu giữa luồng")
+        # Khối trước đó cho CBC
+        self.previous = iv
+        if mode in ("ecb", "cbc"):
+            self.table = self.engine.decrypt_table(key) if decrypt else self.engine.encrypt_table(key)
+        elif mode == "ctr":
+            self.period = ctr_period(self.engine, key, iv)
+        else:
+            self.period = ofb_period(self.engine, key, iv)
+
+    def update(self, data):
+        """Process the next chunk and return its output"""
+        data = bytes(data)
+        n = len(data)
+        if n == 0:
+            return b""
+        mode = self.mode
+        if mode == "ecb":
+            out = data.translate(self.table)
+        elif mode in ("ctr", "ofb"):
+            out = xor_bytes(data, keystream_slice(self.period, self.position, n))
+        elif self.decrypt:
+            # p_i = D(c_i) XOR c_{i-1}: hoàn toàn vector hóa
+            shifted = bytes([self.previous]) + data[:-1]
+            out = xor_bytes(data.translate(self.table), shifted)
+            self.previous = data[-1]
+        else:
+            table = self.table
+            out = bytearray(n)
+            previous = self.previous
+            for i, p in enumerate(data):
+                previous = table[p ^ previous]
+                out[i] = previous
+            self.previous = previous
+            out = bytes(out)
+        self.position += n
+        return out
+
+
+def encrypt(data, key, mode="ecb", iv=0, engine=None):
+    """One-shot encryption of a byte string"""
+    return StreamCipher(key, mode, iv, False, engine).update(data)
+
+
+def decrypt(data, key, mode="ecb", iv=0, engine=None):
+    """One-shot decryption of a byte string"""
+    return StreamCipher(key, mode, iv, True, engine).update(data)
+
+
+def process_chunk(key, mode, iv, decrypt, offset, previous, data):
+    """
+    Process one independent chunk (used by worker processes)
+    previous is the ciphertext byte before the chunk (CBC decryption)
+    """
+    if mode == "cbc":
+        if not decrypt:
+            raise ValueError("Mã hóa CBC không thể chia đoạn song song")
+        cipher = StreamCipher(key, mode, iv, True)
+        cipher.previous = previous
+        return cipher.update(data)
+    return StreamCipher(key, mode, iv, decrypt, offset=offset).update(data)
+
+
+def crypt_stream(source, sink, key, mode="ecb", iv=0, decrypt=False, workers=1,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Stream source (binary file object) into sink with large buffered reads
+    With workers > 1, chunks are processed in a process pool (order kept);
+    CBC encryption is inherently sequential and always runs inline
+    Returns: number of bytes processed
+    """
+    total = 0
+    if workers <= 1 or (mode == "cbc" and not decrypt):
+        cipher = StreamCipher(key, mode, iv, decrypt)
+        while True:
+            chunk = source.read(buffer_size)
+            if not chunk:
+                break
+            sink.write(cipher.update(chunk))
+            total += len(chunk)
+        return total
+
+    pending = deque()
+    previous = iv
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            chunk = source.read(buffer_size)
+            if chunk:
+                pending.append(pool.submit(process_chunk, key, mode, iv, decrypt, total, previous, chunk))
+                previous = chunk[-1]
+                total += len(chunk)
+            # Giới hạn số đoạn đang chờ để bộ nhớ không tăng theo kích thước file
+            while pending and (not chunk or len(pending) >= 2 * workers):
+                sink.write(pending.popleft().result())
+            if not chunk:
+                break
+    return total
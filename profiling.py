@@ -0,0 +1,134 @@
+"""
+Profiling tùy chọn cho các hàm thành phần của TinyDES
+
+Khi bật, các phương thức của engine được thay bằng bản bọc (gán vào
+thuộc tính của instance, che phương thức của lớp) để đếm số lần gọi và
+cộng dồn thời gian. Khi tắt, các thuộc tính này bị xóa và engine quay lại
+đúng phương thức gốc, nên không tốn thêm chi phí nào (không có lệnh if).
+
+Kết quả xuất ra được ở dạng bảng thống kê hoặc dạng "folded stacks"
+(mỗi dòng "a;b;c <micro giây>") dùng trực tiếp với flamegraph.pl / speedscope.
+"""
+
+import threading
+import time
+from functools import wraps
+
+# Các phương thức được đo cho từng loại engine (theo tên lớp)
+INSTRUMENTED_METHODS = {
+    "TinyDES": (
+        "encrypt", "decrypt", "encrypt_detailed", "decrypt_detailed",
+        "generate_subkeys", "compress_key", "left_circular_shift",
+        "feistel_round", "feistel_function", "feistel_function_detailed",
+        "expand", "sbox_lookup", "pbox_permute",
+    ),
+    "FastTinyDES": (
+        "encrypt_block", "decrypt_block", "encrypt_table", "decrypt_table",
+        "encrypt_bytes", "decrypt_bytes", "trace_columns",
+    ),
+}
+
+
+class Profiler:
+    """Call counts, total/self time and folded stacks per instrumented method"""
+
+    def __init__(self):
+        self.engines = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self):
+        return bool(self.engines)
+
+    def reset(self):
+        """Clear every collected sample"""
+        with self._lock:
+            self.calls = {}
+            self.total_ns = {}
+            self.self_ns = {}
+            self.stacks = {}
+
+    def _state(self):
+        state = self._local
+        if not hasattr(state, "stack"):
+            state.stack = []
+            state.child_ns = []
+        return state
+
+    def _wrap(self, engine_name, method_name, method):
+        label = f"{engine_name}.{method_name}"
+        perf_counter_ns = time.perf_counter_ns
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            state = self._state()
+            state.stack.append(label)
+            state.child_ns.append(0)
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                children = state.child_ns.pop()
+                stack_key = ";".join(state.stack)
+                state.stack.pop()
+                if state.child_ns:
+                    state.child_ns[-1] += elapsed
+                with self._lock:
+                    self.calls[label] = self.calls.get(label, 0) + 1
+                    self.total_ns[label] = self.total_ns.get(label, 0) + elapsed
+                    self.self_ns[label] = self.self_ns.get(label, 0) + elapsed - children
+                    self.stacks[stack_key] = self.stacks.get(stack_key, 0) + elapsed - children
+
+        return wrapper
+
+    def enable(self, *engines):
+        """Swap instrumented methods into the given engine instances"""
+        for engine in engines:
+            if any(engine is e for e in self.engines):
+                continue
+            engine_name = type(engine).__name__
+            for method_name in INSTRUMENTED_METHODS.get(engine_name, ()):
+                method = getattr(engine, method_name, None)
+                if method is not None:
+                    setattr(engine, method_name, self._wrap(engine_name, method_name, method))
+            self.engines.append(engine)
+
+    def disable(self):
+        """Remove every wrapper, restoring the original class methods"""
+        for engine in self.engines:
+            for method_name in INSTRUMENTED_METHODS.get(type(engine).__name__, ()):
+                engine.__dict__.pop(method_name, None)
+        self.engines = []
+
+    def report(self):
+        """Per-method statistics sorted by self time"""
+        with self._lock:
+            rows = [{
+                "function": label,
+                "calls": self.calls[label],
+                "total_ms": self.total_ns[label] / 1e6,
+                "self_ms": self.self_ns[label] / 1e6,
+                "avg_us": self.total_ns[label] / self.calls[label] / 1e3,
+            } for label in self.calls]
+        return sorted(rows, key=lambda row: row["self_ms"], reverse=True)
+
+    def folded(self):
+        """Folded stacks ('a;b;c <microseconds>'), flame-graph compatible"""
+        with self._lock:
+            items = sorted(self.stacks.items())
+        return "".join(f"{stack} {max(ns // 1000, 1)}\n" for stack, ns in items)
+
+    def format_report(self):
+        """Plain text table of report()"""
+        lines = [f"{'Hàm':<40} {'Số lần gọi':>12} {'Tổng (ms)':>12} {'Riêng (ms)':>12} {'TB (µs)':>10}"]
+        for row in self.report():
+            lines.append(f"{row['function']:<40} {row['calls']:>12} {row['total_ms']:>12.3f} "
+                         f"{row['self_ms']:>12.3f} {row['avg_us']:>10.3f}")
+        return "\n".join(lines)
+
+
+# Profiler dùng chung cho toàn bộ tiến trình
+profiler = Profiler()
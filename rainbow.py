@@ -0,0 +1,242 @@
+"""
+Đánh đổi thời gian - bộ nhớ (Hellman / rainbow table) cho TinyDES ghép tầng
+
+Bản thân TinyDES chỉ có 256 khóa nên vét cạn là đủ; rainbow table dành cho
+biến thể ghép tầng (cascade) n lớp TinyDES với n khóa 8-bit độc lập, tức
+không gian khóa 256^n. Kịch bản chọn bản rõ (chosen-plaintext): kẻ tấn
+công biết ciphertext C = E_K(P) của một bản rõ n byte cố định P (ECB).
+
+Hàm một chiều f(K) = E_K(P) biến khóa n byte thành ciphertext n byte; hàm
+rút gọn R_i (khác nhau theo vị trí i trong chuỗi và theo bảng) đưa
+ciphertext về lại không gian khóa. Mỗi chuỗi lưu (điểm cuối, điểm đầu).
+
+Bảng hoán vị của từng khóa được lấy từ codebook tham chiếu, vốn được tính
+bằng chính TinyDES.encrypt (xem conformance.py), nên chuỗi dùng đúng
+thuật toán gốc nhưng mỗi bước chỉ là n lần bytes.translate.
+
+Định dạng file (little-endian):
+    magic b'TDRB', version u8, stages u8, len(P) u8, P,
+    chain_length u32, table_count u16,
+    mỗi bảng: chain_count u32 rồi các cặp (end, start) n byte, sắp theo end
+"""
+
+import math
+import random
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+import conformance
+
+MAGIC = b"TDRB"
+VERSION = 1
+DEFAULT_CHAIN_LENGTH = 256
+DEFAULT_TABLES = 4
+# Hằng số trộn để các bảng dùng họ hàm rút gọn khác nhau
+TABLE_SALT = 0x9E3779B97F4A7C15
+
+
+class Cascade:
+    """n-stage TinyDES cascade with n independent 8-bit keys (big-endian key int)"""
+
+    def __init__(self, stages, plaintext=None):
+        if not 1 <= stages <= 8:
+            raise ValueError("Số tầng phải trong khoảng 1..8")
+        self.stages = stages
+        self.plaintext = bytes(plaintext) if plaintext is not None else bytes(range(0x5C, 0x5C + stages))
+        if len(self.plaintext) != stages:
+            raise ValueError(f"Bản rõ chọn trước phải dài đúng {stages} byte")
+        self.space = 256 ** stages
+        encrypt_cb, _ = conformance.reference_codebook()
+        self.tables = [encrypt_cb[k * 256:k * 256 + 256] for k in range(256)]
+
+    def f(self, key):
+        """One-way step: cascade ciphertext of the chosen plaintext, as int"""
+        data = self.plaintext
+        tables = self.tables
+        for k in key.to_bytes(self.stages, "big"):
+            data = data.translate(tables[k])
+        return int.from_bytes(data, "big")
+
+    def reduce(self, value, position, table):
+        """Reduction R_{table, position} back into the key space"""
+        return ((value ^ (TABLE_SALT * (table + 1))) + position) % self.space
+
+
+def chain_end(cascade, start, chain_length, table):
+    """Walk one chain and return its end point"""
+    key = start
+    f, reduce = cascade.f, cascade.reduce
+    for position in range(chain_length):
+        key = reduce(f(key), position, table)
+    return key
+
+
+def _generate(job):
+    stages, plaintext, chain_length, table, starts = job
+    cascade = Cascade(stages, plaintext)
+    return [(chain_end(cascade, start, chain_length, table), start) for start in starts]
+
+
+def coverage(chains, chain_length, space, tables=1):
+    """
+    Expected success probability of rainbow tables (Oechslin's estimate):
+    m_1 = chains, m_{i+1} = N (1 - e^{-m_i / N}), P = 1 - prod(1 - m_i / N)
+    """
+    miss = 1.0
+    m = float(chains)
+    for _ in range(chain_length):
+        miss *= 1 - m / space
+        m = space * (1 - math.exp(-m / space))
+    return 1 - miss ** tables
+
+
+class RainbowTable:
+    """A set of rainbow tables for one cascade, with lookup"""
+
+    def __init__(self, cascade, chain_length, tables):
+        self.cascade = cascade
+        self.chain_length = chain_length
+        # Mỗi bảng: (ends, starts) dạng array đã sắp theo ends
+        self.tables = tables
+        self.chain_count = sum(len(ends) for ends, _ in tables)
+
+    @classmethod
+    def build(cls, stages, chains, chain_length=DEFAULT_CHAIN_LENGTH, table_count=DEFAULT_TABLES,
+              plaintext=None, workers=None, seed=None):
+        """Generate table_count tables of chains chains each, in a process pool"""
+        cascade = Cascade(stages, plaintext)
+        rng = random.Random(seed)
+        batch = max(1, chains // (4 * (workers or 4)))
+        tables = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for table in range(table_count):
+                starts = [rng.randrange(cascade.space) for _ in range(chains)]
+                jobs = [(stages, cascade.plaintext, chain_length, table, starts[i:i + batch])
+                        for i in range(0, chains, batch)]
+                # Bảng "hoàn hảo": mỗi điểm cuối chỉ giữ một chuỗi
+                merged = {}
+                for result in pool.map(_generate, jobs):
+                    for end, start in result:
+                        merged.setdefault(end, start)
+                ends = sorted(merged)
+                tables.append((array("Q", ends), array("Q", (merged[e] for e in ends))))
+        return cls(cascade, chain_length, tables)
+
+    def success_probability(self):
+        """Expected probability that a lookup finds the key"""
+        miss = 1.0
+        for ends, _ in self.tables:
+            miss *= 1 - coverage(len(ends), self.chain_length, self.cascade.space)
+        return 1 - miss
+
+    def _candidate(self, table, start, position):
+        """Key at position of the chain from start"""
+        key = start
+        for i in range(position):
+            key = self.cascade.reduce(self.cascade.f(key), i, table)
+        return key
+
+    def lookup(self, ciphertext):
+        """
+        Recover a key from the cascade ciphertext of the chosen plaintext
+        Returns: dict with 'key' (None if not found), 'false_alarms',
+                 'evaluations' and 'success_probability'
+        """
+        target = int.from_bytes(bytes(ciphertext), "big") if not isinstance(ciphertext, int) else ciphertext
+        f, reduce = self.cascade.f, self.cascade.reduce
+        t = self.chain_length
+        false_alarms = 0
+        evaluations = 0
+        # Thử từ cuối chuỗi về đầu: số bước cần tính tăng dần
+        for position in range(t - 1, -1, -1):
+            for table, (ends, starts) in enumerate(self.tables):
+                key = reduce(target, position, table)
+                for i in range(position + 1, t):
+                    key = reduce(f(key), i, table)
+                evaluations += t - position
+                index = bisect_left(ends, key)
+                if index < len(ends) and ends[index] == key:
+                    candidate = self._candidate(table, starts[index], position)
+                    evaluations += position + 1
+                    if f(candidate) == target:
+                        return {"key": candidate, "false_alarms": false_alarms, "evaluations": evaluations,
+                                "success_probability": self.success_probability()}
+                    false_alarms += 1
+        return {"key": None, "false_alarms": false_alarms, "evaluations": evaluations,
+                "success_probability": self.success_probability()}
+
+    def save(self, path):
+        """Write the compact on-disk format"""
+        n = self.cascade.stages
+        with open(path, "wb") as f:
+            f.write(MAGIC + struct.pack("<BBB", VERSION, n, n) + self.cascade.plaintext)
+            f.write(struct.pack("<IH", self.chain_length, len(self.tables)))
+            for ends, starts in self.tables:
+                f.write(struct.pack("<I", len(ends)))
+                f.write(b"".join(e.to_bytes(n, "little") + s.to_bytes(n, "little")
+                                 for e, s in zip(ends, starts)))
+
+    @classmethod
+    def load(cls, path):
+        """Read a table set written by save()"""
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC or data[4] != VERSION:
+            raise ValueError("Không phải file rainbow table TinyDES hợp lệ")
+        stages, length = data[5], data[6]
+        offset = 7
+        plaintext = data[offset:offset + length]
+        offset += length
+        chain_length, table_count = struct.unpack_from("<IH", data, offset)
+        offset += 6
+        tables = []
+        for _ in range(table_count):
+            (count,) = struct.unpack_from("<I", data, offset)
+            offset += 4
+            ends, starts = array("Q"), array("Q")
+            for i in range(count):
+                base = offset + i * 2 * stages
+                ends.append(int.from_bytes(data[base:base + stages], "little"))
+                starts.append(int.from_bytes(data[base + stages:base + 2 * stages], "little"))
+            offset += count * 2 * stages
+            tables.append((ends, starts))
+        return cls(Cascade(stages, plaintext), chain_length, tables)
+
+
+def measure(table, trials=100, seed=None):
+    """Empirical success rate and mean lookup time over random keys"""
+    rng = random.Random(seed)
+    found = 0
+    elapsed = 0.0
+    for _ in range(trials):
+        key = rng.randrange(table.cascade.space)
+        start = time.perf_counter()
+        result = table.lookup(table.cascade.f(key))
+        elapsed += time.perf_counter() - start
+        # Khóa khác nhưng cho cùng ciphertext cũng là khóa đúng với cặp đã biết
+        if result["key"] is not None:
+            found += 1
+    return {"trials": trials, "success_rate": found / trials, "mean_lookup_s": elapsed / trials,
+            "expected_success": table.success_probability()}
+
+
+def tradeoff_curve(stages, chain_lengths, memory_chains, tables=DEFAULT_TABLES):
+    """
+    Theoretical trade-off: for each (chain length, chains per table) the
+    success probability, memory in bytes and worst-case lookup evaluations
+    """
+    space = 256 ** stages
+    rows = []
+    for t in chain_lengths:
+        for m in memory_chains:
+            rows.append({
+                "chain_length": t, "chains": m, "tables": tables,
+                "success_probability": coverage(m, t, space, tables),
+                "memory_bytes": tables * m * 2 * stages,
+                "lookup_evaluations": tables * t * (t + 1) // 2,
+                "precomputation": tables * m * t,
+            })
+    return rows
@@ -0,0 +1,242 @@
+"""
+Bộ kiểm định tính ngẫu nhiên cho keystream và ciphertext TinyDES
+
+Các kiểm định (theo FIPS 140-1 / NIST SP 800-22 / Menezes et al.):
+    - monobit        : số bit 1 so với n/2
+    - runs           : số dãy bit liên tiếp giống nhau
+    - serial         : tần suất 4 cặp bit chồng lấn 00/01/10/11
+    - poker (m=4)    : tần suất 16 giá trị nibble (suy ra từ bảng đếm byte)
+    - autocorrelation: số bit khác nhau giữa dãy và bản dịch d bit của nó
+    - chi-square     : phân bố 256 giá trị byte
+
+RandomnessBattery nhận dữ liệu theo từng đoạn qua update() và chỉ giữ các
+bộ đếm (cùng vài byte cuối để ghép cặp bit qua ranh giới đoạn), nên bộ
+nhớ không đổi dù kiểm tra hàng GB. Mỗi đoạn được xử lý như một số nguyên
+lớn: đếm bit bằng int.bit_count(), so sánh bit kề nhau bằng x ^ (x >> d).
+"""
+
+import math
+from collections import Counter
+
+import keystream
+import modes
+
+# 2048 bit = 256 byte, đúng chu kỳ keystream CTR của TinyDES
+DEFAULT_SHIFTS = (1, 2, 8, 16, 2048)
+DEFAULT_CHUNK_SIZE = 1 << 20
+ALPHA = 0.01
+
+
+def chi2_sf(x, df):
+    """Survival function of the chi-square distribution (regularized upper gamma)"""
+    if x <= 0:
+        return 1.0
+    a, x = df / 2, x / 2
+    if x < a + 1:
+        # Chuỗi lũy thừa cho P(a, x)
+        term = total = 1 / a
+        n = a
+        for _ in range(10000):
+            n += 1
+            term *= x / n
+            total += term
+            if term < total * 1e-15:
+                break
+        return max(0.0, 1 - total * math.exp(-x + a * math.log(x) - math.lgamma(a)))
+    # Phân số liên tục cho Q(a, x)
+    b = x + 1 - a
+    c = 1 / 1e-300
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = 1e-300 if abs(d) < 1e-300 else d
+        c = b + an / c
+        c = 1e-300 if abs(c) < 1e-300 else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(-x + a * math.log(x) - math.lgamma(a)) * h)
+
+
+def normal_p(z):
+    """Two-sided p-value of a standard normal statistic"""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+class RandomnessBattery:
+    """Incremental test battery with constant memory"""
+
+    def __init__(self, shifts=DEFAULT_SHIFTS):
+        self.shifts = tuple(shifts)
+        # Số byte cuối cần giữ để ghép cặp bit với độ dịch lớn nhất
+        self.tail_size = (max(self.shifts + (1,)) + 7) // 8
+        self.tail = b""
+        self.bits = 0
+        self.ones = 0
+        self.pair_11 = 0
+        self.differences = {d: 0 for d in self.shifts + (1,)}
+        self.byte_counts = Counter()
+
+    def update(self, data):
+        """Feed the next chunk"""
+        data = bytes(data)
+        if not data:
+            return self
+        nbits = 8 * len(data)
+        self.byte_counts.update(data)
+
+        # Ghép phần đuôi đoạn trước để đếm cả các cặp bit vắt qua ranh giới
+        tail_bits = 8 * len(self.tail)
+        joined = int.from_bytes(self.tail + data, "big")
+        total_bits = tail_bits + nbits
+        self.ones += (joined & ((1 << nbits) - 1)).bit_count()
+        for d in self.differences:
+            if d >= total_bits:
+                continue
+            # Chỉ đếm cặp (i, i + d) có bit sau nằm trong đoạn mới
+            usable = min(nbits, total_bits - d)
+            mask = (1 << usable) - 1
+            self.differences[d] += ((joined ^ (joined >> d)) & mask).bit_count()
+            if d == 1:
+                self.pair_11 += ((joined & (joined >> 1)) & mask).bit_count()
+        self.bits += nbits
+        self.tail = data[-self.tail_size:] if len(data) >= self.tail_size else (self.tail + data)[-self.tail_size:]
+        return self
+
+    def results(self, alpha=ALPHA):
+        """Statistic, p-value and pass/fail of every test"""
+        n = self.bits
+        if n < 2:
+            raise ValueError("Cần ít nhất 2 bit dữ liệu")
+        tests = {}
+
+        tests["monobit"] = {"statistic": (2 * self.ones - n) / math.sqrt(n),
+                            "p_value": normal_p((2 * self.ones - n) / math.sqrt(n))}
+
+        pi = self.ones / n
+        runs = self.differences[1] + 1
+        if abs(pi - 0.5) >= 2 / math.sqrt(n):
+            # Điều kiện tiên quyết của NIST không thỏa: coi như không đạt
+            tests["runs"] = {"statistic": runs, "p_value": 0.0}
+        else:
+            expected = 2 * n * pi * (1 - pi)
+            p = math.erfc(abs(runs - expected) / (2 * math.sqrt(2 * n) * pi * (1 - pi)))
+            tests["runs"] = {"statistic": runs, "p_value": p}
+
+        # Serial (Menezes 5.4.4): cặp bit chồng lấn, bậc tự do 2
+        pairs = n - 1
+        n11 = self.pair_11
+        n10 = self.ones - self._last_bit() - n11
+        n01 = self.differences[1] - n10
+        n00 = pairs - n11 - n10 - n01
+        zeros = n - self.ones
+        psi = (4 / pairs * (n00 ** 2 + n01 ** 2 + n10 ** 2 + n11 ** 2)
+               - 2 / n * (zeros ** 2 + self.ones ** 2) + 1)
+        tests["serial"] = {"statistic": psi, "p_value": chi2_sf(psi, 2)}
+
+        # Poker m = 4: tần suất nibble suy ra từ bảng đếm byte
+        nibbles = [0] * 16
+        for value, count in self.byte_counts.items():
+            nibbles[value >> 4] += count
+            nibbles[value & 0xF] += count
+        k = 2 * (n // 8)
+        poker = 16 / k * sum(c * c for c in nibbles) - k
+        tests["poker"] = {"statistic": poker, "p_value": chi2_sf(poker, 15)}
+
+        for d in self.shifts:
+            if d >= n:
+                continue
+            z = 2 * (self.differences[d] - (n - d) / 2) / math.sqrt(n - d)
+            tests[f"autocorrelation_{d}"] = {"statistic": z, "p_value": normal_p(z)}
+
+        count = n // 8
+        expected = count / 256
+        chi = sum((self.byte_counts.get(v, 0) - expected) ** 2 for v in range(256)) / expected
+        tests["chi_square"] = {"statistic": chi, "p_value": chi2_sf(chi, 255)}
+
+        for result in tests.values():
+            result["passed"] = result["p_value"] >= alpha
+        return {"bits": n, "alpha": alpha, "passed": all(r["passed"] for r in tests.values()), "tests": tests}
+
+    def _last_bit(self):
+        return self.tail[-1] & 1 if self.tail else 0
+
+
+def keystream_chunks(key, mode="ctr", nonce=0, length=DEFAULT_CHUNK_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+    """CTR/OFB keystream of the given length, yielded in chunks"""
+    for offset in range(0, length, chunk_size):
+        yield keystream.generate(mode, key, nonce, offset, min(chunk_size, length - offset))
+
+
+def ciphertext_chunks(source, key, mode="ctr", iv=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Ciphertext of a binary file object, encrypted and yielded chunk by chunk"""
+    cipher = modes.StreamCipher(key, mode, iv)
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield cipher.update(chunk)
+
+
+def repeated_chunks(pattern, length, chunk_size=DEFAULT_CHUNK_SIZE):
+    """A plaintext stream repeating pattern up to length bytes"""
+    pattern = bytes(pattern) or b"\x00"
+    block = pattern * (chunk_size // len(pattern) + 1)
+    for offset in range(0, length, chunk_size):
+        size = min(chunk_size, length - offset)
+        start = offset % len(pattern)
+        yield (block[start:] + block)[:size] if start else block[:size]
+
+
+def test_stream(chunks, shifts=DEFAULT_SHIFTS, alpha=ALPHA):
+    """Run the whole battery over an iterable of byte chunks"""
+    battery = RandomnessBattery(shifts)
+    for chunk in chunks:
+        battery.update(chunk)
+    return battery.results(alpha)
+
+
+def test_bytes(data, shifts=DEFAULT_SHIFTS, alpha=ALPHA):
+    """Run the whole battery over one byte string"""
+    return RandomnessBattery(shifts).update(data).results(alpha)
+
+
+def compare(keys, mode_names=("ctr", "ofb"), length=DEFAULT_CHUNK_SIZE, iv=0, plaintext=b"\x00",
+            shifts=DEFAULT_SHIFTS, alpha=ALPHA):
+    """
+    Battery results for every (key, mode) encrypting the same repeated plaintext
+    (the all-zero default makes CTR/OFB output exactly their keystream)
+    Returns: list of {'key', 'mode', 'passed', 'p_values'}
+    """
+    rows = []
+    for key in keys:
+        for mode in mode_names:
+            if mode in keystream.KEYSTREAM_MODES and plaintext == b"\x00":
+                chunks = keystream_chunks(key, mode, iv, length)
+            else:
+                cipher = modes.StreamCipher(key, mode, iv)
+                chunks = (cipher.update(chunk) for chunk in repeated_chunks(plaintext, length))
+            result = test_stream(chunks, shifts, alpha)
+            rows.append({
+                "key": key,
+                "mode": mode,
+                "passed": result["passed"],
+                "p_values": {name: test["p_value"] for name, test in result["tests"].items()},
+            })
+    return rows
+
+
+def format_results(result):
+    """Human-readable table of one battery result"""
+    lines = [f"{'Kiểm định':<22} {'Thống kê':>14} {'p-value':>10}  Kết quả"]
+    for name, test in result["tests"].items():
+        lines.append(f"{name:<22} {test['statistic']:>14.4f} {test['p_value']:>10.4f}  "
+                     f"{'✓ đạt' if test['passed'] else '✗ không đạt'}")
+    lines.append(f"{result['bits']} bit, α = {result['alpha']}: "
+                 f"{'đạt toàn bộ' if result['passed'] else 'có kiểm định không đạt'}")
+    return "\n".join(lines)
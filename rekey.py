@@ -0,0 +1,143 @@
+"""
+Đổi khóa (re-key) dữ liệu đã mã hóa trong một lượt
+
+ECB: hai bảng hoán vị dec[old_key] và enc[new_key] được ghép thành một bảng
+256 byte  rekey[c] = enc_new[dec_old[c]], nên mỗi byte ciphertext cũ chỉ
+cần một lần bytes.translate để thành ciphertext mới, không đi qua plaintext.
+
+CTR: c' = c XOR ks_old XOR ks_new, hai keystream chu kỳ 256 được XOR sẵn
+thành một keystream duy nhất.
+
+rekey_batch đổi khóa nhiều file (mỗi file một cặp khóa riêng) song song
+trên nhiều tiến trình.
+"""
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import modes
+from tinydes_fast import xor_bytes
+
+REKEY_MODES = ("ecb", "ctr")
+
+
+def rekey_table(old_key, new_key, engine=None):
+    """256-byte table mapping ciphertext under old_key to ciphertext under new_key"""
+    engine = engine if engine is not None else modes.default_engine()
+    return engine.decrypt_table(old_key).translate(engine.encrypt_table(new_key))
+
+
+def rekey_keystream(old_key, new_key, old_iv=0, new_iv=0, engine=None):
+    """256-byte combined CTR keystream period ks_old XOR ks_new"""
+    engine = engine if engine is not None else modes.default_engine()
+    return xor_bytes(modes.ctr_period(engine, old_key, old_iv), modes.ctr_period(engine, new_key, new_iv))
+
+
+class Rekeyer:
+    """Incremental re-keying of a ciphertext stream"""
+
+    def __init__(self, old_key, new_key, mode="ecb", old_iv=0, new_iv=0, engine=None):
+        if mode not in REKEY_MODES:
+            raise ValueError(f"Đổi khóa chỉ hỗ trợ chế độ: {', '.join(REKEY_MODES)}")
+        self.mode = mode
+        self.position = 0
+        if mode == "ecb":
+            self.table = rekey_table(old_key, new_key, engine)
+        else:
+            self.period = rekey_keystream(old_key, new_key, old_iv, new_iv, engine)
+
+    def update(self, data):
+        """Re-key the next chunk"""
+        data = bytes(data)
+        if self.mode == "ecb":
+            out = data.translate(self.table)
+        else:
+            out = xor_bytes(data, modes.keystream_slice(self.period, self.position, len(data)))
+        self.position += len(data)
+        return out
+
+
+def rekey_bytes(data, old_key, new_key, mode="ecb", old_iv=0, new_iv=0, engine=None):
+    """One-shot re-keying of a byte string"""
+    return Rekeyer(old_key, new_key, mode, old_iv, new_iv, engine).update(data)
+
+
+def rekey_stream(source, sink, old_key, new_key, mode="ecb", old_iv=0, new_iv=0,
+                 buffer_size=modes.DEFAULT_BUFFER_SIZE):
+    """Stream source into sink re-keyed; returns number of bytes processed"""
+    rekeyer = Rekeyer(old_key, new_key, mode, old_iv, new_iv)
+    total = 0
+    while True:
+        chunk = source.read(buffer_size)
+        if not chunk:
+            break
+        sink.write(rekeyer.update(chunk))
+        total += len(chunk)
+    return total
+
+
+def rekey_file(path, old_key, new_key, output=None, mode="ecb", old_iv=0, new_iv=0,
+               buffer_size=modes.DEFAULT_BUFFER_SIZE):
+    """
+    Re-key a file; output=None rewrites it in place (same length, same offsets)
+    Returns: (path, number of bytes processed)
+    """
+    if output is None or (os.path.exists(output) and os.path.samefile(path, output)):
+        rekeyer = Rekeyer(old_key, new_key, mode, old_iv, new_iv)
+        total = 0
+        with open(path, "r+b") as f:
+            while True:
+                chunk = f.read(buffer_size)
+                if not chunk:
+                    break
+                f.seek(-len(chunk), os.SEEK_CUR)
+                f.write(rekeyer.update(chunk))
+                total += len(chunk)
+        return path, total
+    with open(path, "rb") as source, open(output, "wb") as sink:
+        return path, rekey_stream(source, sink, old_key, new_key, mode, old_iv, new_iv, buffer_size)
+
+
+def _rekey_job(job):
+    return rekey_file(**job)
+
+
+def rekey_batch(jobs, workers=None):
+    """
+    Re-key many files in parallel
+    jobs: iterable of dicts with rekey_file keyword arguments
+          (path, old_key, new_key and optionally output, mode, old_iv, new_iv)
+    Returns: list of (path, bytes) in job order
+    """
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        return [_rekey_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_rekey_job, jobs))
+
+
+def read_jobs(path, parse_byte=int):
+    """
+    Read a CSV batch file with columns path,old_key,new_key[,output[,mode,old_iv,new_iv]]
+    parse_byte converts key/IV text to an int
+    """
+    jobs = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            row = [cell.strip() for cell in row]
+            if not row or row[0].startswith("#") or row[0] == "path":
+                continue
+            if len(row) < 3:
+                raise ValueError(f"Dòng batch thiếu cột: {','.join(row)}")
+            job = {"path": row[0], "old_key": parse_byte(row[1]), "new_key": parse_byte(row[2])}
+            if len(row) > 3 and row[3]:
+                job["output"] = row[3]
+            if len(row) > 4 and row[4]:
+                job["mode"] = row[4]
+            if len(row) > 5 and row[5]:
+                job["old_iv"] = parse_byte(row[5])
+            if len(row) > 6 and row[6]:
+                job["new_iv"] = parse_byte(row[6])
+            jobs.append(job)
+    return jobs
@@ -13,6 +13,8 @@ def main():
     """Chạy FastAPI server cho HỆ THỐNG MÃ HÓA TINYDES"""
     # Lấy port từ environment variable (cho Render) hoặc dùng 8000 mặc định
     port = int(os.environ.get("PORT", 8000))
+    # Số worker process (WEB_CONCURRENCY, mặc định 1)
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
     
     print("=" * 60)
     print("🚀 Đang khởi động HỆ THỐNG MÃ HÓA TINYDES")
@@ -23,6 +25,7 @@ def main():
     print(f"📚 API Documentation: http://0.0.0.0:{port}/docs")
     print(f"🔧 Health Check: http://0.0.0.0:{port}/health")
     print(f"📊 API Info: http://0.0.0.0:{port}/api/info")
+    print(f"⚙️  Số worker: {workers}")
     print("=" * 60)
     
     try:
@@ -31,6 +34,7 @@ def main():
             host="0.0.0.0",
             port=port,
             reload=False,  # Tắt reload trong production
+            workers=workers,
             log_level="info"
         )
     except KeyboardInterrupt:
@@ -0,0 +1,181 @@
+"""
+Phân tích tính chất mật mã của S-box 4x16 (6 bit vào, 4 bit ra)
+
+S-box được xem như hàm S: {0..63} -> {0..15} theo đúng cách tra của
+TinyDES: hàng = b0b5, cột = b1b2b3b4. Các chỉ số được tính:
+    - DDT (bảng phân bố vi sai) và độ đồng đều vi sai
+    - LAT (bảng xấp xỉ tuyến tính) qua biến đổi Walsh-Hadamard nhanh,
+      từ đó suy ra độ phi tuyến
+    - FBCT (bảng kết nối boomerang kiểu Feistel) của cả S-box và BCT của
+      từng hàng khi hàng đó là một hoán vị 4 bit
+    - bậc đại số của các hàm thành phần qua biến đổi Möbius (dạng ANF)
+
+Kết quả được ghi nhớ theo mã băm SHA-256 của bảng, nên các lần gọi lại
+với cùng S-box chỉ tốn một lần tra từ điển.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+from tinydes import TinyDES
+
+ROWS, COLS = 4, 16
+INPUT_BITS, OUTPUT_BITS = 6, 4
+CACHE_SIZE = 64
+
+_cache = OrderedDict()
+
+
+def validate(sbox):
+    """Check a 4x16 table of 4-bit values; returns it as a tuple of tuples"""
+    try:
+        table = tuple(tuple(int(v) for v in row) for row in sbox)
+    except (TypeError, ValueError):
+        raise ValueError("S-box phải là bảng 4x16 các số nguyên")
+    if len(table) != ROWS or any(len(row) != COLS for row in table):
+        raise ValueError("S-box phải có đúng 4 hàng, mỗi hàng 16 giá trị")
+    if any(not 0 <= v < 16 for row in table for v in row):
+        raise ValueError("Giá trị S-box phải nằm trong khoảng 0..15")
+    return table
+
+
+def to_function(table):
+    """64-entry list S[x] using TinyDES row/column addressing"""
+    return [table[((x >> 4) & 2) | (x & 1)][(x >> 1) & 0xF] for x in range(64)]
+
+
+def fingerprint(table):
+    """SHA-256 hex of a validated table"""
+    return hashlib.sha256(bytes(v for row in table for v in row)).hexdigest()
+
+
+def ddt(s):
+    """Difference distribution table, 64 input differences x 16 output differences"""
+    table = [[0] * 16 for _ in range(64)]
+    for a in range(64):
+        row = table[a]
+        for x in range(64):
+            row[s[x] ^ s[x ^ a]] += 1
+    return table
+
+
+def walsh_hadamard(values):
+    """Fast Walsh-Hadamard transform of a list whose length is a power of two"""
+    values = list(values)
+    h = 1
+    while h < len(values):
+        for i in range(0, len(values), 2 * h):
+            for j in range(i, i + h):
+                u, v = values[j], values[j + h]
+                values[j], values[j + h] = u + v, u - v
+        h *= 2
+    return values
+
+
+def parity(x):
+    return bin(x).count("1") & 1
+
+
+def lat(s):
+    """
+    Linear approximation table LAT[a][b] = #{x: a.x = b.S(x)} - 32,
+    computed column by column with the Walsh transform of (-1)^(b.S(x))
+    """
+    columns = []
+    for b in range(16):
+        walsh = walsh_hadamard([1 - 2 * parity(b & s[x]) for x in range(64)])
+        columns.append([w // 2 for w in walsh])
+    return [[columns[b][a] for b in range(16)] for a in range(64)]
+
+
+def fbct(s):
+    """Feistel boomerang connectivity table: #{x: S(x)^S(x^a)^S(x^b)^S(x^a^b) = 0}"""
+    return [[sum(1 for x in range(64) if s[x] ^ s[x ^ a] ^ s[x ^ b] ^ s[x ^ a ^ b] == 0)
+             for b in range(64)] for a in range(64)]
+
+
+def bct(perm):
+    """Boomerang connectivity table of a 4-bit permutation (Cid et al.)"""
+    inverse = [0] * 16
+    for x, y in enumerate(perm):
+        inverse[y] = x
+    return [[sum(1 for x in range(16) if inverse[perm[x] ^ b] ^ inverse[perm[x ^ a] ^ b] == a)
+             for b in range(16)] for a in range(16)]
+
+
+def mobius(truth_table):
+    """Algebraic normal form coefficients of a Boolean function (Möbius transform)"""
+    coefficients = list(truth_table)
+    h = 1
+    while h < len(coefficients):
+        for i in range(0, len(coefficients), 2 * h):
+            for j in range(i, i + h):
+                coefficients[j + h] ^= coefficients[j]
+        h *= 2
+    return coefficients
+
+
+def algebraic_degree(truth_table):
+    """Degree of the ANF of a Boolean function (0 for constants)"""
+    return max((bin(m).count("1") for m, c in enumerate(mobius(truth_table)) if c), default=0)
+
+
+def _analyze(table):
+    s = to_function(table)
+    difference = ddt(s)
+    linear = lat(s)
+    boomerang = fbct(s)
+    component_degrees = [algebraic_degree([parity(b & s[x]) for x in range(64)]) for b in range(1, 16)]
+    coordinate_degrees = [algebraic_degree([(s[x] >> (3 - i)) & 1 for x in range(64)]) for i in range(4)]
+    max_walsh = max(abs(linear[a][b]) * 2 for a in range(64) for b in range(1, 16))
+    rows = []
+    for r, row in enumerate(table):
+        # BCT chỉ xác định khi hàng là hoán vị 4 bit
+        row_bct = bct(row) if len(set(row)) == 16 else None
+        rows.append({
+            "row": r,
+            "bijective": row_bct is not None,
+            "bct": row_bct,
+            "boomerang_uniformity": max(row_bct[a][b] for a in range(1, 16) for b in range(1, 16))
+            if row_bct is not None else None,
+        })
+    return {
+        "sbox": [list(row) for row in table],
+        "hash": fingerprint(table),
+        "balanced": all(s.count(v) == 4 for v in range(16)),
+        "differential_uniformity": max(max(row) for row in difference[1:]),
+        "ddt": difference,
+        "nonlinearity": 2 ** (INPUT_BITS - 1) - max_walsh // 2,
+        "linearity": max_walsh,
+        "lat": linear,
+        "fbct_uniformity": max(boomerang[a][b] for a in range(1, 64) for b in range(1, 64) if a != b),
+        "fbct": boomerang,
+        "rows": rows,
+        "algebraic_degree": max(component_degrees),
+        "min_component_degree": min(component_degrees),
+        "coordinate_degrees": coordinate_degrees,
+    }
+
+
+def analyze(sbox=None):
+    """
+    Analysis of a 4x16 S-box (default: the TinyDES S-box), memoized by hash
+    Returns: dict with DDT, LAT, FBCT, per-row BCT and scalar metrics
+    """
+    table = validate(sbox if sbox is not None else TinyDES().sbox)
+    key = fingerprint(table)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    result = _analyze(table)
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+def summary(result):
+    """Scalar metrics of analyze() without the tables"""
+    return {key: value for key, value in result.items() if key not in ("ddt", "lat", "fbct", "rows")} | {
+        "rows": [{k: v for k, v in row.items() if k != "bct"} for row in result["rows"]],
+    }
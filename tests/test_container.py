@@ -0,0 +1,83 @@
+import io
+import random
+
+import pytest
+
+import container
+import modes
+
+KEY = 0b10100101
+DATA = random.Random(35).randbytes(10_000)
+
+
+def build(mode, chunk_size=1000):
+    sink = io.BytesIO()
+    container.write_container(io.BytesIO(DATA), sink, KEY, mode, nonce=0x3C, chunk_size=chunk_size)
+    return sink
+
+
+@pytest.mark.parametrize("mode", modes.MODES)
+def test_full_read_roundtrip(mode):
+    reader = container.ContainerReader(build(mode), KEY)
+    assert reader.size == len(DATA)
+    assert reader.read_range() == DATA
+    assert reader.verify() == []
+
+
+@pytest.mark.parametrize("mode", modes.MODES)
+@pytest.mark.parametrize("start,end", [(0, 1), (999, 1001), (1500, 4321), (3000, 3000), (9990, 20_000)])
+def test_range_reads(mode, start, end):
+    reader = container.ContainerReader(build(mode), KEY)
+    assert reader.read_range(start, end) == DATA[start:end]
+
+
+def test_iter_range_block_size():
+    reader = container.ContainerReader(build("cbc"), KEY)
+    pieces = list(reader.iter_range(123, 5000, block_size=300))
+    assert max(map(len, pieces)) <= 300
+    assert b"".join(pieces) == DATA[123:5000]
+
+
+def test_wrong_key_raises_key_mismatch():
+    with pytest.raises(container.KeyMismatch):
+        container.ContainerReader(build("ctr"), KEY ^ 1)
+
+
+def test_open_closes_file_on_error(tmp_path, monkeypatch):
+    path = tmp_path / "data.tdc"
+    path.write_bytes(build("ctr").getvalue())
+    opened = []
+    real_open = open
+
+    def tracking_open(*args, **kwargs):
+        opened.append(real_open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    with pytest.raises(container.KeyMismatch):
+        container.ContainerReader.open(str(path), KEY ^ 1)
+    assert opened and opened[0].closed
+
+
+def test_corrupted_chunk_detected():
+    sink = build("ecb")
+    raw = bytearray(sink.getvalue())
+    raw[container.HEADER.size + 2500] ^= 0xFF
+    reader = container.ContainerReader(io.BytesIO(bytes(raw)), KEY)
+    assert reader.verify() == [2]
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, None),
+    ("bytes=0-9", (0, 10)),
+    ("bytes=9990-", (9990, 10_000)),
+    ("bytes=-10", (9990, 10_000)),
+])
+def test_parse_range(header, expected):
+    assert container.parse_range(header, len(DATA)) == expected
+
+
+@pytest.mark.parametrize("header", ["items=0-1", "bytes=0-1,3-4", "bytes=5", "bytes=-0"])
+def test_parse_range_rejects(header):
+    with pytest.raises(ValueError):
+        container.parse_range(header, len(DATA))
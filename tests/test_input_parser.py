@@ -0,0 +1,93 @@
+import pytest
+
+from input_parser import convert_input, detect_format, format_bytes, parse_bytes, parse_value
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("10", "00000010"),
+    ("01101010", "01101010"),
+    ("0x6A", "01101010"),
+    ("0x6", "00000110"),
+    ("106", "01101010"),
+    ("6a", "01101010"),
+    ("hex:6A", "01101010"),
+    ("dec:255", "11111111"),
+])
+def test_convert_input_accepts(text, expected):
+    assert convert_input(text, 8) == expected
+
+
+@pytest.mark.parametrize("text", ["0x1FF", "256", "", "  ", "test", "qg==", "b64:qg==", "base64:qg==", "1 2", "0xZZ"])
+def test_convert_input_rejects(text):
+    assert convert_input(text, 8) is None
+
+
+def test_parse_value_widths():
+    assert parse_value("101", 6) == 5
+    assert parse_value("0x3F", 6) == 63
+    with pytest.raises(ValueError):
+        parse_value("0x40", 6)
+
+
+@pytest.mark.parametrize("text,fmt", [
+    ("0110101000011111", "bin"),
+    ("0x6A1F", "hex"),
+    ("106 31", "dec"),
+    ("6a1f", "hex"),
+])
+def test_detect_format(text, fmt):
+    assert detect_format(text) == fmt
+
+
+@pytest.mark.parametrize("text", ["test", "ah8=", "hello world"])
+def test_detect_format_never_guesses_base64(text):
+    with pytest.raises(ValueError):
+        detect_format(text)
+    with pytest.raises(ValueError):
+        parse_bytes(text)
+
+
+@pytest.mark.parametrize("text,fmt,expected", [
+    ("0x6A1F", "auto", b"\x6a\x1f"),
+    ("6a 1f", "auto", b"\x6a\x1f"),
+    ("0x6A 0x1F", "auto", b"\x6a\x1f"),
+    ("0x6 0x1F", "auto", b"\x06\x1f"),
+    ("01101010 00011111", "auto", b"\x6a\x1f"),
+    ("101 1", "bin", b"\x05\x01"),
+    ("106,31", "auto", b"\x6a\x1f"),
+    ("106 31", "dec", b"\x6a\x1f"),
+    ("ah8=", "base64", b"\x6a\x1f"),
+    ("b64:ah8=", "auto", b"\x6a\x1f"),
+    ("base64: ah 8=", "auto", b"\x6a\x1f"),
+    ("hex:1010", "auto", b"\x10\x10"),
+    ("xin chào", "text", "xin chào".encode()),
+])
+def test_parse_bytes(text, fmt, expected):
+    assert parse_bytes(text, fmt) == expected
+
+
+@pytest.mark.parametrize("text,fmt", [
+    ("", "auto"),
+    ("hex:", "auto"),
+    ("256", "dec"),
+    ("0xG1", "hex"),
+    ("0102", "bin"),
+    ("ah8", "base64"),
+    ("hex:6A", "dec"),
+    ("6A", "octal"),
+])
+def test_parse_bytes_rejects(text, fmt):
+    with pytest.raises(ValueError):
+        parse_bytes(text, fmt)
+
+
+@pytest.mark.parametrize("fmt", ["hex", "bin", "dec", "base64"])
+def test_format_round_trip(fmt):
+    data = bytes(range(0, 256, 7))
+    assert parse_bytes(format_bytes(data, fmt), fmt) == data
+
+
+def test_format_bytes_text_replaces_invalid():
+    assert format_bytes(b"ok\xff", "text") == "ok�"
+    with pytest.raises(ValueError):
+        format_bytes(b"", "octal")
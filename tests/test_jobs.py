@@ -0,0 +1,155 @@
+import sqlite3
+import time
+from contextlib import closing
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def wait_for(queue, job_id, statuses=jobs.FINISHED, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} vẫn ở trạng thái {queue.get(job_id)['status']}")
+
+
+def set_running(queue, job_id, owner, heartbeat):
+    queue._execute("UPDATE jobs SET status = 'running', started = ?, owner = ?, heartbeat = ? WHERE id = ?",
+                   (time.time(), owner, heartbeat, job_id))
+
+
+def test_submit_rejects_unknown_kind(db_path):
+    with pytest.raises(ValueError):
+        jobs.JobQueue(db_path).submit("nope")
+
+
+def test_job_runs_to_completion(db_path):
+    queue = jobs.JobQueue(db_path, max_workers=1)
+    queue.start()
+    try:
+        job = queue.submit("brute_force", {"pairs": [[0x5C, 0x55]]})
+        job = wait_for(queue, job["id"])
+    finally:
+        queue.stop()
+    assert job["status"] == "succeeded"
+    assert job["owner"] == queue.owner
+    assert job["attempts"] == 1
+    assert job["progress"] == 1
+    assert 0xA5 in job["result"]["keys"]
+
+
+def test_claim_is_exclusive_between_queues(db_path):
+    queues = [jobs.JobQueue(db_path, max_workers=2) for _ in range(2)]
+    submitted = [queues[0].submit("sbox") for _ in range(8)]
+    for queue in queues:
+        queue.start()
+    try:
+        finished = [wait_for(queues[0], job["id"]) for job in submitted]
+    finally:
+        for queue in queues:
+            queue.stop()
+    assert all(job["status"] == "succeeded" and job["attempts"] == 1 for job in finished)
+    assert {job["owner"] for job in finished} <= {queue.owner for queue in queues}
+
+
+def test_cancel_queued_job(db_path):
+    queue = jobs.JobQueue(db_path)
+    job = queue.cancel(queue.submit("sbox")["id"])
+    assert job["status"] == "cancelled"
+    assert job["cancel_requested"]
+
+
+def test_cancel_running_job(db_path):
+    queue = jobs.JobQueue(db_path, max_workers=1)
+    queue.start()
+    try:
+        job = queue.submit("randomness", {"keys": list(range(256)), "modes": ["ctr"], "length": 1 << 16})
+        wait_for(queue, job["id"], ("running",))
+        queue.cancel(job["id"])
+        job = wait_for(queue, job["id"])
+    finally:
+        queue.stop()
+    assert job["status"] == "cancelled"
+    assert job["result"] is None
+
+
+def test_recover_requeues_only_expired_leases(db_path):
+    queue = jobs.JobQueue(db_path)
+    live, stale, released, cancelled = (queue.submit("sbox")["id"] for _ in range(4))
+    now = time.time()
+    set_running(queue, live, "other", now)
+    set_running(queue, stale, "dead", now - 2 * jobs.LEASE_SECONDS)
+    set_running(queue, released, "stopped", None)
+    set_running(queue, cancelled, "dead", now - 2 * jobs.LEASE_SECONDS)
+    queue._execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (cancelled,))
+
+    assert queue.recover() == 2
+    assert queue.get(live)["status"] == "running"
+    assert queue.get(live)["owner"] == "other"
+    for job_id in (stale, released):
+        job = queue.get(job_id)
+        assert job["status"] == "queued"
+        assert job["owner"] is None and job["started"] is None
+    assert queue.get(cancelled)["status"] == "cancelled"
+
+
+def test_heartbeat_and_stop_release_own_leases(db_path):
+    queue = jobs.JobQueue(db_path)
+    mine, other = queue.submit("sbox")["id"], queue.submit("sbox")["id"]
+    old = time.time() - 2 * jobs.LEASE_SECONDS
+    set_running(queue, mine, queue.owner, old)
+    set_running(queue, other, "other", old)
+    assert queue.heartbeat() == 1
+    assert queue.get(mine)["heartbeat"] > old
+    assert queue.get(other)["heartbeat"] == old
+
+    queue.stop()
+    assert queue.get(mine)["heartbeat"] is None
+    assert queue.get(other)["heartbeat"] == old
+
+
+def test_old_schema_is_migrated(db_path):
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, "
+                     "status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT, result TEXT, "
+                     "error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0, "
+                     "attempts INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, started REAL, finished REAL)")
+        conn.execute("INSERT INTO jobs (id, kind, params, status, created, started) "
+                     "VALUES ('old', 'sbox', '{}', 'running', 0, 0)")
+        conn.commit()
+    queue = jobs.JobQueue(db_path)
+    assert queue.get("old")["owner"] is None
+    assert queue.recover() == 1
+    assert queue.get("old")["status"] == "queued"
+
+
+def test_analysis_jobs_use_the_variant():
+    variant = {"shifts": [1, 2, 1, 2, 1]}
+    assert list(jobs.job_avalanche(variant, lambda *args: None)) == ["1", "2", "3", "4", "5"]
+    assert jobs.job_keyspace(variant, lambda *args: None) != jobs.job_keyspace({}, lambda *args: None)
+
+
+def test_dispatcher_survives_broken_pool(db_path):
+    queue = jobs.JobQueue(db_path, max_workers=1)
+    queue.start()
+    try:
+        wait_for(queue, queue.submit("sbox")["id"])
+        # Worker bị giết (OOM, os._exit...) làm hỏng ProcessPoolExecutor
+        for process in list(queue._pool._processes.values()):
+            process.kill()
+            process.join()
+        job = wait_for(queue, queue.submit("sbox")["id"])
+        assert queue._thread.is_alive()
+        assert queue.last_error.startswith("BrokenProcessPool")
+    finally:
+        queue.stop()
+    assert job["status"] == "succeeded"
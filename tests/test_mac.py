@@ -0,0 +1,125 @@
+import io
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import mac
+from tinydes import TinyDES
+
+ROOT = Path(__file__).resolve().parent.parent
+KEY = 0xA5
+DATA = random.Random(43).randbytes(3000)
+_reference = TinyDES()
+
+
+def E(key, block):
+    return int(_reference.encrypt(block, key), 2)
+
+
+def reference_cbc_mac(data, key):
+    state = 0
+    for b in data:
+        state = E(key, state ^ b)
+    return bytes([state])
+
+
+def reference_cmac(data, key):
+    k1 = mac.gf_double(E(key, 0))
+    k2 = mac.gf_double(k1)
+    if not data:
+        return bytes([E(key, 0x80 ^ k2)])
+    state = 0
+    for b in data[:-1]:
+        state = E(key, state ^ b)
+    return bytes([E(key, state ^ data[-1] ^ k1)])
+
+
+def reference_pmac(data, key):
+    sigma = 0
+    alpha = 1
+    for b in data:
+        sigma ^= E(key, b ^ E(key, alpha))
+        alpha = mac.gf_double(alpha) ^ alpha
+    return bytes([E(key, sigma ^ E(key, 0) ^ (len(data) & 0xFF))])
+
+
+REFERENCES = {"cbc-mac": reference_cbc_mac, "cmac": reference_cmac, "pmac": reference_pmac}
+
+
+def test_gf_double_order():
+    # α sinh nhóm nhân GF(2^8)*: các mặt nạ chỉ lặp lại sau đúng 255 khối
+    assert len(set(mac.ALPHA_POWERS)) == mac.PMAC_PERIOD
+    assert mac.gf_double(mac.ALPHA_POWERS[-1]) ^ mac.ALPHA_POWERS[-1] == 1
+
+
+@pytest.mark.parametrize("algorithm", mac.ALGORITHMS)
+@pytest.mark.parametrize("data", [b"", b"\x00", b"hello world", bytes(range(256)) * 2])
+def test_vectors_match_reference(algorithm, data):
+    assert mac.mac(data, KEY, algorithm) == REFERENCES[algorithm](data, KEY)
+
+
+@pytest.mark.parametrize("algorithm", mac.ALGORITHMS)
+def test_chunked_matches_one_shot(algorithm):
+    state = mac.new(KEY, algorithm)
+    rng = random.Random(1)
+    position = 0
+    while position < len(DATA):
+        step = rng.randint(0, 300)
+        state.update(DATA[position:position + step])
+        position += step
+    assert state.digest() == mac.mac(DATA, KEY, algorithm)
+
+
+def test_pmac_partials_combine():
+    sigma = 0
+    for offset in range(0, len(DATA), 700):
+        sigma ^= mac.pmac_partial(KEY, DATA[offset:offset + 700], offset)
+    assert mac.pmac_finalize(KEY, sigma, len(DATA)) == mac.mac(DATA, KEY, "pmac")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pmac_file_matches_stream(tmp_path, workers):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    assert mac.pmac_file(str(path), KEY, workers, chunk_size=512) == mac.mac(DATA, KEY, "pmac")
+    assert mac.mac_stream(io.BytesIO(DATA), KEY, "pmac", buffer_size=100) == mac.mac(DATA, KEY, "pmac")
+
+
+def test_encrypt_then_mac_roundtrip():
+    ciphertext = io.BytesIO()
+    _, tag = mac.encrypt_then_mac(io.BytesIO(DATA), ciphertext, 0x3C, KEY, "cbc", 7)
+    plaintext = io.BytesIO()
+    assert mac.decrypt_and_verify(io.BytesIO(ciphertext.getvalue()), plaintext, 0x3C, KEY, tag, "cbc", 7)
+    assert plaintext.getvalue() == DATA
+    assert not mac.decrypt_and_verify(io.BytesIO(ciphertext.getvalue()), io.BytesIO(), 0x3C, KEY,
+                                      bytes([tag[0] ^ 1]), "cbc", 7)
+
+
+def run_cli(*args, stdin=None):
+    return subprocess.run([sys.executable, str(ROOT / "cli.py"), "mac", *args],
+                          input=stdin, capture_output=True, cwd=ROOT)
+
+
+@pytest.mark.parametrize("to_file", [True, False])
+def test_cli_verify_writes_only_on_valid_tag(tmp_path, to_file):
+    ciphertext = io.BytesIO()
+    _, tag = mac.encrypt_then_mac(io.BytesIO(DATA), ciphertext, 0x3C, KEY, "ctr", 0)
+    source = tmp_path / "data.enc"
+    source.write_bytes(ciphertext.getvalue())
+    output = tmp_path / "data.out"
+    common = ["-k", str(KEY), "--encrypt-key", "60", "-i", str(source)]
+    if to_file:
+        common += ["-o", str(output)]
+
+    bad = run_cli(*common, "--verify", str(tag[0] ^ 1))
+    assert bad.returncode == 1
+    assert bad.stdout == b""
+    assert not output.exists()
+    assert list(tmp_path.iterdir()) == [source]
+
+    good = run_cli(*common, "--verify", str(tag[0]))
+    assert good.returncode == 0
+    assert (output.read_bytes() if to_file else good.stdout) == DATA
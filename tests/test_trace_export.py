@@ -0,0 +1,53 @@
+import io
+
+import pytest
+
+import conformance
+import trace_export
+from tinydes import TinyDES
+from tinydes_fast import FastTinyDES, TRACE_COLUMNS, trace_column_spec
+
+FIVE_ROUNDS = FastTinyDES(TinyDES(None, [1, 2, 1, 2, 1]))
+
+
+def test_stock_spec_unchanged():
+    assert trace_column_spec() == TRACE_COLUMNS
+    assert len(TRACE_COLUMNS) == 30
+    assert FastTinyDES().trace_spec == TRACE_COLUMNS
+
+
+def test_spec_follows_round_count():
+    assert FIVE_ROUNDS.rounds == 5
+    assert len(FIVE_ROUNDS.trace_spec) == 2 + 5 + 8 * 5 + 1
+    assert len(FIVE_ROUNDS.trace_columns(b"\x00", b"\x00")) == len(FIVE_ROUNDS.trace_spec)
+    assert FIVE_ROUNDS.trace_names[-2:] == ["r5_pbox", "ciphertext"]
+
+
+@pytest.mark.parametrize("engine", [FastTinyDES(), FIVE_ROUNDS], ids=["stock", "5-rounds"])
+def test_columns_match_reference(engine):
+    indices = range(0, 65536, 997)
+    blocks = bytes(i & 0xFF for i in indices)
+    keys = bytes(i >> 8 for i in indices)
+    expected = conformance.reference_trace_columns(indices, engine.reference)
+    assert engine.trace_columns(blocks, keys) == expected
+    assert conformance.trace_diff(0x5C, 0xA5, engine, engine.reference) == []
+
+
+@pytest.mark.parametrize("engine", [FastTinyDES(), FIVE_ROUNDS], ids=["stock", "5-rounds"])
+def test_binary_round_trip(engine):
+    output = io.BytesIO()
+    assert trace_export.export(output, "bin", count=1000, seed=1, chunk_size=300, engine=engine) == 1000
+    output.seek(0)
+    chunks = list(trace_export.read_binary(output))
+    assert list(chunks[0]) == engine.trace_names
+    assert sum(len(chunk["plaintext"]) for chunk in chunks) == 1000
+    first = chunks[0]
+    assert engine.trace_columns(first["plaintext"], first["key"]) == list(first.values())
+
+
+def test_csv_bit_strings_use_engine_widths():
+    output = io.StringIO()
+    trace_export.export(output, "csv", count=3, seed=1, bit_strings=True, engine=FIVE_ROUNDS)
+    header, row = output.getvalue().splitlines()[:2]
+    assert header.split(",") == FIVE_ROUNDS.trace_names
+    assert [len(cell) for cell in row.split(",")] == [bits for _, bits in FIVE_ROUNDS.trace_spec]
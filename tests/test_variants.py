@@ -0,0 +1,140 @@
+import json
+import os
+
+import pytest
+
+import variants
+from tinydes import TinyDES
+
+DES_S2 = [
+    [15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10],
+    [3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5],
+    [0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15],
+    [13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9],
+]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return variants.VariantRegistry(str(tmp_path))
+
+
+def write(directory, filename, content, mtime_s=1_000):
+    """Write a variant file with an explicit mtime (reload compares mtime/size)"""
+    path = directory / filename
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+    os.utime(path, ns=(mtime_s * 10**9, mtime_s * 10**9))
+    return path
+
+
+def test_stock_always_present(registry):
+    assert registry.names() == [variants.DEFAULT_VARIANT]
+    assert registry.get().rounds == 3
+    assert registry.find("nope") is None
+    with pytest.raises(KeyError):
+        registry.get("nope")
+
+
+@pytest.mark.parametrize("spec", [
+    [],
+    {"name": "Hoa"},
+    {"name": "x", "shifts": []},
+    {"name": "x", "shifts": [4]},
+    {"name": "x", "shifts": [1] * (variants.MAX_ROUNDS + 1)},
+    {"name": "x", "sbox": [[0] * 16] * 3},
+])
+def test_parse_spec_rejects(spec):
+    with pytest.raises(ValueError):
+        variants.parse_spec(spec)
+
+
+def test_parse_spec_defaults():
+    spec = variants.parse_spec({"name": "plain"})
+    assert spec["sbox"] == TinyDES().sbox
+    assert spec["shifts"] == list(TinyDES.DEFAULT_SHIFTS)
+
+
+def test_load_and_compile(registry, tmp_path):
+    write(tmp_path, "five.json", {"name": "five", "shifts": [1, 2, 1, 2, 1]})
+    write(tmp_path, "s2.json", {"name": "s2", "sbox": DES_S2})
+    result = registry.reload()
+    assert sorted(result["loaded"]) == ["five", "s2"]
+    assert registry.names() == [variants.DEFAULT_VARIANT, "five", "s2"]
+    five = registry.get("five")
+    assert five.rounds == five.engine.rounds == 5
+    assert five.engine.encrypt_block(0x5C, 0xA5) == int(TinyDES(None, [1, 2, 1, 2, 1]).encrypt(0x5C, 0xA5), 2)
+    assert registry.get("s2").engine.encrypt_table(7) != registry.get().engine.encrypt_table(7)
+
+
+def test_unchanged_files_are_not_recompiled(registry, tmp_path):
+    write(tmp_path, "five.json", {"name": "five", "shifts": [1, 2, 1, 2, 1]})
+    registry.reload()
+    compiled = registry.get("five")
+    assert registry.reload()["loaded"] == []
+    assert registry.get("five") is compiled
+
+
+def test_modified_file_is_recompiled(registry, tmp_path):
+    write(tmp_path, "v.json", {"name": "v", "shifts": [1, 2, 1]})
+    registry.reload()
+    write(tmp_path, "v.json", {"name": "v", "shifts": [2, 2, 2, 2]}, mtime_s=2_000)
+    assert registry.reload()["loaded"] == ["v"]
+    assert registry.get("v").rounds == 4
+
+
+def test_broken_file_keeps_last_good_version(registry, tmp_path):
+    path = write(tmp_path, "v.json", {"name": "v", "shifts": [1, 2, 1, 2]})
+    registry.reload()
+    good = registry.get("v")
+    write(tmp_path, "v.json", "{ không phải json", mtime_s=2_000)
+    result = registry.reload()
+    assert registry.get("v") is good
+    assert str(path) in result["errors"]
+    # Lỗi đã ghi nhận không bị nạp lại cho tới khi file đổi tiếp
+    assert registry.reload()["loaded"] == []
+    write(tmp_path, "v.json", {"name": "v", "shifts": [1]}, mtime_s=3_000)
+    result = registry.reload()
+    assert result["errors"] == {}
+    assert registry.get("v").rounds == 1
+
+
+def test_deleted_file_removes_variant(registry, tmp_path):
+    path = write(tmp_path, "v.json", {"name": "v"})
+    registry.reload()
+    path.unlink()
+    result = registry.reload()
+    assert result["removed"] == ["v"]
+    assert registry.find("v") is None
+
+
+def test_renamed_variant_replaces_old_name(registry, tmp_path):
+    write(tmp_path, "v.json", {"name": "old"})
+    registry.reload()
+    write(tmp_path, "v.json", {"name": "new"}, mtime_s=2_000)
+    registry.reload()
+    assert registry.find("old") is None
+    assert registry.find("new") is not None
+
+
+def test_duplicate_name_is_rejected(registry, tmp_path):
+    write(tmp_path, "a.json", {"name": "dup", "shifts": [1]})
+    registry.reload()
+    duplicate = write(tmp_path, "b.json", {"name": "dup", "shifts": [2, 2]})
+    result = registry.reload()
+    assert registry.get("dup").rounds == 1
+    assert "a.json" in result["errors"][str(duplicate)]
+
+
+def test_reserved_stock_name_is_rejected(registry, tmp_path):
+    stock = registry.get()
+    path = write(tmp_path, "stock.json", {"name": variants.DEFAULT_VARIANT, "shifts": [1]})
+    result = registry.reload()
+    assert str(path) in result["errors"]
+    assert registry.get() is stock
+
+
+def test_errors_of_deleted_files_are_dropped(registry, tmp_path):
+    path = write(tmp_path, "bad.json", "[]")
+    assert str(path) in registry.reload()["errors"]
+    path.unlink()
+    assert registry.reload()["errors"] == {}
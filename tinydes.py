@@ -1,3 +1,6 @@
+from input_parser import convert_input
+
+
 class TinyDES:
     """
     TinyDES - A miniature version of DES algorithm
@@ -7,7 +10,16 @@ class TinyDES:
     - 6-bit subkeys for each round
     """
     
-    def __init__(self):
+    # Lịch dịch vòng của khóa: vòng 1 dịch 1 bit, vòng 2 dịch 2 bit, vòng 3 dịch 1 bit
+    DEFAULT_SHIFTS = (1, 2, 1)
+    
+    def __init__(self, sbox=None, shifts=None):
+        """
+        sbox/shifts: optional S-box (4x16) and per-round shift schedule for
+        cipher variants; the number of rounds equals len(shifts)
+        """
+        self.shifts = list(shifts) if shifts is not None else list(self.DEFAULT_SHIFTS)
+        
         # S-box table from the images (4x16 matrix)
         self.sbox = [
             [0xE, 0x4, 0xD, 0x1, 0x2, 0xF, 0xB, 0x8, 0x3, 0xA, 0x6, 0xC, 0x5, 0x9, 0x0, 0x7],
@@ -15,6 +27,8 @@ class TinyDES:
             [0x4, 0x1, 0xE, 0x8, 0xD, 0x6, 0x2, 0xB, 0xF, 0xC, 0x9, 0x7, 0x3, 0xA, 0x5, 0x0],
             [0xF, 0xC, 0x8, 0x2, 0x4, 0x9, 0x1, 0x7, 0x5, 0xB, 0x3, 0xE, 0xA, 0x0, 0x6, 0xD]
         ]
+        if sbox is not None:
+            self.sbox = [list(row) for row in sbox]
     
     def int_to_binary(self, value, bits):
         """Convert integer to binary string with specified bit length"""
@@ -146,9 +160,10 @@ class TinyDES:
         
         return shifted
     
-    def generate_subkeys(self, key):
+    def subkey_schedule(self, key):
         """
-        Generate subkeys for all 3 rounds
+        Generate subkeys with details (one entry per round)
+        Returns: list of dicts with kl, kr, shifted halves, subkey and shift amount
         """
         # Convert key to binary string if needed
         if isinstance(key, int):
@@ -160,32 +175,32 @@ class TinyDES:
         key_bin = key_bin.zfill(8)
         
         # Split key into KL0 and KR0 (4 bits each)
-        kl0 = key_bin[:4]
-        kr0 = key_bin[4:]
-        
-        subkeys = []
-        kl_current = kl0
-        kr_current = kr0
-        
-        # Round 1: shift by 1 bit
-        kl1 = self.left_circular_shift(kl_current, 1, 4)
-        kr1 = self.left_circular_shift(kr_current, 1, 4)
-        k1 = self.compress_key(kl1, kr1)
-        subkeys.append(k1)
-        
-        # Round 2: shift by 2 bits
-        kl2 = self.left_circular_shift(kl1, 2, 4)
-        kr2 = self.left_circular_shift(kr1, 2, 4)
-        k2 = self.compress_key(kl2, kr2)
-        subkeys.append(k2)
-        
-        # Round 3: shift by 1 bit
-        kl3 = self.left_circular_shift(kl2, 1, 4)
-        kr3 = self.left_circular_shift(kr2, 1, 4)
-        k3 = self.compress_key(kl3, kr3)
-        subkeys.append(k3)
+        kl_current = key_bin[:4]
+        kr_current = key_bin[4:]
+        
+        details = []
+        for i, shift in enumerate(self.shifts):
+            # Round i+1: shift both halves by the scheduled amount
+            kl_shifted = self.left_circular_shift(kl_current, shift, 4)
+            kr_shifted = self.left_circular_shift(kr_current, shift, 4)
+            details.append({
+                'round': i + 1,
+                'kl': kl_current,
+                'kr': kr_current,
+                'kl_shifted': kl_shifted,
+                'kr_shifted': kr_shifted,
+                'subkey': self.compress_key(kl_shifted, kr_shifted),
+                'shift_amount': shift
+            })
+            kl_current, kr_current = kl_shifted, kr_shifted
         
-        return subkeys
+        return details
+    
+    def generate_subkeys(self, key):
+        """
+        Generate subkeys for all rounds
+        """
+        return [detail['subkey'] for detail in self.subkey_schedule(key)]
     
     def feistel_function(self, r, subkey):
         """
@@ -279,8 +294,8 @@ class TinyDES:
         # Generate subkeys
         subkeys = self.generate_subkeys(key_bin)
         
-        # Perform 3 Feistel rounds
-        for i in range(3):
+        # Perform the Feistel rounds (3 for the standard schedule)
+        for i in range(len(subkeys)):
             left, right = self.feistel_round(left, right, subkeys[i])
         
         # Final result is L3 || R3
@@ -317,62 +332,15 @@ class TinyDES:
         kr0 = key_bin[4:]
         
         # Generate subkeys with details
-        subkeys = []
-        subkey_details = []
-        kl_current = kl0
-        kr_current = kr0
-        
-        # Round 1: shift by 1 bit
-        kl1 = self.left_circular_shift(kl_current, 1, 4)
-        kr1 = self.left_circular_shift(kr_current, 1, 4)
-        k1 = self.compress_key(kl1, kr1)
-        subkeys.append(k1)
-        subkey_details.append({
-            'round': 1,
-            'kl': kl_current,
-            'kr': kr_current,
-            'kl_shifted': kl1,
-            'kr_shifted': kr1,
-            'subkey': k1,
-            'shift_amount': 1
-        })
-        
-        # Round 2: shift by 2 bits
-        kl2 = self.left_circular_shift(kl1, 2, 4)
-        kr2 = self.left_circular_shift(kr1, 2, 4)
-        k2 = self.compress_key(kl2, kr2)
-        subkeys.append(k2)
-        subkey_details.append({
-            'round': 2,
-            'kl': kl1,
-            'kr': kr1,
-            'kl_shifted': kl2,
-            'kr_shifted': kr2,
-            'subkey': k2,
-            'shift_amount': 2
-        })
-        
-        # Round 3: shift by 1 bit
-        kl3 = self.left_circular_shift(kl2, 1, 4)
-        kr3 = self.left_circular_shift(kr2, 1, 4)
-        k3 = self.compress_key(kl3, kr3)
-        subkeys.append(k3)
-        subkey_details.append({
-            'round': 3,
-            'kl': kl2,
-            'kr': kr2,
-            'kl_shifted': kl3,
-            'kr_shifted': kr3,
-            'subkey': k3,
-            'shift_amount': 1
-        })
-        
-        # Perform 3 Feistel rounds with details
+        subkey_details = self.subkey_schedule(key_bin)
+        subkeys = [detail['subkey'] for detail in subkey_details]
+        
+        # Perform the Feistel rounds with details
         rounds = []
         current_left = left
         current_right = right
         
-        for i in range(3):
+        for i in range(len(subkeys)):
             round_num = i + 1
             # Get feistel function details
             feistel_details = self.feistel_function_detailed(current_right, subkeys[i])
@@ -457,65 +425,18 @@ class TinyDES:
         kl0 = key_bin[:4]
         kr0 = key_bin[4:]
         
-        # Generate subkeys with details (same as encryption)
-        subkeys = []
-        subkey_details = []
-        kl_current = kl0
-        kr_current = kr0
-        
-        # Round 1: shift by 1 bit
-        kl1 = self.left_circular_shift(kl_current, 1, 4)
-        kr1 = self.left_circular_shift(kr_current, 1, 4)
-        k1 = self.compress_key(kl1, kr1)
-        subkeys.append(k1)
-        subkey_details.append({
-            'round': 1,
-            'kl': kl_current,
-            'kr': kr_current,
-            'kl_shifted': kl1,
-            'kr_shifted': kr1,
-            'subkey': k1,
-            'shift_amount': 1
-        })
-        
-        # Round 2: shift by 2 bits
-        kl2 = self.left_circular_shift(kl1, 2, 4)
-        kr2 = self.left_circular_shift(kr1, 2, 4)
-        k2 = self.compress_key(kl2, kr2)
-        subkeys.append(k2)
-        subkey_details.append({
-            'round': 2,
-            'kl': kl1,
-            'kr': kr1,
-            'kl_shifted': kl2,
-            'kr_shifted': kr2,
-            'subkey': k2,
-            'shift_amount': 2
-        })
-        
-        # Round 3: shift by 1 bit
-        kl3 = self.left_circular_shift(kl2, 1, 4)
-        kr3 = self.left_circular_shift(kr2, 1, 4)
-        k3 = self.compress_key(kl3, kr3)
-        subkeys.append(k3)
-        subkey_details.append({
-            'round': 3,
-            'kl': kl2,
-            'kr': kr2,
-            'kl_shifted': kl3,
-            'kr_shifted': kr3,
-            'subkey': k3,
-            'shift_amount': 1
-        })
-        
-        # Perform 3 Feistel rounds in reverse order with details
-        # For decryption: process rounds in reverse order (subkey[2], subkey[1], subkey[0])
+        # Generate subkeys with details
+        subkey_details = self.subkey_schedule(key_bin)
+        subkeys = [detail['subkey'] for detail in subkey_details]
+        
+        # Perform the Feistel rounds in reverse order with details
+        # For decryption: process rounds in reverse order (subkey[n-1], ..., subkey[0])
         rounds = []
         current_left = left
         current_right = right
         
-        for i in range(2, -1, -1):  # Reverse order: 2, 1, 0 (use subkeys[2], subkeys[1], subkeys[0])
-            round_num = 3 - i  # Display round number (1, 2, 3)
+        for i in range(len(subkeys) - 1, -1, -1):  # Reverse order: n-1, ..., 0
+            round_num = len(subkeys) - i  # Display round number (1, 2, ..., n)
             
             # Save current state before processing
             input_left = current_left
@@ -608,8 +529,8 @@ class TinyDES:
         # Generate subkeys (same as encryption)
         subkeys = self.generate_subkeys(key_bin)
         
-        # Perform 3 Feistel rounds in reverse order
-        for i in range(2, -1, -1):  # Reverse order: 2, 1, 0
+        # Perform the Feistel rounds in reverse order
+        for i in range(len(subkeys) - 1, -1, -1):  # Reverse order: n-1, ..., 0
             # For decryption, we need to reverse the Feistel operation
             f_result = self.feistel_function(left, subkeys[i])
             new_right = self.binary_to_int(right) ^ self.binary_to_int(f_result)
@@ -936,41 +857,6 @@ def test_compress(tinydes):
     print(f"✅ Compress({kl}, {kr}) = {result}")
 
 
-def convert_input(user_input, expected_bits):
-    """
-    Chuyển đổi input từ người dùng thành binary string
-    """
-    user_input = user_input.strip().lower()
-    
-    try:
-        # Nếu là binary
-        if all(c in '01' for c in user_input):
-            if len(user_input) == expected_bits:
-                return user_input
-            elif len(user_input) < expected_bits:
-                return user_input.zfill(expected_bits)
-            else:
-                return None
-        
-        # Nếu là hex
-        elif user_input.startswith('0x'):
-            hex_value = user_input[2:]
-            if len(hex_value) <= 2 and all(c in '0123456789abcdef' for c in hex_value):
-                decimal = int(hex_value, 16)
-                return format(decimal, f'0{expected_bits}b')
-        
-        # Nếu là decimal
-        elif user_input.isdigit():
-            decimal = int(user_input)
-            if 0 <= decimal < 2**expected_bits:
-                return format(decimal, f'0{expected_bits}b')
-        
-        return None
-        
-    except ValueError:
-        return None
-
-
 def show_info():
     """
     Hiển thị thông tin về TinyDES
@@ -997,6 +883,13 @@ def show_info():
 
 
 if __name__ == "__main__":
+    import sys
+    
+    # Có tham số dòng lệnh: dùng giao diện không tương tác (cli.py)
+    if len(sys.argv) > 1:
+        from cli import main
+        sys.exit(main())
+    
     print("Chọn chế độ chạy:")
     print("1. Chế độ tương tác (nhập dữ liệu)")
     print("2. Chế độ test tự động")
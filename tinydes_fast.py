@@ -0,0 +1,182 @@
+"""
+Engine TinyDES dạng bảng tra (table-driven) cho HỆ THỐNG MÃ HÓA TINYDES
+
+Các bảng Expand, S-box, P-box và khóa con được sinh ra từ chính các hàm
+của lớp TinyDES gốc, nên engine này luôn khớp với thuật toán tham chiếu
+nhưng làm việc trên số nguyên và bytes thay vì chuỗi nhị phân.
+"""
+
+from tinydes import TinyDES
+
+
+def xor_bytes(a, b):
+    """XOR two equal-length byte strings using big-integer arithmetic"""
+    n = len(a)
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(n, 'big')
+
+
+# Bảng tách nửa trái/phải của một byte và ghép lại
+HIGH_NIBBLE = bytes(b >> 4 for b in range(256))
+LOW_NIBBLE = bytes(b & 0xF for b in range(256))
+SHIFT_NIBBLE = bytes((b & 0xF) << 4 for b in range(256))
+
+def trace_column_spec(rounds=3):
+    """(name, bit width) of every trace column for a cipher with the given number of rounds"""
+    spec = [('plaintext', 8), ('key', 8)] + [(f'k{r}', 6) for r in range(1, rounds + 1)]
+    for r in range(1, rounds + 1):
+        spec += [
+            (f'r{r}_left', 4),
+            (f'r{r}_right', 4),
+            (f'r{r}_expanded', 6),
+            (f'r{r}_xor', 6),
+            (f'r{r}_row', 2),
+            (f'r{r}_col', 4),
+            (f'r{r}_sbox', 4),
+            (f'r{r}_pbox', 4),
+        ]
+    spec.append(('ciphertext', 8))
+    return spec
+
+
+# Tên và độ rộng (bit) của các cột trong một trace của TinyDES gốc (3 vòng)
+TRACE_COLUMNS = trace_column_spec()
+TRACE_COLUMN_NAMES = [name for name, _ in TRACE_COLUMNS]
+
+
+class FastTinyDES:
+    """
+    Table-driven TinyDES engine
+    - Works on integers (single blocks) and bytes (bulk ECB)
+    - Every table is derived from a reference TinyDES instance
+    - Per-key 256-byte permutations are built lazily and cached
+    """
+
+    name = "table"
+
+    def __init__(self, reference=None):
+        ref = reference if reference is not None else TinyDES()
+        self.reference = ref
+
+        # Bảng cho từng hàm thành phần
+        self.expand_table = [int(ref.expand(r), 2) for r in range(16)]
+        self.sbox_table = [int(ref.sbox_lookup(x), 2) for x in range(64)]
+        self.pbox_table = [int(ref.pbox_permute(s), 2) for s in range(16)]
+        self.subkey_table = [
+            tuple(int(k, 2) for k in ref.generate_subkeys(key)) for key in range(256)
+        ]
+
+        # F(R, K) cho mọi cặp (khóa con 6-bit, R 4-bit)
+        self.f_table = [
+            [self.pbox_table[self.sbox_table[self.expand_table[r] ^ k]] for r in range(16)]
+            for k in range(64)
+        ]
+
+        # Bảng 256 phần tử dùng với bytes.translate
+        self.expand_bytes = bytes(self.expand_table[b & 0xF] for b in range(256))
+        self.sbox_bytes = bytes(self.sbox_table[b & 0x3F] for b in range(256))
+        self.pbox_bytes = bytes(self.pbox_table[b & 0xF] for b in range(256))
+        self.row_bytes = bytes(((b >> 4) & 0x2) | (b & 0x1) for b in range(256))
+        self.col_bytes = bytes((b >> 1) & 0xF for b in range(256))
+        self.rounds = len(self.subkey_table[0])
+        # Cột trace của engine này (số cột phụ thuộc số vòng)
+        self.trace_spec = trace_column_spec(self.rounds)
+        self.trace_names = [name for name, _ in self.trace_spec]
+        self.round_key_bytes = [
+            bytes(self.subkey_table[key][i] for key in range(256)) for i in range(self.rounds)
+        ]
+
+        self._enc_tables = [None] * 256
+        self._dec_tables = [None] * 256
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def subkeys(self, key):
+        """Return the 6-bit round subkeys (one per round) of an 8-bit key"""
+        return self.subkey_table[key]
+
+    def encrypt_block(self, plaintext, key):
+        """Encrypt one 8-bit block (int) with an 8-bit key (int)"""
+        f = self.f_table
+        left, right = plaintext >> 4, plaintext & 0xF
+        for k in self.subkey_table[key]:
+            left, right = right, left ^ f[k][right]
+        return (left << 4) | right
+
+    def decrypt_block(self, ciphertext, key):
+        """Decrypt one 8-bit block (int) with an 8-bit key (int)"""
+        f = self.f_table
+        left, right = ciphertext >> 4, ciphertext & 0xF
+        for k in reversed(self.subkey_table[key]):
+            left, right = right ^ f[k][left], left
+        return (left << 4) | right
+
+    def encrypt_table(self, key):
+        """256-byte permutation mapping every plaintext to its ciphertext"""
+        table = self._enc_tables[key]
+        if table is None:
+            self.cache_misses += 1
+            table = bytes(self.encrypt_block(p, key) for p in range(256))
+            self._enc_tables[key] = table
+        else:
+            self.cache_hits += 1
+        return table
+
+    def cache_info(self):
+        """(hits, misses) of the per-key permutation table cache"""
+        return self.cache_hits, self.cache_misses
+
+    def decrypt_table(self, key):
+        """256-byte inverse permutation of encrypt_table(key)"""
+        table = self._dec_tables[key]
+        if table is None:
+            enc = self.encrypt_table(key)
+            inverse = bytearray(256)
+            for p, c in enumerate(enc):
+                inverse[c] = p
+            table = bytes(inverse)
+            self._dec_tables[key] = table
+        return table
+
+    def encrypt_bytes(self, data, key):
+        """Encrypt a byte string block by block (ECB)"""
+        return bytes(data).translate(self.encrypt_table(key))
+
+    def decrypt_bytes(self, data, key):
+        """Decrypt a byte string block by block (ECB)"""
+        return bytes(data).translate(self.decrypt_table(key))
+
+    def trace_columns(self, plaintexts, keys):
+        """
+        Compute round-by-round traces for many (plaintext, key) pairs
+        Input: two equal-length byte strings
+        Returns: list of byte columns in self.trace_spec order
+        """
+        plaintexts = bytes(plaintexts)
+        keys = bytes(keys)
+        if len(plaintexts) != len(keys):
+            raise ValueError("plaintexts và keys phải có cùng độ dài")
+
+        round_keys = [keys.translate(t) for t in self.round_key_bytes]
+        left = plaintexts.translate(HIGH_NIBBLE)
+        right = plaintexts.translate(LOW_NIBBLE)
+
+        columns = [plaintexts, keys] + round_keys
+        for k in round_keys:
+            expanded = right.translate(self.expand_bytes)
+            xored = xor_bytes(expanded, k)
+            sbox = xored.translate(self.sbox_bytes)
+            pbox = sbox.translate(self.pbox_bytes)
+            columns += [
+                left,
+                right,
+                expanded,
+                xored,
+                xored.translate(self.row_bytes),
+                xored.translate(self.col_bytes),
+                sbox,
+                pbox,
+            ]
+            left, right = right, xor_bytes(left, pbox)
+
+        columns.append(xor_bytes(left.translate(SHIFT_NIBBLE), right))
+        return columns
@@ -0,0 +1,335 @@
+"""
+Kho trace tính sẵn cho toàn bộ 65.536 cặp (plaintext, key) của TinyDES
+
+Mọi giá trị trung gian của từng vòng được đóng gói bit và ghi vào một
+file, sau đó ánh xạ vào bộ nhớ (mmap). Các hàm encrypt_detailed /
+decrypt_detailed của kho trả về đúng cấu trúc dict như TinyDES nhưng chỉ
+còn là tra cứu và định dạng chuỗi.
+
+Bố cục file:
+    header: magic b'TDTS', version (u8), fingerprint (32 byte)
+    phần khóa: 256 bản ghi x 9 byte
+        với mỗi vòng: (KL<<4 | KR) sau khi dịch, khóa con 6-bit, số bit dịch
+    phần mã hóa: 65536 bản ghi x 13 byte, chỉ số = key * 256 + plaintext
+        với mỗi vòng: (L<<4 | R), expanded, xor, (sbox<<4 | pbox)
+        cuối cùng: ciphertext
+    phần giải mã: 65536 byte, chỉ số = key * 256 + ciphertext -> plaintext
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+from tinydes_fast import FastTinyDES, xor_bytes
+
+STORE_MAGIC = b'TDTS'
+STORE_VERSION = 1
+HEADER_SIZE = len(STORE_MAGIC) + 1 + 32
+KEY_RECORD_SIZE = 9
+TRACE_RECORD_SIZE = 13
+KEY_SECTION = HEADER_SIZE
+TRACE_SECTION = KEY_SECTION + 256 * KEY_RECORD_SIZE
+DECRYPT_SECTION = TRACE_SECTION + 65536 * TRACE_RECORD_SIZE
+STORE_SIZE = DECRYPT_SECTION + 65536
+
+DEFAULT_PATH = os.environ.get(
+    "TINYDES_TRACE_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tinydes_trace_store.bin"),
+)
+
+BIN4 = [format(v, '04b') for v in range(16)]
+BIN6 = [format(v, '06b') for v in range(64)]
+BIN8 = [format(v, '08b') for v in range(256)]
+
+
+def engine_fingerprint(engine):
+    """SHA-256 over the primitive tables an engine was built from"""
+    h = hashlib.sha256()
+    h.update(bytes(engine.expand_table))
+    h.update(bytes(engine.sbox_table))
+    h.update(bytes(engine.pbox_table))
+    for subkeys in engine.subkey_table:
+        h.update(bytes(subkeys))
+    return h.digest()
+
+
+def _to_int(value):
+    """Accept an int or a binary string like the TinyDES methods do"""
+    if isinstance(value, int):
+        return value
+    return int(value, 2)
+
+
+def build_store_bytes(engine=None):
+    """Compute the whole store image in memory"""
+    engine = engine if engine is not None else FastTinyDES()
+    ref = engine.reference
+    out = bytearray(STORE_SIZE)
+    out[:HEADER_SIZE] = STORE_MAGIC + struct.pack('<B', STORE_VERSION) + engine_fingerprint(engine)
+
+    # Lịch khóa: dịch vòng KL/KR theo đúng TinyDES gốc
+    shifts = (1, 2, 1)
+    for key in range(256):
+        kl, kr = BIN8[key][:4], BIN8[key][4:]
+        record = bytearray()
+        for shift, subkey in zip(shifts, engine.subkey_table[key]):
+            kl = ref.left_circular_shift(kl, shift, 4)
+            kr = ref.left_circular_shift(kr, shift, 4)
+            record += bytes(((int(kl, 2) << 4) | int(kr, 2), subkey, shift))
+        offset = KEY_SECTION + key * KEY_RECORD_SIZE
+        out[offset:offset + KEY_RECORD_SIZE] = record
+
+    # Trace theo cột cho toàn bộ không gian rồi xen kẽ thành bản ghi
+    plaintexts = bytes(range(256)) * 256
+    keys = bytes(i >> 8 for i in range(65536))
+    (_, _, _, _, _,
+     l1, r1, e1, x1, _, _, s1, p1,
+     l2, r2, e2, x2, _, _, s2, p2,
+     l3, r3, e3, x3, _, _, s3, p3,
+     ct) = engine.trace_columns(plaintexts, keys)
+    shift = bytes((b & 0xF) << 4 for b in range(256))
+    packed = []
+    for left, right, expanded, xored, sbox, pbox in (
+            (l1, r1, e1, x1, s1, p1), (l2, r2, e2, x2, s2, p2), (l3, r3, e3, x3, s3, p3)):
+        packed += [
+            xor_bytes(left.translate(shift), right),
+            expanded,
+            xored,
+            xor_bytes(sbox.translate(shift), pbox),
+        ]
+    packed.append(ct)
+    records = bytearray(65536 * TRACE_RECORD_SIZE)
+    for i, column in enumerate(packed):
+        records[i::TRACE_RECORD_SIZE] = column
+    out[TRACE_SECTION:DECRYPT_SECTION] = records
+
+    for key in range(256):
+        offset = DECRYPT_SECTION + key * 256
+        out[offset:offset + 256] = engine.decrypt_table(key)
+    return bytes(out)
+
+
+def build_store(path=DEFAULT_PATH, engine=None):
+    """Write the store file atomically"""
+    data = build_store_bytes(engine)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+class TraceStore:
+    """
+    Read-only view over a precomputed trace store
+    - Backed by an mmap of the store file (or an in-memory image)
+    - Lookups return the same structures as TinyDES
+    """
+
+    def __init__(self, buffer, path=None):
+        if len(buffer) != STORE_SIZE or buffer[:len(STORE_MAGIC)] != STORE_MAGIC:
+            raise ValueError("File trace store không hợp lệ")
+        self.buffer = buffer
+        self.path = path
+        self.fingerprint = bytes(buffer[len(STORE_MAGIC) + 1:HEADER_SIZE])
+
+    @classmethod
+    def open(cls, path=DEFAULT_PATH, engine=None, build=True):
+        """
+        Map the store at path, (re)building it when missing or stale
+        Falls back to an in-memory image if the file cannot be written
+        """
+        engine = engine if engine is not None else FastTinyDES()
+        expected = engine_fingerprint(engine)
+        try:
+            store = cls._map(path)
+            if store.fingerprint == expected:
+                return store
+            store.close()
+        except (OSError, ValueError):
+            pass
+        if not build:
+            raise ValueError(f"Không tìm thấy trace store hợp lệ tại {path}")
+        try:
+            build_store(path, engine)
+            return cls._map(path)
+        except OSError:
+            return cls(build_store_bytes(engine))
+
+    @classmethod
+    def _map(cls, path):
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(buffer, path)
+        except ValueError:
+            buffer.close()
+            raise
+
+    def close(self):
+        """Release the underlying mapping"""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def record(self, plaintext, key):
+        """Raw 13-byte trace record of one (plaintext, key) pair"""
+        offset = TRACE_SECTION + (_to_int(key) * 256 + _to_int(plaintext)) * TRACE_RECORD_SIZE
+        return self.buffer[offset:offset + TRACE_RECORD_SIZE]
+
+    def encrypt(self, plaintext, key):
+        """Ciphertext (int) looked up from the store"""
+        return self.record(plaintext, key)[12]
+
+    def decrypt(self, ciphertext, key):
+        """Plaintext (int) looked up from the store"""
+        return self.buffer[DECRYPT_SECTION + _to_int(key) * 256 + _to_int(ciphertext)]
+
+    def _key_schedule(self, key):
+        """Subkey details in the same layout as TinyDES.encrypt_detailed"""
+        offset = KEY_SECTION + key * KEY_RECORD_SIZE
+        record = self.buffer[offset:offset + KEY_RECORD_SIZE]
+        kl, kr = BIN4[key >> 4], BIN4[key & 0xF]
+        subkeys = []
+        details = []
+        for i in range(3):
+            packed, subkey, shift = record[3 * i], record[3 * i + 1], record[3 * i + 2]
+            kl_shifted, kr_shifted = BIN4[packed >> 4], BIN4[packed & 0xF]
+            subkeys.append(BIN6[subkey])
+            details.append({
+                'round': i + 1,
+                'kl': kl,
+                'kr': kr,
+                'kl_shifted': kl_shifted,
+                'kr_shifted': kr_shifted,
+                'subkey': BIN6[subkey],
+                'shift_amount': shift
+            })
+            kl, kr = kl_shifted, kr_shifted
+        return subkeys, details
+
+    def _rounds(self, plaintext, key):
+        """Decode the three encryption rounds of one pair"""
+        record = self.record(plaintext, key)
+        rounds = []
+        for i in range(3):
+            lr, expanded, xored, sp = record[4 * i:4 * i + 4]
+            f_result = sp & 0xF
+            rounds.append((lr >> 4, lr & 0xF, expanded, xored, sp >> 4, f_result,
+                           (lr >> 4) ^ f_result))
+        return rounds, record[12]
+
+    @staticmethod
+    def _round_dict(round_num, subkey, input_left, input_right, expanded, xored, sbox, f_result,
+                    new_left, new_right):
+        xor_bin = BIN6[xored]
+        return {
+            'round': round_num,
+            'input_left': BIN4[input_left],
+            'input_right': BIN4[input_right],
+            'subkey': subkey,
+            'expansion': BIN6[expanded],
+            'xor_with_key': xor_bin,
+            'sbox_input': xor_bin,
+            'sbox_row': ((xored >> 4) & 0x2) | (xored & 0x1),
+            'sbox_col': (xored >> 1) & 0xF,
+            'sbox_value': sbox,
+            'sbox_output': BIN4[sbox],
+            'pbox_output': BIN4[f_result],
+            'f_result': BIN4[f_result],
+            'new_left': BIN4[new_left],
+            'new_right': BIN4[new_right],
+            'output_left': BIN4[new_left],
+            'output_right': BIN4[new_right]
+        }
+
+    def encrypt_detailed(self, plaintext, key):
+        """Same result as TinyDES.encrypt_detailed, served from the store"""
+        pt, k = _to_int(plaintext), _to_int(key)
+        subkeys, subkey_details = self._key_schedule(k)
+        trace, ct = self._rounds(pt, k)
+
+        rounds = []
+        for i, (left, right, expanded, xored, sbox, f_result, new_right) in enumerate(trace):
+            rounds.append(self._round_dict(i + 1, subkeys[i], left, right, expanded, xored,
+                                           sbox, f_result, right, new_right))
+
+        pt_bin, key_bin, ct_bin = BIN8[pt], BIN8[k], BIN8[ct]
+        return {
+            'plaintext': pt_bin,
+            'plaintext_hex': hex(pt),
+            'plaintext_decimal': pt,
+            'key': key_bin,
+            'key_hex': hex(k),
+            'key_decimal': k,
+            'kl0': key_bin[:4],
+            'kr0': key_bin[4:],
+            'initial_left': pt_bin[:4],
+            'initial_right': pt_bin[4:],
+            'subkey_details': subkey_details,
+            'rounds': rounds,
+            'ciphertext': ct_bin,
+            'ciphertext_hex': hex(ct),
+            'ciphertext_decimal': ct,
+            'final_left': ct_bin[:4],
+            'final_right': ct_bin[4:]
+        }
+
+    def decrypt_detailed(self, ciphertext, key):
+        """Same result as TinyDES.decrypt_detailed, served from the store"""
+        ct, k = _to_int(ciphertext), _to_int(key)
+        pt = self.decrypt(ct, k)
+        subkeys, subkey_details = self._key_schedule(k)
+        trace, _ = self._rounds(pt, k)
+
+        # Giải mã đi ngược các vòng mã hóa của chính plaintext tương ứng
+        rounds = []
+        for j in range(3):
+            i = 2 - j
+            left, right, expanded, xored, sbox, f_result, new_right = trace[i]
+            round_dict = self._round_dict(j + 1, subkeys[i], right, new_right, expanded, xored,
+                                          sbox, f_result, right, left)
+            round_dict['subkey_round'] = i + 1
+            round_dict['xor_left_with_f'] = f"{BIN4[new_right]} XOR {BIN4[f_result]} = {BIN4[left]}"
+            rounds.append(round_dict)
+
+        ct_bin, key_bin, pt_bin = BIN8[ct], BIN8[k], BIN8[pt]
+        return {
+            'ciphertext': ct_bin,
+            'ciphertext_hex': hex(ct),
+            'ciphertext_decimal': ct,
+            'key': key_bin,
+            'key_hex': hex(k),
+            'key_decimal': k,
+            'kl0': key_bin[:4],
+            'kr0': key_bin[4:],
+            'initial_left': ct_bin[:4],
+            'initial_right': ct_bin[4:],
+            'subkey_details': subkey_details,
+            'rounds': rounds,
+            'plaintext': pt_bin,
+            'plaintext_hex': hex(pt),
+            'plaintext_decimal': pt,
+            'final_left': pt_bin[:4],
+            'final_right': pt_bin[4:]
+        }
+
+    def verify(self, reference=None, limit=None):
+        """
+        Cross-check the store against TinyDES.encrypt_detailed / decrypt_detailed
+        Returns: list of (kind, plaintext_or_ciphertext, key) mismatches
+        """
+        if reference is None:
+            from tinydes import TinyDES
+            reference = TinyDES()
+        mismatches = []
+        for index in range(65536 if limit is None else min(limit, 65536)):
+            key, block = index >> 8, index & 0xFF
+            if self.encrypt_detailed(block, key) != reference.encrypt_detailed(block, key):
+                mismatches.append(("encrypt", block, key))
+            if self.decrypt_detailed(block, key) != reference.decrypt_detailed(block, key):
+                mismatches.append(("decrypt", block, key))
+        return mismatches
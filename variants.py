@@ -0,0 +1,217 @@
+"""
+Sổ đăng ký các biến thể TinyDES (S-box, số vòng, lịch dịch khóa khác nhau)
+
+Mỗi biến thể được mô tả bằng một file JSON trong thư mục cấu hình
+(mặc định variants/, đổi bằng TINYDES_VARIANT_DIR):
+
+    {
+        "name": "tinydes-5r",
+        "description": "TinyDES 5 vòng",
+        "sbox": [[...16 giá trị...], ...4 hàng...],   (tùy chọn, mặc định S-box gốc)
+        "shifts": [1, 2, 1, 2, 1]                      (tùy chọn, số vòng = độ dài)
+    }
+
+Khi nạp, mỗi biến thể được biên dịch một lần: bảng F, lịch khóa và 256
+cặp hoán vị mã hóa/giải mã của engine bảng tra. Request chỉ tra từ điển
+theo tên, không bao giờ biên dịch.
+
+reload() so sánh mtime/kích thước từng file, chỉ biên dịch lại file đã đổi,
+gỡ biến thể có file bị xóa và giữ bản cũ nếu file mới bị lỗi. watch() chạy
+reload() định kỳ trong một thread nền nên sửa file cấu hình có hiệu lực mà
+không cần khởi động lại server. Biến thể gốc "tinydes" luôn có sẵn.
+"""
+
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import sbox_analysis
+from tinydes import TinyDES
+from tinydes_fast import FastTinyDES
+
+VARIANT_DIR = os.environ.get("TINYDES_VARIANT_DIR", "variants")
+DEFAULT_VARIANT = "tinydes"
+DEFAULT_POLL_INTERVAL = 2.0
+MAX_ROUNDS = 16
+NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_.-]{0,47}$")
+
+
+def parse_spec(data):
+    """Validate a variant spec (dict); returns it normalized"""
+    if not isinstance(data, dict):
+        raise ValueError("Cấu hình biến thể phải là một object JSON")
+    name = data.get("name")
+    if not isinstance(name, str) or not NAME_PATTERN.match(name):
+        raise ValueError("name phải gồm chữ thường, số, '_', '-', '.' (tối đa 48 ký tự)")
+    sbox = data.get("sbox")
+    sbox = [list(row) for row in sbox_analysis.validate(sbox)] if sbox is not None else TinyDES().sbox
+    shifts = data.get("shifts", list(TinyDES.DEFAULT_SHIFTS))
+    if (not isinstance(shifts, list) or not 1 <= len(shifts) <= MAX_ROUNDS
+            or any(not isinstance(s, int) or not 0 <= s < 4 for s in shifts)):
+        raise ValueError(f"shifts phải là danh sách 1..{MAX_ROUNDS} số nguyên trong khoảng 0..3")
+    return {
+        "name": name,
+        "description": str(data.get("description", "")),
+        "sbox": sbox,
+        "shifts": list(shifts),
+    }
+
+
+def fingerprint(spec):
+    """SHA-256 of the canonical JSON of a normalized spec"""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+class Variant:
+    """One compiled cipher variant: reference implementation plus table engine"""
+
+    def __init__(self, spec, path=None, reference=None, engine=None):
+        self.spec = spec
+        self.name = spec["name"]
+        self.path = path
+        self.reference = reference if reference is not None else TinyDES(spec["sbox"], spec["shifts"])
+        self.engine = engine if engine is not None else FastTinyDES(self.reference)
+        started = time.perf_counter()
+        # Biên dịch toàn bộ bảng hoán vị ngay khi nạp
+        for key in range(256):
+            self.engine.decrypt_table(key)
+        self.compile_seconds = time.perf_counter() - started
+        self.fingerprint = fingerprint(spec)
+        self.loaded_at = time.time()
+        # Kết quả phân tích (keyspace, avalanche) tính lười, mất theo bản biên dịch khi file đổi
+        self.analyses = {}
+
+    @property
+    def rounds(self):
+        return len(self.spec["shifts"])
+
+    def info(self):
+        return {
+            "name": self.name,
+            "description": self.spec["description"],
+            "rounds": self.rounds,
+            "shifts": self.spec["shifts"],
+            "sbox": self.spec["sbox"],
+            "fingerprint": self.fingerprint,
+            "source": self.path,
+            "loaded_at": self.loaded_at,
+            "compile_ms": round(self.compile_seconds * 1000, 3),
+        }
+
+
+def stock_variant(reference=None, engine=None):
+    """The built-in TinyDES, optionally wrapping existing instances"""
+    reference = reference if reference is not None else TinyDES()
+    spec = {"name": DEFAULT_VARIANT, "description": "TinyDES gốc (3 vòng)",
+            "sbox": [list(row) for row in reference.sbox], "shifts": list(reference.shifts)}
+    return Variant(spec, reference=reference, engine=engine)
+
+
+def load_file(path):
+    """Parse and compile one variant file"""
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON không hợp lệ: {e}")
+    return Variant(parse_spec(data), path)
+
+
+class VariantRegistry:
+    """Variants by name, hot-reloaded from a directory of JSON specs"""
+
+    def __init__(self, directory=VARIANT_DIR, stock=None):
+        self.directory = directory
+        self._variants = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._failed = {}
+        self.reloads = 0
+        self.set_stock(stock if stock is not None else stock_variant())
+
+    def set_stock(self, variant):
+        with self._lock:
+            self._variants[DEFAULT_VARIANT] = variant
+
+    def get(self, name=None):
+        """Compiled variant by name (default: stock); raises KeyError if unknown"""
+        with self._lock:
+            return self._variants[name or DEFAULT_VARIANT]
+
+    def find(self, name=None):
+        """Like get() but returns None for an unknown name"""
+        with self._lock:
+            return self._variants.get(name or DEFAULT_VARIANT)
+
+    def names(self):
+        with self._lock:
+            return sorted(self._variants, key=lambda n: (n != DEFAULT_VARIANT, n))
+
+    def entries(self):
+        with self._lock:
+            return [self._variants[n].info() for n in sorted(self._variants, key=lambda n: (n != DEFAULT_VARIANT, n))]
+
+    def reload(self):
+        """
+        Rescan the directory, compiling only new or modified files
+        Returns: {'loaded': [...], 'removed': [...], 'errors': {path: message}}
+        """
+        with self._reload_lock:
+            loaded, removed = [], []
+            seen = set()
+            for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                previous = self._sources.get(path)
+                if previous is not None and previous[0] == signature:
+                    continue
+                if path in self._failed and self._failed[path][0] == signature:
+                    continue
+                try:
+                    variant = load_file(path)
+                    if variant.name == DEFAULT_VARIANT:
+                        raise ValueError(f"Tên '{DEFAULT_VARIANT}' dành cho biến thể gốc")
+                    owner = next((p for p, (_, n) in self._sources.items() if n == variant.name and p != path), None)
+                    if owner is not None:
+                        raise ValueError(f"Tên '{variant.name}' đã được dùng trong {owner}")
+                except (OSError, ValueError) as e:
+                    # Giữ bản đã nạp trước đó (nếu có), chỉ ghi nhận lỗi
+                    self._failed[path] = (signature, str(e))
+                    continue
+                self._failed.pop(path, None)
+                with self._lock:
+                    if previous is not None and previous[1] != variant.name:
+                        self._variants.pop(previous[1], None)
+                    self._variants[variant.name] = variant
+                self._sources[path] = (signature, variant.name)
+                loaded.append(variant.name)
+            for path in set(self._sources) - seen:
+                _, name = self._sources.pop(path)
+                with self._lock:
+                    self._variants.pop(name, None)
+                removed.append(name)
+            for path in set(self._failed) - seen:
+                del self._failed[path]
+            self.reloads += 1
+            return {"loaded": loaded, "removed": removed, "errors": self.errors}
+
+    @property
+    def errors(self):
+        """{path: message} of files that currently fail to load"""
+        return {path: message for path, (_, message) in self._failed.items()}
+
+    async def watch(self, interval=DEFAULT_POLL_INTERVAL):
+        """Reload periodically in a worker thread (run as a background task)"""
+        while True:
+            await asyncio.to_thread(self.reload)
+            await asyncio.sleep(interval)